@@ -1,20 +1,39 @@
 import os
+import sys
 import argparse
 import datetime
 
-import win32api
-import win32con
-import win32gui
+try:
+    import win32api
+    import win32con
+    import win32gui
+except ImportError: #not on Windows, the windows are neither transparent nor pinned on top
+    win32api = win32con = win32gui = None
 
+# stdout may carry the frames of --render -o -
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
 import pygame
 from pygame._sdl2 import Window
 
 from colorama import Style
 from threading import Thread, Event
 import math
+import bisect
 import numpy as np
-from functools import reduce
 import csv
+import json
+import sqlite3
+import hashlib
+import zipfile
+import array
+import itertools
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import time
+import types
+import tracemalloc
 
 version = "0.4"
 
@@ -22,19 +41,49 @@ version = "0.4"
 MEASURE_FRAME_RATE = 1000
 SAMPLING_RATE = 10 #every 10 to 11ms
 
+# VISUALIZE Thread FPS
+VISUALIZE_FRAME_RATE = 60
+VISUALIZE_IDLE_FRAME_RATE = 4
+VISUALIZE_IDLE_MS = 2000 #inputs static for this long
+VISUALIZE_HIDDEN_WAIT_MS = 250
+
 # ANALYZE MAX MSs
 MAX_MS = 1000
 AGGR_MAX_MS = 10000
 
+# HISTORY pyramid spans, each drawn with HISTORY_BUCKETS min/max/mean buckets
+HISTORY_SPANS_MS = [10000, 60000, 600000]
+HISTORY_BUCKETS = 200
+# zoom steps of the history lines, MAX_MS draws raw samples
+HISTORY_ZOOM_SPANS_MS = [MAX_MS] + HISTORY_SPANS_MS
+
 # ANALYZE THRESHOLDS
 THRESHOLD_STICK_BIG_MOVEMENT = 0.1
 THRESHOLD_STICK_KEEP_MOVING = 0.01
 THRESHOLD_STICK_ACCELERATION = 0.0075
 THRESHOLD_STICK_ACCELERATION_STRICT = 0.01
 
+def default_thresholds():
+    """Returns the analyze thresholds used by the live loop, keyed as in the threshold sweep."""
+    return {
+        "big_movement": THRESHOLD_STICK_BIG_MOVEMENT,
+        "keep_moving": THRESHOLD_STICK_KEEP_MOVING,
+        "acceleration": THRESHOLD_STICK_ACCELERATION,
+        "acceleration_strict": THRESHOLD_STICK_ACCELERATION_STRICT,
+    }
+
 # JOYSTICK Step Accuracy, HISTOGRAM BINS for calculating mode
 JOYSTICK_HIST_STEPS = 32
 
+# SDL axes are int16, pygame divides them by this
+JOYSTICK_AXIS_SCALE = 32768
+
+# Sample indexes of (x, y) for the left and right stick magnitudes
+STICK_MAGNITUDE_X = [0, 2]
+STICK_MAGNITUDE_Y = [1, 3]
+# Percentiles of the stick magnitudes over MAX_MS, e.g. [50, 90]. Empty to skip.
+STICK_MAGNITUDE_PERCENTILES = []
+
 BUTTONS_MAP = {'A': 0, 'B': 1, 'X': 2, 'Y': 3, 'SELECT': 4, 'HOME': 5, 'START': 6, 'LS': 7, 'RS': 8, 'LB': 9, 'RB': 10, 'UP': 11, 'DOWN': 12, 'LEFT': 13, 'RIGHT': 14, 'TOUCHPAD': 15}
 
 PIN_ON_TOP_POS = (1920 - 460, round((1080 + 250)/ 2))
@@ -44,6 +93,13 @@ HISTORY_LINE_BIG_MVMT_COLOR = (150, 150, 255)
 HISTORY_LINE_TURNED_COLOR = (150, 255, 150)
 HISTORY_LINE_BIG_TURN_COLOR = (255, 150, 150)
 
+# Indexes of HISTORY_LINE_COLORS, stored per sample and axis by the analyzer
+HISTORY_LINE_DEFAULT = 0
+HISTORY_LINE_BIG_MVMT = 1
+HISTORY_LINE_TURNED = 2
+HISTORY_LINE_BIG_TURN = 3
+HISTORY_LINE_COLORS = [HISTORY_LINE_DEFAULT_COLOR, HISTORY_LINE_BIG_MVMT_COLOR, HISTORY_LINE_TURNED_COLOR, HISTORY_LINE_BIG_TURN_COLOR]
+
 def prepare():
     os.system('cls' if os.name == 'nt' else 'clear')
     os.environ["SDL_JOYSTICK_ALLOW_BACKGROUND_EVENTS"] = "1"    #get key events while the window is not focused
@@ -187,19 +243,22 @@ def calc_stats(stats):
         "count": 0
     }
 
+    samples = buffered_samples(stats)
+    sticks = {key: samples[:, ANALYZE_AXIS_INDEX[key]].tolist() for key in ["lx", "ly", "rx", "ry"]}
+
     cur_ms = stats["timestamps"][-1]
-    for idx, stat in enumerate(stats["timestamps"]):
+    for idx, stat in enumerate(stats["timestamps"][:len(samples)]):
         if cur_ms - stat < 1000:
-            result["left_stick"]["x"]["1s"] += stats["lx"][idx]
-            result["left_stick"]["y"]["1s"] += stats["ly"][idx]
-            result["right_stick"]["x"]["1s"] += stats["rx"][idx]
-            result["right_stick"]["y"]["1s"] += stats["ry"][idx]
+            result["left_stick"]["x"]["1s"] += sticks["lx"][idx]
+            result["left_stick"]["y"]["1s"] += sticks["ly"][idx]
+            result["right_stick"]["x"]["1s"] += sticks["rx"][idx]
+            result["right_stick"]["y"]["1s"] += sticks["ry"][idx]
             result["count_1s"] += 1
 
-        result["left_stick"]["x"]["10s"] += stats["lx"][idx]
-        result["left_stick"]["y"]["10s"] += stats["ly"][idx]
-        result["right_stick"]["x"]["10s"] += stats["rx"][idx]
-        result["right_stick"]["y"]["10s"] += stats["ry"][idx]
+        result["left_stick"]["x"]["10s"] += sticks["lx"][idx]
+        result["left_stick"]["y"]["10s"] += sticks["ly"][idx]
+        result["right_stick"]["x"]["10s"] += sticks["rx"][idx]
+        result["right_stick"]["y"]["10s"] += sticks["ry"][idx]
         result["count"] += 1
 
     if result["count"] == 0:
@@ -219,32 +278,32 @@ def calc_stats(stats):
     result["right_stick"]["y"]["10s"] = result["right_stick"]["y"]["10s"] / result["count"]
 
     # Histogram
-    result["left_stick"]["x"]["hist"] = np.histogram(stats["lx"], JOYSTICK_HIST_STEPS)
-    result["left_stick"]["y"]["hist"] = np.histogram(stats["ly"], JOYSTICK_HIST_STEPS)
-    result["right_stick"]["x"]["hist"] = np.histogram(stats["rx"], JOYSTICK_HIST_STEPS)
-    result["right_stick"]["y"]["hist"] = np.histogram(stats["ry"], JOYSTICK_HIST_STEPS)
+    result["left_stick"]["x"]["hist"] = np.histogram(sticks["lx"], JOYSTICK_HIST_STEPS)
+    result["left_stick"]["y"]["hist"] = np.histogram(sticks["ly"], JOYSTICK_HIST_STEPS)
+    result["right_stick"]["x"]["hist"] = np.histogram(sticks["rx"], JOYSTICK_HIST_STEPS)
+    result["right_stick"]["y"]["hist"] = np.histogram(sticks["ry"], JOYSTICK_HIST_STEPS)
 
     # Mode.
-    #result["left_stick"]["x"]["mode"] = calc_stick_mode(stats["lx"])
-    #result["left_stick"]["y"]["mode"] = calc_stick_mode(stats["ly"])
-    #result["right_stick"]["x"]["mode"] = calc_stick_mode(stats["rx"])
-    #result["right_stick"]["y"]["mode"] = calc_stick_mode(stats["ry"])
+    #result["left_stick"]["x"]["mode"] = calc_stick_mode(sticks["lx"])
+    #result["left_stick"]["y"]["mode"] = calc_stick_mode(sticks["ly"])
+    #result["right_stick"]["x"]["mode"] = calc_stick_mode(sticks["rx"])
+    #result["right_stick"]["y"]["mode"] = calc_stick_mode(sticks["ry"])
     hist, bins = result["left_stick"]["x"]["hist"]; max_idx = hist.argmax(); result["left_stick"]["x"]["mode"] = (bins[max_idx], bins[max_idx + 1])
     hist, bins = result["left_stick"]["y"]["hist"]; max_idx = hist.argmax(); result["left_stick"]["y"]["mode"] = (bins[max_idx], bins[max_idx + 1])
     hist, bins = result["right_stick"]["x"]["hist"]; max_idx = hist.argmax(); result["right_stick"]["x"]["mode"] = (bins[max_idx], bins[max_idx + 1])
     hist, bins = result["right_stick"]["y"]["hist"]; max_idx = hist.argmax(); result["right_stick"]["y"]["mode"] = (bins[max_idx], bins[max_idx + 1])
 
     # MIN.
-    result["left_stick"]["x"]["min"] = np.min(stats["lx"])
-    result["left_stick"]["y"]["min"] = np.min(stats["ly"])
-    result["right_stick"]["x"]["min"] = np.min(stats["rx"])
-    result["right_stick"]["y"]["min"] = np.min(stats["ry"])
+    result["left_stick"]["x"]["min"] = np.min(sticks["lx"])
+    result["left_stick"]["y"]["min"] = np.min(sticks["ly"])
+    result["right_stick"]["x"]["min"] = np.min(sticks["rx"])
+    result["right_stick"]["y"]["min"] = np.min(sticks["ry"])
 
     # MAX.
-    result["left_stick"]["x"]["max"] = np.max(stats["lx"])
-    result["left_stick"]["y"]["max"] = np.max(stats["ly"])
-    result["right_stick"]["x"]["max"] = np.max(stats["rx"])
-    result["right_stick"]["y"]["max"] = np.max(stats["ry"])
+    result["left_stick"]["x"]["max"] = np.max(sticks["lx"])
+    result["left_stick"]["y"]["max"] = np.max(sticks["ly"])
+    result["right_stick"]["x"]["max"] = np.max(sticks["rx"])
+    result["right_stick"]["y"]["max"] = np.max(sticks["ry"])
     
     # AMP.
     result["left_stick"]["x"]["amp"] = result["left_stick"]["x"]["max"] - result["left_stick"]["x"]["min"]
@@ -274,6 +333,33 @@ def fix_stick_val(val):
         return (math.floor(val * 100000) / 100000 + 0.00002) / 0.99998
     return val
 
+# fix_stick_val() of every raw int16 axis value, indexed by raw value + JOYSTICK_AXIS_SCALE
+STICK_VAL_LUT = np.array([fix_stick_val(raw / JOYSTICK_AXIS_SCALE) for raw in range(-JOYSTICK_AXIS_SCALE, JOYSTICK_AXIS_SCALE)])
+
+def read_raw_axes(joystick):
+    """Reads the raw int16 values of ANALYZE_AXES, pygame divides them by JOYSTICK_AXIS_SCALE."""
+    return array.array('h', [round(joystick.get_axis(axis) * JOYSTICK_AXIS_SCALE) for axis in range(len(ANALYZE_AXES))])
+
+def calibrate_raw_axes(raw):
+    """Applies fix_stick_val() to raw int16 axis values of any shape through STICK_VAL_LUT, an array.array('h') or np.ndarray."""
+    return STICK_VAL_LUT[np.asarray(raw, dtype=np.intp) + JOYSTICK_AXIS_SCALE]
+
+def uncalibrate_samples(samples):
+    """The raw int16 values calibrate_raw_axes() maps to samples, the next one up for values fix_stick_val() never returns."""
+    return (np.clip(np.searchsorted(STICK_VAL_LUT, samples), 0, len(STICK_VAL_LUT) - 1) - JOYSTICK_AXIS_SCALE).astype(np.int16)
+
+def buffered_samples(stats, first = 0, last = None):
+    """Calibrated samples first to last - 1 of stats, as (n, len(ANALYZE_AXES)) like a slice of a list.
+
+    The raw int16 values are the only buffered copy of the axes, they are calibrated when read.
+    """
+
+    width = len(ANALYZE_AXES)
+    raw = stats["raw"]
+    first, last, _ = slice(first, last).indices(len(raw) // width)
+    # sliced out first, the buffer keeps growing and shrinking while a view of it is alive
+    return calibrate_raw_axes(np.frombuffer(raw[first * width:max(first, last) * width], dtype=np.int16).reshape(-1, width))
+
 def calc_color(rate):
     # |        LB         |         B         |         DB     |            DG          |         G         |           GY        |           Y         |           O         |          R        |          P         |
     # |(128, 128, 255) - 128 - (0, 0, 255) - 128 - (0, 0, 128) - 128 - (0, 128, 128) - 128 - (0, 255, 0) - 128 - (128, 255, 0) - 128 - (255, 255, 0) - 128 - (255, 128, 0) - 128 - (255, 0, 0) - 128 - (255, 0, 128)
@@ -352,7 +438,39 @@ def draw_history_lines(screen, stat_x, stat_y, center_x, center_y, font, guide_r
     plot_txt(screen, font, f'Y', center=(left - 5, y_top + height / 2))
 
 
-def draw_history_line(screen, stat, top, left, width, height, transparent=False, horizontal=True, colors = None):
+def draw_history_envelopes(screen, history_level, span_ms, cur_ms, axis_x, axis_y, center_x, center_y, font, guide_radius, first_line_dist, line_dist):
+    left = center_x + guide_radius + 20
+    x_top = center_y + first_line_dist - 30
+    y_top = x_top + line_dist * 4.5
+    height = 80
+
+    ms, mins, maxs, means = history_level_view(history_level)
+    draw_history_envelope(screen, ms, mins[:, axis_x], maxs[:, axis_x], means[:, axis_x], span_ms, cur_ms, x_top, left, guide_radius * 2, height)
+    draw_history_envelope(screen, ms, mins[:, axis_y], maxs[:, axis_y], means[:, axis_y], span_ms, cur_ms, y_top, left, guide_radius * 2, height)
+
+    plot_txt(screen, font, f'X', center=(left - 5, x_top + height / 2))
+    plot_txt(screen, font, f'Y', center=(left - 5, y_top + height / 2))
+
+
+def draw_history_envelope(screen, ms, mins, maxs, means, span_ms, cur_ms, top, left, width, height):
+    """Draws min/max band and mean line of history buckets, as draw_history_line does from the newest (left) to span_ms ago (right)."""
+
+    # Draw Area
+    pygame.draw.rect(screen, (50, 50, 50), (left, top, width, height))
+
+    in_span = cur_ms - ms <= span_ms
+    if np.count_nonzero(in_span) < 2:
+        return
+
+    xs = left + (cur_ms - ms[in_span]) / span_ms * width
+    def to_points(vals):
+        return np.column_stack([xs, top + height - ((-np.clip(vals[in_span], -1, 1) + 1) / 2) * height]).tolist()
+
+    pygame.draw.polygon(screen, (100, 100, 100), to_points(maxs) + to_points(mins)[::-1])
+    pygame.draw.lines(screen, HISTORY_LINE_DEFAULT_COLOR, False, to_points(means), 2)
+
+
+def draw_history_line(screen, stat, top, left, width, height, transparent=False, horizontal=True, colors = None, color_axis = 0):
     if len(stat) <= 0:
         return
 
@@ -376,12 +494,198 @@ def draw_history_line(screen, stat, top, left, width, height, transparent=False,
             new_pos = (left + width - ((-val + 1)/ 2) * width, top + height - (idx / x_count) * height)
 
         color = HISTORY_LINE_DEFAULT_COLOR
-        if colors:
-            color = colors[idx]
+        if colors and idx < len(colors):
+            color = HISTORY_LINE_COLORS[colors[idx][color_axis]]
 
         pygame.draw.line(screen, color, last_pos, new_pos, 2)
         last_pos = new_pos
 
+def wait_next_frame(clock, stats, stop_event, change_event):
+    """Waits until the next frame of the visualize loops has to be drawn.
+
+    A frame is drawn only after the measure thread published new samples, at most stats["max_fps"] FPS.
+    It drops to VISUALIZE_IDLE_FRAME_RATE while the inputs are static for VISUALIZE_IDLE_MS,
+    and pauses while the window is hidden or minimized.
+
+    Returns:
+        bool: False if the loop has to stop.
+    """
+
+    clock.tick(stats["max_fps"])
+    waited_from_ms = pygame.time.get_ticks()
+
+    while not stop_event.is_set() and not change_event.is_set():
+        if not pygame.display.get_active():
+            stop_event.wait(VISUALIZE_HIDDEN_WAIT_MS / 1000)
+            continue
+
+        if not stats["new_data"].wait(VISUALIZE_HIDDEN_WAIT_MS / 1000):
+            continue
+        stats["new_data"].clear()
+
+        cur_ms = pygame.time.get_ticks()
+        if cur_ms - stats["last_input_ms"] <= VISUALIZE_IDLE_MS:
+            return True
+        if cur_ms - waited_from_ms >= 1000 / VISUALIZE_IDLE_FRAME_RATE:
+            return True
+
+    return False
+
+def frame_fonts():
+    """Fonts of the frame drawings by size, loaded once per window."""
+    return {size: pygame.font.Font(None, size) for size in [16, 18, 22, 24]}
+
+def draw_stick_frame(screen, fonts, stats, sticks, cur_ms):
+    """Draws a frame of the stick mode.
+
+    Args:
+        screen (pygame.Surface): the window or an offscreen surface of 1100x490.
+        fonts (dict): frame_fonts().
+        stats (dict): stats
+        sticks (list[float]): current lx, ly, rx, ry.
+        cur_ms (int): ms of the frame.
+    """
+
+    font_label = fonts[16]
+    font_avg = fonts[24]
+    center_left = (160, 130)
+    center_right = (680, 130)
+    guide_radius = 100
+    line_dist = 20
+    first_line_dist = 140
+
+    screen.fill((30, 30, 30))
+    if not stats["connected"]:
+        plot_txt(screen, font_avg, 'Controller disconnected', center = (420, 15))
+
+    # Draws occupancy heatmaps of the session under the stick circles
+    stick_map = stats["stick_map"]
+    draw_stick_map(screen, stick_map, 0, center_left, guide_radius)
+    draw_stick_map(screen, stick_map, 1, center_right, guide_radius)
+
+    # Draws stick circles
+    #   RIGHT
+    pygame.draw.circle(screen, (200, 200, 200), center_right, guide_radius, 1)
+    pygame.draw.line(screen, (200, 200, 200), (center_right[0] - guide_radius, center_right[1]), (center_right[0] + guide_radius, center_right[1]), 1)
+    pygame.draw.line(screen, (200, 200, 200), (center_right[0], center_right[1] - guide_radius), (center_right[0], center_right[1] + guide_radius), 1)
+    #   LEFT
+    pygame.draw.circle(screen, (200, 200, 200), center_left, guide_radius, 1)
+    pygame.draw.line(screen, (200, 200, 200), (center_left[0] - guide_radius, center_left[1]), (center_left[0] + guide_radius, center_left[1]), 1)
+    pygame.draw.line(screen, (200, 200, 200), (center_left[0], center_left[1] - guide_radius), (center_left[0], center_left[1] + guide_radius), 1)
+
+    # Draws max radius per angle of the session over the stick circles
+    draw_stick_outline(screen, stick_map, 0, center_left, guide_radius, font_label)
+    draw_stick_outline(screen, stick_map, 1, center_right, guide_radius, font_label)
+
+    # Current positions of the sticks
+    lx, ly, rx, ry = sticks
+
+
+    # Draws current position of the sticks
+
+    #   LEFT
+    left_stick_position = (center_left[0] + int(lx * guide_radius), center_left[1] + int(ly * guide_radius))
+    pygame.draw.circle(screen, (255, 255, 255), left_stick_position, 3)
+    plot_txt(screen, font_avg, f'{lx:.5f}', center = (center_left[0], center_left[1] + first_line_dist))
+    plot_txt(screen, font_avg, f'{ly:.5f}', center =(center_left[0] + guide_radius + 70, center_left[1]))
+
+    #   RIGHT
+    right_stick_position = (center_right[0] + int(rx * guide_radius), center_right[1] + int(ry * guide_radius))
+    pygame.draw.circle(screen, (255, 255, 255), right_stick_position, 3)
+    plot_txt(screen, font_avg, f'{rx:.5f}', center=(center_right[0], center_right[1] + first_line_dist))
+    plot_txt(screen, font_avg, f'{ry:.5f}', center=(center_right[0] + guide_radius + 70, center_right[1]))
+
+    #   BAR
+    #     RX
+    pygame.draw.rect(screen, (200, 200, 200), (center_right[0] - guide_radius, center_right[1] + guide_radius + 10, guide_radius * 2, 20))
+    if rx < 0:
+        pygame.draw.rect(screen, (100, 100, 100), (center_right[0] - guide_radius * (- rx), center_right[1] + guide_radius + 10, guide_radius * (- rx), 20))
+    else:
+        pygame.draw.rect(screen, (100, 100, 100), (center_right[0], center_right[1] + guide_radius + 10, guide_radius * (rx), 20))
+
+    #     RY
+    pygame.draw.rect(screen, (200, 200, 200), (center_right[0] + guide_radius + 10, center_right[1] - guide_radius, 20, guide_radius * 2))
+    if ry < 0:
+        pygame.draw.rect(screen, (100, 100, 100), (center_right[0] + guide_radius + 10, center_right[1] - guide_radius * (- ry), 20, guide_radius * (- ry)))
+    else:
+        pygame.draw.rect(screen, (100, 100, 100), (center_right[0] + guide_radius + 10, center_right[1], 20, guide_radius * (ry)))
+
+    #     LX
+    pygame.draw.rect(screen, (200, 200, 200), (center_left[0] - guide_radius, center_left[1] + guide_radius + 10, guide_radius * 2, 20))
+    if lx < 0:
+        pygame.draw.rect(screen, (100, 100, 100), (center_left[0] - guide_radius * (- lx), center_left[1] + guide_radius + 10, guide_radius * (- lx), 20))
+    else:
+        pygame.draw.rect(screen, (100, 100, 100), (center_left[0], center_left[1] + guide_radius + 10, guide_radius * (lx), 20))
+
+    #     LY
+    pygame.draw.rect(screen, (200, 200, 200), (center_left[0] + guide_radius + 10, center_left[1] - guide_radius, 20, guide_radius * 2))
+    if ly < 0:
+        pygame.draw.rect(screen, (100, 100, 100), (center_left[0] + guide_radius + 10, center_left[1] - guide_radius * (- ly), 20, guide_radius * (- ly)))
+    else:
+        pygame.draw.rect(screen, (100, 100, 100), (center_left[0] + guide_radius + 10, center_left[1], 20, guide_radius * (ly)))
+
+
+    # Draws statistics
+    analyzed_stats = calc_stats(stats)
+    if analyzed_stats:
+        # Labels
+        plot_txt(screen, font_label, f'10s Histogram of {JOYSTICK_HIST_STEPS} bins.', center=(center_left[0], center_left[1] + first_line_dist + line_dist * 4.5))
+
+        # 1s Avg.
+        plot_txt(screen, font_label, "1s Avg.", center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["x"]["1s"], 5):.5f}', center=(center_left[0] - 50, center_left[1] + first_line_dist + line_dist))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["y"]["1s"], 5):.5f}', center=(center_left[0] + 50, center_left[1] + first_line_dist + line_dist))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["x"]["1s"], 5):.5f}', center=(center_right[0] - 50, center_right[1] + first_line_dist + line_dist))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["y"]["1s"], 5):.5f}', center=(center_right[0] + 50, center_right[1] +first_line_dist + line_dist))
+
+        # 10s Avg.
+        plot_txt(screen, font_label, "10s Avg.", center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist * 2))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["x"]["10s"], 5):.5f}', center=(center_left[0] - 50, center_left[1] + first_line_dist + line_dist * 2))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["y"]["10s"], 5):.5f}', center=(center_left[0] + 50, center_left[1] + first_line_dist + line_dist * 2))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["x"]["10s"], 5):.5f}', center=(center_right[0] - 50, center_right[1] + first_line_dist + line_dist * 2))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["y"]["10s"], 5):.5f}', center=(center_right[0] + 50, center_right[1] +first_line_dist + line_dist * 2))
+
+        # Amp.
+        plot_txt(screen, font_label, f'Amp.', center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist * 3))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["x"]["amp"], 5):.5f}', center=(center_left[0] - 50, center_left[1] + first_line_dist + line_dist * 3))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["y"]["amp"], 5):.5f}', center=(center_left[0] + 50, center_left[1] + first_line_dist + line_dist * 3))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["x"]["amp"], 5):.5f}', center=(center_right[0] - 50, center_right[1] + first_line_dist + line_dist * 3))
+        plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["y"]["amp"], 5):.5f}', center=(center_right[0] + 50, center_right[1] +first_line_dist + line_dist * 3))
+
+        # Mode.
+        plot_txt(screen, font_label, f'Mode', center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist * 7))
+        plot_txt(screen, font_avg, f'[ {round(analyzed_stats["left_stick"]["x"]["mode"][0], 5):.5f}, {round(analyzed_stats["left_stick"]["x"]["mode"][1], 5):.5f} )', center=(center_left[0], center_left[1] + first_line_dist + line_dist * 7))
+        plot_txt(screen, font_avg, f'[ {round(analyzed_stats["left_stick"]["y"]["mode"][0], 5):.5f}, {round(analyzed_stats["left_stick"]["y"]["mode"][1], 5):.5f} )', center=(center_left[0] + first_line_dist + line_dist * 9, center_left[1]))
+        plot_txt(screen, font_avg, f'[ {round(analyzed_stats["right_stick"]["x"]["mode"][0], 5):.5f}, {round(analyzed_stats["right_stick"]["x"]["mode"][1], 5):.5f} )', center=(center_right[0], center_right[1] + first_line_dist + line_dist * 7))
+        plot_txt(screen, font_avg, f'[ {round(analyzed_stats["right_stick"]["y"]["mode"][0], 5):.5f}, {round(analyzed_stats["right_stick"]["y"]["mode"][0], 5):.5f} )', center=(center_right[0] + first_line_dist + line_dist * 9, center_right[1]))
+
+        # Histogram Bar
+        draw_histogram(screen, center_left[0], center_left[1], analyzed_stats["left_stick"]["x"]["hist"], font_avg, guide_radius, first_line_dist, line_dist)
+        draw_histogram(screen, center_left[0], center_left[1], analyzed_stats["left_stick"]["y"]["hist"], font_avg, guide_radius, first_line_dist, line_dist, False)
+        draw_histogram(screen, center_right[0], center_right[1], analyzed_stats["right_stick"]["x"]["hist"], font_avg, guide_radius, first_line_dist, line_dist)
+        draw_histogram(screen, center_right[0], center_right[1], analyzed_stats["right_stick"]["y"]["hist"], font_avg, guide_radius, first_line_dist, line_dist, False)
+
+
+    #Draw history lines
+    span_ms = HISTORY_ZOOM_SPANS_MS[stats["history_zoom"]]
+    if span_ms <= MAX_MS:
+        samples = buffered_samples(stats).T.tolist()
+        draw_history_lines(screen, samples[0], samples[1], center_left[0], center_left[1], font_label, guide_radius, first_line_dist, line_dist)
+        draw_history_lines(screen, samples[2], samples[3], center_right[0], center_right[1], font_label, guide_radius, first_line_dist, line_dist)
+    else:
+        #   from the pyramid level matching the width of the lines
+        history_level = select_history_level(stats["history"], span_ms, guide_radius * 2)
+        draw_history_envelopes(screen, history_level, span_ms, cur_ms, ANALYZE_AXIS_INDEX["lx"], ANALYZE_AXIS_INDEX["ly"], center_left[0], center_left[1], font_label, guide_radius, first_line_dist, line_dist)
+        draw_history_envelopes(screen, history_level, span_ms, cur_ms, ANALYZE_AXIS_INDEX["rx"], ANALYZE_AXIS_INDEX["ry"], center_right[0], center_right[1], font_label, guide_radius, first_line_dist, line_dist)
+    plot_txt(screen, font_label, f'History {span_ms / 1000:g}s (+/-)', midleft=(center_right[0] + guide_radius + 20, center_right[1] + first_line_dist - 40))
+
+    # Noise profile while resting
+    noise = stats["noise"]
+    draw_noise_profile(screen, noise, 0, (center_left[0] + 60, center_left[1] + first_line_dist + line_dist * 8.5), font_label)
+    draw_noise_profile(screen, noise, 1, (center_left[0] + 60, center_left[1] + first_line_dist + line_dist * 9.5), font_label)
+    draw_noise_profile(screen, noise, 2, (center_right[0] + 60, center_right[1] + first_line_dist + line_dist * 8.5), font_label)
+    draw_noise_profile(screen, noise, 3, (center_right[0] + 60, center_right[1] + first_line_dist + line_dist * 9.5), font_label)
+
 def stick_mode_visualize(screen, joystick, stats, stop_event, change_event):
     """GPSA stick mode visualize function.
     Main loop of the window drawings.
@@ -400,129 +704,110 @@ def stick_mode_visualize(screen, joystick, stats, stop_event, change_event):
     """
 
     clock = pygame.time.Clock()
-    font_label = pygame.font.Font(None, 16)
-    font_avg = pygame.font.Font(None, 24)
-    center_left = (160, 130)
-    center_right = (680, 130)
-    guide_radius = 100
-    line_dist = 20
-    first_line_dist = 140
+    fonts = frame_fonts()
 
     # Main loop of the window drawings
     while not stop_event.is_set() and not change_event.is_set():
-        screen.fill((30, 30, 30))
-
-        # Draws stick circles
-        #   RIGHT
-        pygame.draw.circle(screen, (200, 200, 200), center_right, guide_radius, 1)
-        pygame.draw.line(screen, (200, 200, 200), (center_right[0] - guide_radius, center_right[1]), (center_right[0] + guide_radius, center_right[1]), 1)
-        pygame.draw.line(screen, (200, 200, 200), (center_right[0], center_right[1] - guide_radius), (center_right[0], center_right[1] + guide_radius), 1)
-        #   LEFT
-        pygame.draw.circle(screen, (200, 200, 200), center_left, guide_radius, 1)
-        pygame.draw.line(screen, (200, 200, 200), (center_left[0] - guide_radius, center_left[1]), (center_left[0] + guide_radius, center_left[1]), 1)
-        pygame.draw.line(screen, (200, 200, 200), (center_left[0], center_left[1] - guide_radius), (center_left[0], center_left[1] + guide_radius), 1)
-
         # Get current positions of the sticks
-        lx = fix_stick_val(joystick.get_axis(0))
-        ly = fix_stick_val(joystick.get_axis(1))
-        rx = fix_stick_val(joystick.get_axis(2))
-        ry = fix_stick_val(joystick.get_axis(3))
-
-
-        # Draws current position of the sticks
-
-        #   LEFT
-        left_stick_position = (center_left[0] + int(lx * guide_radius), center_left[1] + int(ly * guide_radius))
-        pygame.draw.circle(screen, (255, 255, 255), left_stick_position, 3)
-        plot_txt(screen, font_avg, f'{lx:.5f}', center = (center_left[0], center_left[1] + first_line_dist))
-        plot_txt(screen, font_avg, f'{ly:.5f}', center =(center_left[0] + guide_radius + 70, center_left[1]))
-
-        #   RIGHT
-        right_stick_position = (center_right[0] + int(rx * guide_radius), center_right[1] + int(ry * guide_radius))
-        pygame.draw.circle(screen, (255, 255, 255), right_stick_position, 3)
-        plot_txt(screen, font_avg, f'{rx:.5f}', center=(center_right[0], center_right[1] + first_line_dist))
-        plot_txt(screen, font_avg, f'{ry:.5f}', center=(center_right[0] + guide_radius + 70, center_right[1]))
-
-        #   BAR
-        #     RX
-        pygame.draw.rect(screen, (200, 200, 200), (center_right[0] - guide_radius, center_right[1] + guide_radius + 10, guide_radius * 2, 20))
-        if rx < 0:
-            pygame.draw.rect(screen, (100, 100, 100), (center_right[0] - guide_radius * (- rx), center_right[1] + guide_radius + 10, guide_radius * (- rx), 20))
-        else:
-            pygame.draw.rect(screen, (100, 100, 100), (center_right[0], center_right[1] + guide_radius + 10, guide_radius * (rx), 20))
+        sticks = live_sticks(stats)
+        draw_stick_frame(screen, fonts, stats, sticks, pygame.time.get_ticks())
 
-        #     RY
-        pygame.draw.rect(screen, (200, 200, 200), (center_right[0] + guide_radius + 10, center_right[1] - guide_radius, 20, guide_radius * 2))
-        if ry < 0:
-            pygame.draw.rect(screen, (100, 100, 100), (center_right[0] + guide_radius + 10, center_right[1] - guide_radius * (- ry), 20, guide_radius * (- ry)))
-        else:
-            pygame.draw.rect(screen, (100, 100, 100), (center_right[0] + guide_radius + 10, center_right[1], 20, guide_radius * (ry)))
+        # Reflects to the window
+        pygame.display.flip()
 
-        #     LX
-        pygame.draw.rect(screen, (200, 200, 200), (center_left[0] - guide_radius, center_left[1] + guide_radius + 10, guide_radius * 2, 20))
-        if lx < 0:
-            pygame.draw.rect(screen, (100, 100, 100), (center_left[0] - guide_radius * (- lx), center_left[1] + guide_radius + 10, guide_radius * (- lx), 20))
-        else:
-            pygame.draw.rect(screen, (100, 100, 100), (center_left[0], center_left[1] + guide_radius + 10, guide_radius * (lx), 20))
+        # Waits for new samples, at most stats["max_fps"] FPS
+        wait_next_frame(clock, stats, stop_event, change_event)
 
-        #     LY
-        pygame.draw.rect(screen, (200, 200, 200), (center_left[0] + guide_radius + 10, center_left[1] - guide_radius, 20, guide_radius * 2))
-        if ly < 0:
-            pygame.draw.rect(screen, (100, 100, 100), (center_left[0] + guide_radius + 10, center_left[1] - guide_radius * (- ly), 20, guide_radius * (- ly)))
-        else:
-            pygame.draw.rect(screen, (100, 100, 100), (center_left[0] + guide_radius + 10, center_left[1], 20, guide_radius * (ly)))
-
-
-        # Draws statistics
-        analyzed_stats = calc_stats(stats)
-        if analyzed_stats:
-            # Labels
-            plot_txt(screen, font_label, f'10s Histogram of {JOYSTICK_HIST_STEPS} bins.', center=(center_left[0], center_left[1] + first_line_dist + line_dist * 4.5))
-
-            # 1s Avg.
-            plot_txt(screen, font_label, "1s Avg.", center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["x"]["1s"], 5):.5f}', center=(center_left[0] - 50, center_left[1] + first_line_dist + line_dist))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["y"]["1s"], 5):.5f}', center=(center_left[0] + 50, center_left[1] + first_line_dist + line_dist))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["x"]["1s"], 5):.5f}', center=(center_right[0] - 50, center_right[1] + first_line_dist + line_dist))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["y"]["1s"], 5):.5f}', center=(center_right[0] + 50, center_right[1] +first_line_dist + line_dist))
-
-            # 10s Avg.
-            plot_txt(screen, font_label, "10s Avg.", center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist * 2))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["x"]["10s"], 5):.5f}', center=(center_left[0] - 50, center_left[1] + first_line_dist + line_dist * 2))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["y"]["10s"], 5):.5f}', center=(center_left[0] + 50, center_left[1] + first_line_dist + line_dist * 2))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["x"]["10s"], 5):.5f}', center=(center_right[0] - 50, center_right[1] + first_line_dist + line_dist * 2))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["y"]["10s"], 5):.5f}', center=(center_right[0] + 50, center_right[1] +first_line_dist + line_dist * 2))
-
-            # Amp.
-            plot_txt(screen, font_label, f'Amp.', center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist * 3))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["x"]["amp"], 5):.5f}', center=(center_left[0] - 50, center_left[1] + first_line_dist + line_dist * 3))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["left_stick"]["y"]["amp"], 5):.5f}', center=(center_left[0] + 50, center_left[1] + first_line_dist + line_dist * 3))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["x"]["amp"], 5):.5f}', center=(center_right[0] - 50, center_right[1] + first_line_dist + line_dist * 3))
-            plot_txt(screen, font_avg, f'{round(analyzed_stats["right_stick"]["y"]["amp"], 5):.5f}', center=(center_right[0] + 50, center_right[1] +first_line_dist + line_dist * 3))
-
-            # Mode.
-            plot_txt(screen, font_label, f'Mode', center=(center_left[0] - 120, center_left[1] + first_line_dist + line_dist * 7))
-            plot_txt(screen, font_avg, f'[ {round(analyzed_stats["left_stick"]["x"]["mode"][0], 5):.5f}, {round(analyzed_stats["left_stick"]["x"]["mode"][1], 5):.5f} )', center=(center_left[0], center_left[1] + first_line_dist + line_dist * 7))
-            plot_txt(screen, font_avg, f'[ {round(analyzed_stats["left_stick"]["y"]["mode"][0], 5):.5f}, {round(analyzed_stats["left_stick"]["y"]["mode"][1], 5):.5f} )', center=(center_left[0] + first_line_dist + line_dist * 9, center_left[1]))
-            plot_txt(screen, font_avg, f'[ {round(analyzed_stats["right_stick"]["x"]["mode"][0], 5):.5f}, {round(analyzed_stats["right_stick"]["x"]["mode"][1], 5):.5f} )', center=(center_right[0], center_right[1] + first_line_dist + line_dist * 7))
-            plot_txt(screen, font_avg, f'[ {round(analyzed_stats["right_stick"]["y"]["mode"][0], 5):.5f}, {round(analyzed_stats["right_stick"]["y"]["mode"][0], 5):.5f} )', center=(center_right[0] + first_line_dist + line_dist * 9, center_right[1]))
-
-            # Histogram Bar
-            draw_histogram(screen, center_left[0], center_left[1], analyzed_stats["left_stick"]["x"]["hist"], font_avg, guide_radius, first_line_dist, line_dist)
-            draw_histogram(screen, center_left[0], center_left[1], analyzed_stats["left_stick"]["y"]["hist"], font_avg, guide_radius, first_line_dist, line_dist, False)
-            draw_histogram(screen, center_right[0], center_right[1], analyzed_stats["right_stick"]["x"]["hist"], font_avg, guide_radius, first_line_dist, line_dist)
-            draw_histogram(screen, center_right[0], center_right[1], analyzed_stats["right_stick"]["y"]["hist"], font_avg, guide_radius, first_line_dist, line_dist, False)
-
-
-        #Draw history lines
-        draw_history_lines(screen, stats["lx"], stats["ly"], center_left[0], center_left[1], font_label, guide_radius, first_line_dist, line_dist)
-        draw_history_lines(screen, stats["rx"], stats["ry"], center_right[0], center_right[1], font_label, guide_radius, first_line_dist, line_dist)
+def draw_recorder_frame(screen, fonts, stats, sticks, cur_ms, is_record = False):
+    """Draws a frame of the recorder and gui modes.
 
-        # Reflects to the window
-        pygame.display.flip()
+    Args:
+        screen (pygame.Surface): the window or an offscreen surface of 460x250.
+        fonts (dict): frame_fonts().
+        stats (dict): stats
+        sticks (list[float]): current lx, ly, rx, ry.
+        cur_ms (int): ms of the frame.
+        is_record (bool): draws the timestamp and FPS.
+    """
+
+    font_label = fonts[16]
+    font_avg = fonts[18]
+    font_max = fonts[22]
+    center_left = (70, 70)
+    center_right = (300, 70)
+    guide_radius = 50
+    line_dist = 20
+    first_line_dist = 60
+    x_first_line_dist = 30
 
-        # Sets window reflesh rate to 60FPS
-        clock.tick(60)
+    screen.fill((128, 128, 128))
+    if not stats["connected"]:
+        plot_txt(screen, font_max, 'Controller disconnected', center = (185, 10))
+
+    # draw water mark
+    plot_txt(screen, font_label, 'GPSA by monoru', True, (255, 255, 255), 145, midright = (450, 10))
+
+    # draw timestamp
+    if is_record:
+        plot_txt(screen, font_avg, f'{cur_ms}', midright = (450, 240))
+        plot_txt(screen, font_avg, f'{stats["fps"]:.0f}', topright = (450, 20))
+
+
+    # Draws history lines of the sticks
+    #   LEFT
+    colors = stats["max"][ANALYZE_COLOR_KEY]
+    samples = buffered_samples(stats).T.tolist()
+    draw_history_line(screen, samples[ANALYZE_AXIS_INDEX["lx"]], center_left[1] + guide_radius, center_left[0] - guide_radius, guide_radius * 2, 100, True, False, colors, ANALYZE_AXIS_INDEX["lx"])
+    draw_history_line(screen, samples[ANALYZE_AXIS_INDEX["ly"]], center_left[1] - guide_radius, center_left[0] + guide_radius, 100, guide_radius * 2, True, True, colors, ANALYZE_AXIS_INDEX["ly"])
+    #   RIGHT
+    draw_history_line(screen, samples[ANALYZE_AXIS_INDEX["rx"]], center_right[1] + guide_radius, center_right[0] - guide_radius, guide_radius * 2, 100, True, False, colors, ANALYZE_AXIS_INDEX["rx"])
+    draw_history_line(screen, samples[ANALYZE_AXIS_INDEX["ry"]], center_right[1] - guide_radius, center_right[0] + guide_radius, 100, guide_radius * 2, True, True, colors, ANALYZE_AXIS_INDEX["ry"])
+
+    # Current positions of the sticks
+    lx, ly, rx, ry = sticks
+
+    # Draws current position of the sticks
+    #   LEFT
+    left_stick_position = (center_left[0] + int(lx * guide_radius), center_left[1] + int(ly * guide_radius))
+    pygame.draw.circle(screen, (255, 255, 255), left_stick_position, 3)
+    plot_txt(screen, font_avg, f'{lx:.5f}', center = (center_left[0], center_left[1] + first_line_dist))
+    plot_txt(screen, font_avg, f'{ly:.5f}', center =(center_left[0] + guide_radius + x_first_line_dist, center_left[1]))
+
+    #   RIGHT
+    right_stick_position = (center_right[0] + int(rx * guide_radius), center_right[1] + int(ry * guide_radius))
+    pygame.draw.circle(screen, (255, 255, 255), right_stick_position, 3)
+    plot_txt(screen, font_avg, f'{rx:.5f}', center=(center_right[0], center_right[1] + first_line_dist))
+    plot_txt(screen, font_avg, f'{ry:.5f}', center=(center_right[0] + guide_radius + x_first_line_dist, center_right[1]))
+    rx_axis = ANALYZE_AXIS_INDEX["rx"]
+    plot_txt(screen, font_avg, f'{stats["max"]["last_speed"][rx_axis]:.5f}/ms', center=(center_right[0], center_right[1] + first_line_dist + line_dist))
+    plot_txt(screen, font_max, f'10sMAX, MAX: {max(stats["max"]["max_speeds"][rx_axis], default=0):.5f}, {stats["max"]["max_speed"][rx_axis]:.5f}/ms', center=(center_right[0], center_right[1] + first_line_dist + line_dist * 2))
+
+
+    # 1s Avg. of Vector Size, maintained by the measure thread
+    # regularize max values to 100 when sticks always set to like (0, 1.0)
+    # can be over 100 due to sticks' circularity.
+    magnitude_avg = stats["magnitude_avg"]
+    sum_vec_l = magnitude_avg[0] * 100
+    sum_vec_r = magnitude_avg[1] * 100
+
+    l_color = calc_color(sum_vec_l / 100.0)
+    r_color = calc_color(sum_vec_r / 100.0)
+
+
+    # Comment outed to avoid annoying numbers.
+    #plot_txt(screen, font_avg, f'{round(sum_vec_l, 5):.5f}', center = (center_left[0], center_left[1] + first_line_dist + line_dist))
+    #plot_txt(screen, font_avg, f'{round(sum_vec_r, 5):.5f}', center = (center_right[0], center_right[1] + first_line_dist + line_dist))
+
+
+    # Draws stick circles
+    #   RIGHT
+    pygame.draw.circle(screen, (*r_color, 187), center_right, guide_radius, 2)
+    pygame.draw.line(screen, (200, 200, 200, 128), (center_right[0] - guide_radius, center_right[1]), (center_right[0] + guide_radius, center_right[1]), 1)
+    pygame.draw.line(screen, (200, 200, 200, 128), (center_right[0], center_right[1] - guide_radius), (center_right[0], center_right[1] + guide_radius), 1)
+    #   LEFT
+    pygame.draw.circle(screen, (*l_color, 187), center_left, guide_radius, 2)
+    pygame.draw.line(screen, (200, 200, 200, 128), (center_left[0] - guide_radius, center_left[1]), (center_left[0] + guide_radius, center_left[1]), 1)
+    pygame.draw.line(screen, (200, 200, 200, 128), (center_left[0], center_left[1] - guide_radius), (center_left[0], center_left[1] + guide_radius), 1)
 
 def recorder_mode_visualize(screen, joystick, stats, stop_event, change_event, is_record):
     """GPSA recorder mode visualize function.
@@ -541,566 +826,3379 @@ def recorder_mode_visualize(screen, joystick, stats, stop_event, change_event, i
 
     """
     clock = pygame.time.Clock()
-    font_label = pygame.font.Font(None, 16)
-    font_avg = pygame.font.Font(None, 18)
-    font_max = pygame.font.Font(None, 22)
-    center_left = (70, 70)
-    center_right = (300, 70)
-    guide_radius = 50
-    line_dist = 20
-    first_line_dist = 60
-    x_first_line_dist = 30
+    fonts = frame_fonts()
 
     # Main loop of the window drawings
     while not stop_event.is_set() and not change_event.is_set():
-        screen.fill((128, 128, 128))
+        # Get current positions of the sticks
+        sticks = live_sticks(stats)
+        draw_recorder_frame(screen, fonts, stats, sticks, pygame.time.get_ticks(), is_record)
+
+        # Reflects to the window
+        pygame.display.flip()
 
-        # draw water mark
-        plot_txt(screen, font_label, 'GPSA by monoru', True, (255, 255, 255), 145, midright = (450, 10))
 
-        # draw timestamp
-        if is_record:
-            cur_ms = pygame.time.get_ticks()
-            plot_txt(screen, font_avg, f'{cur_ms}', midright = (450, 240))
-            plot_txt(screen, font_avg, f'{stats["fps"]:.0f}', topright = (450, 20))
+        # Waits for new samples, at most stats["max_fps"] FPS
+        wait_next_frame(clock, stats, stop_event, change_event)
 
+ANALYZE_AXES = ["lx", "ly", "rx", "ry", "lt", "rt"]
+ANALYZE_AXIS_INDEX = {key: idx for idx, key in enumerate(ANALYZE_AXES)}
+# per-sample analyze state of the MAX_MS window
+ANALYZE_KEYS = ["mvmt_avg", "diff_1", "diff_5", "diff_1_of_5", "diff_1_of_1_of_5", "direction", "big_mvmt", "turned", "begin_ms"]
+# per-sample columns of analysis_columns(), as recorded by older versions
+ANALYZE_COLUMN_KEYS = ["mvmt_avg", "diff_1", "diff_5", "diff_1_of_5", "diff_1_of_1_of_5", "direction", "big_mvmt", "turned", "sums", "speed", "begin_ms", "end"]
+ANALYZE_INT_KEYS = ["direction", "big_mvmt", "turned", "begin_ms", "end"]
+ANALYZE_AGGR_KEYS = ["last_speed", "max_speed"]
+ANALYZE_AGGR_MS_KEYS = ["max_speeds", "max_speeds_ms"]
+ANALYZE_COLOR_KEY = "colors"
+# centered analyzer, target sample and movement average window around it
+ANALYZE_DELAY = 5
+# causal analyzer, exponential movement average of the past samples
+ANALYZE_CAUSAL_ALPHA = 0.3
+# the centered average sums 10 samples over 11, the causal one keeps its gain for the same thresholds
+ANALYZE_MVMT_AVG_GAIN = 10 / 11
+# bump when the analyzer emits other events for the same samples, invalidates the analysis cache
+ANALYZE_VERSION = 2
+
+# analyze events, recorded to *.events.csv
+EVENT_FIELDS = ["ms", "event", "axis", "begin_ms", "end_ms", "sums", "speed"]
+EVENT_BIG_MVMT_BEGIN = "big_mvmt_begin"
+EVENT_BIG_MVMT_END = "big_mvmt_end"
+EVENT_TURN = "turn"
+EVENT_SPEED = "speed"
+EVENT_GAP = "gap" #controller away from begin_ms to end_ms, no axis
+EVENT_NAMES = [EVENT_BIG_MVMT_BEGIN, EVENT_BIG_MVMT_END, EVENT_TURN, EVENT_SPEED, EVENT_GAP]
+
+def csv_file_header(joystick, raw = False):
+    header = ['ms_from_init']
+    if raw:
+        header.extend(f'{key}.raw' for key in ANALYZE_AXES)
+    else:
+        header.extend(ANALYZE_AXES)
+    
+    for i in range(joystick.get_numbuttons()):
+        header.append(f'btn.{i}')
 
-        # Draws history lines of the sticks
-        #   LEFT
-        draw_history_line(screen, stats["lx"], center_left[1] + guide_radius, center_left[0] - guide_radius, guide_radius * 2, 100, True, False, colors=stats["max"]["lx"][ANALYZE_COLOR_KEY])
-        draw_history_line(screen, stats["ly"], center_left[1] - guide_radius, center_left[0] + guide_radius, 100, guide_radius * 2, True, True, colors=stats["max"]["ly"][ANALYZE_COLOR_KEY])
-        #   RIGHT
-        draw_history_line(screen, stats["rx"], center_right[1] + guide_radius, center_right[0] - guide_radius, guide_radius * 2, 100, True, False, colors=stats["max"]["rx"][ANALYZE_COLOR_KEY])
-        draw_history_line(screen, stats["ry"], center_right[1] - guide_radius, center_right[0] + guide_radius, 100, guide_radius * 2, True, True, colors=stats["max"]["ry"][ANALYZE_COLOR_KEY])
+    return header
 
 
-        # Get current positions of the sticks
-        lx = fix_stick_val(joystick.get_axis(0))
-        ly = fix_stick_val(joystick.get_axis(1))
-        rx = fix_stick_val(joystick.get_axis(2))
-        ry = fix_stick_val(joystick.get_axis(3))
-
-        # Draws current position of the sticks
-        #   LEFT
-        left_stick_position = (center_left[0] + int(lx * guide_radius), center_left[1] + int(ly * guide_radius))
-        pygame.draw.circle(screen, (255, 255, 255), left_stick_position, 3)
-        plot_txt(screen, font_avg, f'{lx:.5f}', center = (center_left[0], center_left[1] + first_line_dist))
-        plot_txt(screen, font_avg, f'{ly:.5f}', center =(center_left[0] + guide_radius + x_first_line_dist, center_left[1]))
-
-        #   RIGHT
-        right_stick_position = (center_right[0] + int(rx * guide_radius), center_right[1] + int(ry * guide_radius))
-        pygame.draw.circle(screen, (255, 255, 255), right_stick_position, 3)
-        plot_txt(screen, font_avg, f'{rx:.5f}', center=(center_right[0], center_right[1] + first_line_dist))
-        plot_txt(screen, font_avg, f'{ry:.5f}', center=(center_right[0] + guide_radius + x_first_line_dist, center_right[1]))
-        plot_txt(screen, font_avg, f'{stats["max"]["rx"]["last_speed"]:.5f}/ms', center=(center_right[0], center_right[1] + first_line_dist + line_dist))
-        plot_txt(screen, font_max, f'10sMAX, MAX: {max(stats["max"]["rx"]["max_speeds"], default=0):.5f}, {stats["max"]["rx"]["max_speed"]:.5f}/ms', center=(center_right[0], center_right[1] + first_line_dist + line_dist * 2))
-
- 
-        # 1s Sum of Vector Size
-        sum_vec_l = 0
-        sum_vec_r = 0
-        for idx, stat in enumerate(stats["timestamps"]):
-            try: # stats could be deleted by another thread
-                vector_size_l = np.sqrt(np.square(stats["lx"][idx]) + np.square(stats["ly"][idx]**2))
-                vector_size_r = np.sqrt(np.square(stats["rx"][idx]) + np.square(stats["ry"][idx]**2))
-                sum_vec_l += vector_size_l
-                sum_vec_r += vector_size_r
-            except:
-                #just ignore thread race condition.
-                continue
+def events_file_name(filename):
+    """Returns the file name of the analyze events of a recording."""
+    return os.path.splitext(filename)[0] + ".events.csv"
 
-        if 0 < len(stats["timestamps"]):
-            # regularize max values to 100 when sticks always set to like (0, 1.0)
-            # can be over 100 due to sticks' circularity.
-            sum_vec_l = sum_vec_l / len(stats["timestamps"]) * 100
-            sum_vec_r = sum_vec_r / len(stats["timestamps"]) * 100
 
-        l_color = calc_color(sum_vec_l / 100.0)
-        r_color = calc_color(sum_vec_r / 100.0)
+def meta_file_name(filename):
+    """Returns the file name of the session metadata of a recording."""
+    return os.path.splitext(filename)[0] + ".meta.json"
 
 
-        # Comment outed to avoid annoying numbers.
-        #plot_txt(screen, font_avg, f'{round(sum_vec_l, 5):.5f}', center = (center_left[0], center_left[1] + first_line_dist + line_dist))
-        #plot_txt(screen, font_avg, f'{round(sum_vec_r, 5):.5f}', center = (center_right[0], center_right[1] + first_line_dist + line_dist))
+def recording_meta(joystick, started, raw = False, causal = False, sampler = None):
+    """Session metadata written next to a recording, the CSVs have no room for it.
 
+    "sampler" is what the sampler policy actually applied, None without one.
+    """
 
-        # Draws stick circles
-        #   RIGHT
-        pygame.draw.circle(screen, (*r_color, 187), center_right, guide_radius, 2)
-        pygame.draw.line(screen, (200, 200, 200, 128), (center_right[0] - guide_radius, center_right[1]), (center_right[0] + guide_radius, center_right[1]), 1)
-        pygame.draw.line(screen, (200, 200, 200, 128), (center_right[0], center_right[1] - guide_radius), (center_right[0], center_right[1] + guide_radius), 1)
-        #   LEFT
-        pygame.draw.circle(screen, (*l_color, 187), center_left, guide_radius, 2)
-        pygame.draw.line(screen, (200, 200, 200, 128), (center_left[0] - guide_radius, center_left[1]), (center_left[0] + guide_radius, center_left[1]), 1)
-        pygame.draw.line(screen, (200, 200, 200, 128), (center_left[0], center_left[1] - guide_radius), (center_left[0], center_left[1] + guide_radius), 1)
+    return {
+        "version": version,
+        "started": started.isoformat(),
+        "controller": joystick.get_name(),
+        "guid": joystick.get_guid(),
+        "buttons": joystick.get_numbuttons(),
+        "raw": raw,
+        "causal": causal,
+        "sampler": sampler["applied"] if sampler else None,
+    }
 
 
-        # Reflects to the window
-        pygame.display.flip()
+def init_analyzed_stats(thresholds = None, causal = False):
+    """Creates an empty analysis state for ANALYZE_AXES.
 
+    Every per-sample value is stored as a row (np.ndarray) holding one column per axis,
+    so a sample is analyzed with one vectorized step however many axes there are.
 
-        # Sets window reflesh rate to 60FPS
-        clock.tick(60)
+    Args:
+        thresholds (dict): analyze thresholds. default_thresholds() if None.
+        causal (bool): analyzes the newest sample from the past samples only, see analyze_stats().
 
-ANALYZE_KEYS = ["mvmt_avg", "diff_1", "diff_5", "diff_1_of_5", "diff_1_of_1_of_5", "direction", "big_mvmt", "turned", "sums", "speed", "begin_ms", "end"]
-ANALYZE_AGGR_KEYS = ["last_speed", "max_speed"]
-ANALYZE_AGGR_MS_KEYS = ["max_speeds", "max_speeds_ms"]
-ANALYZE_COLOR_KEY = "colors"
+    Returns:
+        dict: ANALYZE_KEYS and ANALYZE_COLOR_KEY as lists of rows, ANALYZE_AGGR_KEYS as rows,
+              ANALYZE_AGGR_MS_KEYS as a list per axis, "events" as an append-only list of EVENT_FIELDS tuples
+              and "pending_ends" axis -> begin_ms of the causal movements still looking for their end.
+    """
 
-def csv_file_header(joystick):
-    header = ['ms_from_init', 'lx', 'ly', 'rx', 'ry', 'lt', 'rt']
-    
-    for i in range(joystick.get_numbuttons()):
-        header.append(f'btn.{i}')
+    analyzed_stats = {}
+    for key in ANALYZE_KEYS:
+        analyzed_stats[key] = []
+    for key in ANALYZE_AGGR_KEYS:
+        analyzed_stats[key] = np.zeros(len(ANALYZE_AXES))
+    for key in ANALYZE_AGGR_MS_KEYS:
+        analyzed_stats[key] = [[] for _ in ANALYZE_AXES]
+    analyzed_stats[ANALYZE_COLOR_KEY] = []
+    analyzed_stats["events"] = []
+    analyzed_stats["pending_ends"] = {}
+    analyzed_stats["thresholds"] = thresholds or default_thresholds()
+    analyzed_stats["causal"] = causal
+    return analyzed_stats
 
-    for key in ['lx', 'ly', 'rx', 'ry']:
-        for key2 in ANALYZE_KEYS:
-            header.append(f'{key}.{key2}')
 
-    return header
+def add_event(analyzed_stats, ms, event, axis, begin_ms = 0, end_ms = 0, sums = 0.0, speed = 0.0):
+    analyzed_stats["events"].append((ms, event, ANALYZE_AXES[axis] if axis is not None else "", begin_ms, end_ms, sums, speed))
+
+
+def take_events(stats):
+    """Takes the analyze events emitted since the last call."""
+
+    events = stats["max"]["events"]
+    stats["max"]["events"] = []
+    return events
 
 
 def analyze_stats(stats):
-    '''Analyzes stats
+    '''Analyzes stats of all ANALYZE_AXES at once
+
+    The centered analyzer analyzes the sample ANALYZE_DELAY samples before the newest one,
+    averaging the samples around it. The causal one analyzes the newest sample with an
+    exponential average of the samples so far, so flags and speeds come ANALYZE_DELAY samples earlier.
     '''
 
+    analyzed_stats = stats["max"]
+    for key in ANALYZE_KEYS:
+        analyzed_stats[key].append(np.zeros(len(ANALYZE_AXES), dtype=np.int64 if key in ANALYZE_INT_KEYS else np.float64))
+    analyzed_stats[ANALYZE_COLOR_KEY].append(np.full(len(ANALYZE_AXES), HISTORY_LINE_DEFAULT, dtype=np.int8))
+
     i = len(stats["timestamps"]) - 1
+
+    if analyzed_stats["causal"]:
+        # averaged from the first sample on
+        sample = buffered_samples(stats, i, i + 1)[0] * ANALYZE_MVMT_AVG_GAIN
+        before = analyzed_stats["mvmt_avg"][i - 1] if i > 0 else sample
+        analyzed_stats["mvmt_avg"][i][:] = before + ANALYZE_CAUSAL_ALPHA * (sample - before)
     
     # needs at least 11 stats
     if i < 11:
-        for key in ["lx", "ly", "rx", "ry"]:
-            for key2 in ANALYZE_KEYS:
-                stats["max"][key][key2].append(0)
-            stats["max"][key][ANALYZE_COLOR_KEY].append(HISTORY_LINE_DEFAULT_COLOR)
         return False
 
     # analyze target
-    target = i - 5
+    target = i if analyzed_stats["causal"] else i - ANALYZE_DELAY
 
-    for key in ["lx", "ly", "rx", "ry"]:
-        analyze_stick_stats(stats, key, target)
+    analyze_axes_stats(stats, target)
 
     return True
 
 
-def analyze_stick_stats(stats, key, target):
+def analyze_axes_stats(stats, target):
 
-    stick_stats = stats[key]
-    stick_analyzed_stats = stats["max"][key]
-
-    for key in ANALYZE_KEYS:
-        stick_analyzed_stats[key].append(0)
-    stick_analyzed_stats[ANALYZE_COLOR_KEY].append(HISTORY_LINE_DEFAULT_COLOR)
+    analyzed_stats = stats["max"]
+    cur = {key: analyzed_stats[key][target] for key in ANALYZE_KEYS}
+    before = {key: analyzed_stats[key][target - 1] for key in ANALYZE_KEYS}
+    colors = analyzed_stats[ANALYZE_COLOR_KEY][target]
 
 
     # calc movement average of 100ms
-    stick_analyzed_stats["mvmt_avg"][target] = reduce(lambda x, y: x + y, stick_stats[target - 5:target + 5], 0) / 11
+    if not analyzed_stats["causal"]:
+        cur["mvmt_avg"][:] = np.sum(buffered_samples(stats, target - 5, target + 5), axis=0) / 11
 
 
     # 1 if stick moves toward 1, -1 if stick moves toward -1, 0 if stick doesn't move.
-    direction = 0
-    pos_diff_1 = stick_analyzed_stats["mvmt_avg"][target] - stick_analyzed_stats["mvmt_avg"][target - 1]
-    if pos_diff_1 < 0:
-        direction = -1
-    elif pos_diff_1 == 0:
-        direction = 0
-    else:
-        direction = 1
-    stick_analyzed_stats["direction"][target] = direction
+    cur["diff_1"][:] = cur["mvmt_avg"] - before["mvmt_avg"]
+    cur["direction"][:] = np.sign(cur["diff_1"])
 
 
     # analyzes using stats before
-    stick_analyzed_stats["diff_1"][target] = stick_analyzed_stats["mvmt_avg"][target] - stick_analyzed_stats["mvmt_avg"][target - 1]
-    stick_analyzed_stats["diff_5"][target] = stick_analyzed_stats["mvmt_avg"][target] - stick_analyzed_stats["mvmt_avg"][target - 5]
-    stick_analyzed_stats["diff_1_of_5"][target] = stick_analyzed_stats["diff_5"][target] - stick_analyzed_stats["diff_5"][target - 1]
-    stick_analyzed_stats["diff_1_of_1_of_5"][target] = stick_analyzed_stats["diff_1_of_5"][target] - stick_analyzed_stats["diff_1_of_5"][target - 1]
-
-
-    def is_stick_keep_moved(idx):
-        threshold = THRESHOLD_STICK_KEEP_MOVING
-        return abs(stick_analyzed_stats["diff_1_of_1_of_5"][idx]) > threshold
-
-    def is_stick_accelerated(idx, strict = False):
-        #return (0 < stick_analyzed_stats["mvmt_avg"][idx] and stick_analyzed_stats["diff_1_of_5"][idx] < -0.01) or\
-        #       (stick_analyzed_stats["mvmt_avg"][idx] < 0 and 0.01 < stick_analyzed_stats["diff_1_of_5"][idx])
-        threshold = THRESHOLD_STICK_ACCELERATION
-        if strict:
-            threshold = THRESHOLD_STICK_ACCELERATION_STRICT
-        return abs(stick_analyzed_stats["diff_1_of_5"][idx]) > threshold
-
-    def is_stick_big_mvmt(idx):
-        return THRESHOLD_STICK_BIG_MOVEMENT < abs(stick_analyzed_stats["diff_5"][idx])
-    
-    def is_stick_direction_changed(idx):
-        return stick_analyzed_stats["direction"][idx - 1] != stick_analyzed_stats["direction"][idx]
-
-    def is_stick_turned(idx):
-        stat = stick_analyzed_stats["mvmt_avg"]
-        stat_before = stat[idx - 1]
-        stat_cur = stat[idx]
-        if (stat_before <= 0 and 0 < stat_cur) or\
-           (0 <= stat_before and stat_cur < 0) or\
-           (stat_before < 0 and 0 <= stat_cur) or\
-           (0 < stat_before and stat_cur <= 0):
-            return True
-        return False
-    
-    def find_begin_and_set_sums(idx):
-        for j in range(idx - 1, 6, -1):
-            if is_stick_accelerated(j, True):
-                #print("begin_ms:", len(stick_analyzed_stats["begin_ms"]), idx)
-                stick_analyzed_stats["begin_ms"][idx] = stats["timestamps"][j]
-                for k in range(j, idx):
-                    stick_analyzed_stats[ANALYZE_COLOR_KEY][k] = HISTORY_LINE_BIG_MVMT_COLOR
-                return True
-        return False
-    
-    def find_end_and_set_sums(idx):
-        begin_ms_index = -1
-        begin_ms = 0
-        for j in range(idx - 1, 6, -1):
-            if stick_analyzed_stats["begin_ms"][j] != 0:
-                begin_ms = stick_analyzed_stats["begin_ms"][j]
-                stick_analyzed_stats["begin_ms"][idx - 1] = begin_ms
-                for k in range(j, 6, -1):
-                    if stats["timestamps"][k] == begin_ms:
-                        begin_ms_index = k
-                        break
-                break
-
-        if begin_ms > 0:
-            for j in range(idx, target + 5):
-
-                if not is_stick_accelerated(j) or not is_stick_keep_moved(j):
-                    end_ms = stats["timestamps"][j]
-                    stick_analyzed_stats["end"][idx - 1] = end_ms
-
-                    if j - 1 - begin_ms_index > 0:
-                        sums = abs(reduce(lambda x, y: abs(x) + abs(y), stick_stats[begin_ms_index:j - 1], 0))
-                        stick_analyzed_stats["sums"][idx - 1] = sums
-
-                        if end_ms - begin_ms > 0:
-                            speed = sums / (end_ms - begin_ms)
-                            stick_analyzed_stats["speed"][idx - 1] = speed
-                            stick_analyzed_stats["last_speed"] = speed
-                            if speed > stick_analyzed_stats["max_speed"]:
-                                stick_analyzed_stats["max_speed"] = speed
-                            stick_analyzed_stats["max_speeds"].append(speed)
-                            stick_analyzed_stats["max_speeds_ms"].append(end_ms)
-
-                            for k in range(begin_ms_index, j - 1):
-                                stick_analyzed_stats[ANALYZE_COLOR_KEY][k] = HISTORY_LINE_BIG_TURN_COLOR
-
-                    return True
+    cur["diff_5"][:] = cur["mvmt_avg"] - analyzed_stats["mvmt_avg"][target - 5]
+    cur["diff_1_of_5"][:] = cur["diff_5"] - before["diff_5"]
+    cur["diff_1_of_1_of_5"][:] = cur["diff_1_of_5"] - before["diff_1_of_5"]
 
-        return False
+    thresholds = analyzed_stats["thresholds"]
+    accelerated = np.abs(cur["diff_1_of_5"]) > thresholds["acceleration"]
 
 
     # check if the current movement is big or not
-    end_big_mvmt = False
-    if stick_analyzed_stats["big_mvmt"][target - 1] == 1:
-        if is_stick_accelerated(target):
-            # continue big movement
-            stick_analyzed_stats["big_mvmt"][target] = 1
-            stick_analyzed_stats[ANALYZE_COLOR_KEY][target] = HISTORY_LINE_BIG_MVMT_COLOR
-        else:
-            # end big movement
-            stick_analyzed_stats["big_mvmt"][target] = 0
-            end_big_mvmt = True
+    was_big_mvmt = before["big_mvmt"] == 1
+    #   continue big movement
+    keep_big_mvmt = was_big_mvmt & accelerated
+    cur["big_mvmt"][keep_big_mvmt] = 1
+    colors[keep_big_mvmt] = HISTORY_LINE_BIG_MVMT
+    #   end big movement
+    end_big_mvmt = was_big_mvmt & ~accelerated
+    #   new big movement
+    new_big_mvmt = ~was_big_mvmt & accelerated & (thresholds["big_movement"] < np.abs(cur["diff_5"]))
+    if new_big_mvmt.any():
+        # calculate begin point
+        found_begin = find_begin_and_set_sums(stats, target, new_big_mvmt)
+        cur["big_mvmt"][found_begin] = 1
+        for axis in np.flatnonzero(found_begin):
+            add_event(analyzed_stats, stats["timestamps"][target], EVENT_BIG_MVMT_BEGIN, axis, int(cur["begin_ms"][axis]))
 
-    elif is_stick_big_mvmt(target) and is_stick_accelerated(target):
-        # new big movement
 
-        # calculate begin point
-        found_begin = find_begin_and_set_sums(target)
-        if found_begin:
-            stick_analyzed_stats["big_mvmt"][target] = 1
+    is_big_mvmt = cur["big_mvmt"] == 1
+    was_turned = before["turned"] == 1
+    direction_changed = before["direction"] != cur["direction"]
 
+    stat_before = before["mvmt_avg"]
+    stat_cur = cur["mvmt_avg"]
+    crossed_center = ((stat_before <= 0) & (0 < stat_cur)) |\
+                     ((0 <= stat_before) & (stat_cur < 0)) |\
+                     ((stat_before < 0) & (0 <= stat_cur)) |\
+                     ((0 < stat_before) & (stat_cur <= 0))
 
-    if stick_analyzed_stats["big_mvmt"][target] == 1:
+    #   continue turn or new turn
+    new_turn = is_big_mvmt & ~was_turned & crossed_center
+    turned = is_big_mvmt & was_turned & ~direction_changed | new_turn
+    cur["turned"][turned] = 1
+    colors[turned] = HISTORY_LINE_TURNED
+    if new_turn.any():
+        for axis in np.flatnonzero(new_turn):
+            add_event(analyzed_stats, stats["timestamps"][target], EVENT_TURN, axis)
 
-        if stick_analyzed_stats["turned"][target - 1] == 1:
-            if is_stick_direction_changed(target):
-                # end turn
-                stick_analyzed_stats["big_mvmt"][target] = 0
-                end_big_mvmt = True
-                find_end_and_set_sums(target)
+    #   end turn, or finished big mvmt and turn
+    end_turn = is_big_mvmt & was_turned & direction_changed
+    cur["big_mvmt"][end_turn] = 0
+    ended = end_big_mvmt | end_turn
+    if ended.any():
+        for axis in np.flatnonzero(ended):
+            add_event(analyzed_stats, stats["timestamps"][target], EVENT_BIG_MVMT_END, axis)
 
-            else:
-                # continue turn
-                stick_analyzed_stats["turned"][target] = 1
-                stick_analyzed_stats[ANALYZE_COLOR_KEY][target] = HISTORY_LINE_TURNED_COLOR
+    if analyzed_stats["pending_ends"]:
+        find_pending_ends(stats, target)
 
-        elif is_stick_turned(target):
-            # new turn
-            stick_analyzed_stats["turned"][target] = 1
-            stick_analyzed_stats[ANALYZE_COLOR_KEY][target] = HISTORY_LINE_TURNED_COLOR
+    finished = end_turn | (~is_big_mvmt & was_turned & end_big_mvmt)
+    if finished.any():
+        find_end_and_set_sums(stats, target, finished)
 
-    elif stick_analyzed_stats["turned"][target - 1] == 1 and end_big_mvmt:
-        # finished big mvmt and turn
-        find_end_and_set_sums(target)
+    return analyzed_stats
 
-    return stick_analyzed_stats
 
+def find_begin_and_set_sums(stats, idx, axes):
+    """Finds the latest strict acceleration before idx for the given axes and marks the movement.
 
-def measure_stats(joystick, stats, cur_ms):
-    lx = fix_stick_val(joystick.get_axis(0))
-    ly = fix_stick_val(joystick.get_axis(1))
-    rx = fix_stick_val(joystick.get_axis(2))
-    ry = fix_stick_val(joystick.get_axis(3))
-    lt = fix_stick_val(joystick.get_axis(4))
-    rt = fix_stick_val(joystick.get_axis(5))
+    Args:
+        stats (dict): stats
+        idx (int): index of the analyze target.
+        axes (np.ndarray): bool mask of the axes to search.
 
-    stats["timestamps"].append(cur_ms)
-    stats["lx"].append(lx)
-    stats["ly"].append(ly)
-    stats["rx"].append(rx)
-    stats["ry"].append(ry)
-    stats["lt"].append(lt)
-    stats["rt"].append(rt)
+    Returns:
+        np.ndarray: bool mask of the axes whose begin point was found.
+    """
 
-    for i in range(joystick.get_numbuttons()):
-        btn_state = joystick.get_button(i)
-        if btn_state:
-            stats["buttons"][i].append(1)
-        else:
-            stats["buttons"][i].append(0)
+    analyzed_stats = stats["max"]
+    if idx - 1 <= 6:
+        return np.zeros_like(axes)
 
+    # rows from idx - 1 down to 7
+    accelerated = np.abs(np.array(analyzed_stats["diff_1_of_5"][7:idx][::-1])) > analyzed_stats["thresholds"]["acceleration_strict"]
+    accelerated &= axes
+    found = accelerated.any(axis=0)
+    begin_idxs = idx - 1 - accelerated.argmax(axis=0)
 
-def delete_lines(joystick, stats, cur_ms, max_ms, aggr_max_ms):
-    lines = []
+    for axis in np.flatnonzero(found):
+        begin_idx = begin_idxs[axis]
+        analyzed_stats["begin_ms"][idx][axis] = stats["timestamps"][begin_idx]
+        for k in range(begin_idx, idx):
+            analyzed_stats[ANALYZE_COLOR_KEY][k][axis] = HISTORY_LINE_BIG_MVMT
 
-    below_max_index = -1
-    for i in range(len(stats["timestamps"])):
-        if cur_ms - stats["timestamps"][i] <= max_ms:
-            break
-        below_max_index = i
+    return found
 
-    #print(len(stats["max"]["lx"]["mvmt_avg"]), len(stats["timestamps"]), below_max_index)
 
-    if below_max_index >= 0:
-        for i in range(0, below_max_index):
-            
-            line = []
-            try:
-                line.append(stats["timestamps"][i])
-                del stats["timestamps"][i]
-            except:
-                pass
+def find_end_and_set_sums(stats, idx, axes):
+    """Finds the end of the movement for the given axes and emits its sums and speed as an EVENT_SPEED.
 
-            for key in ["lx", "ly", "rx", "ry", "lt", "rt"]:
-                try:
-                    line.append(stats[key][i])
-                    del stats[key][i]
-                except:
-                    pass
+    The causal window holds idx only, so a movement not ended there waits in "pending_ends"
+    for find_pending_ends(), or is closed at idx when the next one finishes first.
 
-            for j in range(joystick.get_numbuttons()):
-                try:
-                    line.append(stats["buttons"][j][i])
-                    del stats["buttons"][j][i]
-                except:
-                    pass
-
-            for key in ["lx", "ly", "rx", "ry"]:
-                for key2 in ANALYZE_KEYS:
-                    if i < len(stats["max"][key][key2]):
-                        try:
-                            line.append(stats["max"][key][key2][i])
-                            del stats["max"][key][key2][i]
-                        except:
-                            pass
-                del stats["max"][key][ANALYZE_COLOR_KEY][i]
-
-            lines.append(line)
-
-    for i in ["lx", "ly", "rx", "ry"]:
-        delete_to = -1
-        for j in range(len(stats["max"][i]["max_speeds_ms"])):
-            old_ms = stats["max"][i]["max_speeds_ms"][j]
-            if cur_ms - old_ms <= aggr_max_ms:
-                break
-            delete_to = j
-        if delete_to >= 0:
-            try:
-                del stats["max"][i]["max_speeds"][:delete_to]
-                del stats["max"][i]["max_speeds_ms"][:delete_to]
-            except:
-                pass
+    Args:
+        stats (dict): stats
+        idx (int): index of the analyze target.
+        axes (np.ndarray): bool mask of the axes to search.
+    """
 
-    return lines
+    analyzed_stats = stats["max"]
+    if idx - 1 <= 6:
+        return
 
+    # latest begin_ms before idx
+    begin_rows = np.array(analyzed_stats["begin_ms"][7:idx][::-1])
+    has_begin = (begin_rows != 0) & axes
+    found_begin = has_begin.any(axis=0)
+    begin_ms_row_idxs = idx - 1 - has_begin.argmax(axis=0)
 
-def recorder_mode_measure(joystick, stats, cur_ms, writer):
-    deleted_lines = delete_lines(joystick, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
-    measure_stats(joystick, stats, cur_ms)
-    analyze_stats(stats)
-    for line in deleted_lines:
-        writer.writerow(line)
+    # first sample stopped accelerating or moving
+    thresholds = analyzed_stats["thresholds"]
+    ended = (np.abs(np.array(analyzed_stats["diff_1_of_5"][idx:idx + 5])) <= thresholds["acceleration"]) |\
+            (np.abs(np.array(analyzed_stats["diff_1_of_1_of_5"][idx:idx + 5])) <= thresholds["keep_moving"])
+    found_end = ended.any(axis=0)
+    end_idxs = idx + ended.argmax(axis=0)
 
-def gui_mode_measure(joystick, stats, cur_ms, fd):
-    delete_lines(joystick, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
-    measure_stats(joystick, stats, cur_ms)
-    analyze_stats(stats)
+    for axis in np.flatnonzero(found_begin):
+        begin_ms_row_idx = begin_ms_row_idxs[axis]
+        begin_ms = int(analyzed_stats["begin_ms"][begin_ms_row_idx][axis])
+        analyzed_stats["begin_ms"][idx - 1][axis] = begin_ms
+        if begin_ms <= 0:
+            continue
 
-def stick_mode_measure(joystick, stats, cur_ms, fd):
-    delete_lines(joystick, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
-    measure_stats(joystick, stats, cur_ms)
+        if not found_end[axis]:
+            if analyzed_stats["causal"]:
+                if axis in analyzed_stats["pending_ends"]:
+                    set_speed(stats, idx, axis, analyzed_stats["pending_ends"][axis], idx - 1, idx)
+                analyzed_stats["pending_ends"][axis] = begin_ms
+            continue
 
-def measure_main_loop(measure_func, joystick, stats, stop_event, change_event, writer = None):
-    clock = pygame.time.Clock()
+        set_speed(stats, idx, axis, begin_ms, begin_ms_row_idx, end_idxs[axis])
 
-    last_ms = pygame.time.get_ticks()
 
-    while not stop_event.is_set() and not change_event.is_set():
-        quit_event = pygame.event.get(pygame.QUIT)
-        if quit_event:
-            stop_event.set()
-            return
-        
-        joystick_remove_event = pygame.event.get(pygame.JOYDEVICEREMOVED)
-        if joystick_remove_event:
-            change_event.set()
-            return
+def find_pending_ends(stats, idx):
+    """Emits the speeds of the causal movements whose end is the sample idx, see find_end_and_set_sums()."""
 
+    analyzed_stats = stats["max"]
+    thresholds = analyzed_stats["thresholds"]
+    ended = (np.abs(analyzed_stats["diff_1_of_5"][idx]) <= thresholds["acceleration"]) |\
+            (np.abs(analyzed_stats["diff_1_of_1_of_5"][idx]) <= thresholds["keep_moving"])
+    for axis, begin_ms in list(analyzed_stats["pending_ends"].items()):
+        if ended[axis]:
+            del analyzed_stats["pending_ends"][axis]
+            set_speed(stats, idx, axis, begin_ms, idx - 1, idx)
 
-        # Get the time from pygame.init() called in ms.
-        cur_ms = pygame.time.get_ticks()
 
-        if cur_ms - last_ms >= SAMPLING_RATE:
-            measure_func(joystick, stats, cur_ms, writer)
-            # Calculating FPS
-            stats["fps"] = 1000 / (cur_ms - last_ms)
-            last_ms = cur_ms
-        
-        # Wait until next measure frame
-        clock.tick(MEASURE_FRAME_RATE)
+def set_speed(stats, idx, axis, begin_ms, begin_ms_row_idx, j):
+    """Emits the sums and speed of a movement of axis from begin_ms to the sample j as an EVENT_SPEED.
 
-def measure(measure_func, joystick, stats, stop_event, change_event, record = False):
+    Args:
+        stats (dict): stats
+        idx (int): index of the analyze target, reported on the sample before it.
+        axis (int): index of the axis.
+        begin_ms (int): begin of the movement.
+        begin_ms_row_idx (int): last sample begin_ms can be at.
+        j (int): index of the first sample after the movement.
+    """
 
-    if (record):
-        dt = datetime.datetime.now()
-        filename = dt.strftime("%Y%m%d_%H%M%S_%f.csv")
-        with open(filename, 'w') as fd:
-            writer = csv.writer(fd)
-            writer.writerow(csv_file_header(joystick))
-            measure_main_loop(measure_func, joystick, stats, stop_event, change_event, writer)
-    else:
-        measure_main_loop(measure_func, joystick, stats, stop_event, change_event)    
+    analyzed_stats = stats["max"]
+    timestamps = stats["timestamps"]
+    begin_ms_index = bisect.bisect_left(timestamps, begin_ms, 7, begin_ms_row_idx + 1)
+    if begin_ms_index > begin_ms_row_idx or timestamps[begin_ms_index] != begin_ms:
+        begin_ms_index = -1
 
-def realtime_gui(screen, joystick, stop_event, change_event, stats):
-    visualization_thread = None
-    
-    visualization_thread = Thread(target=recorder_mode_visualize, args=(screen, joystick, stats, stop_event, change_event, False))
-    visualization_thread.start()
-        
-    measure(gui_mode_measure, joystick, stats, stop_event, change_event)
-    if visualization_thread:
-        visualization_thread.join()
+    end_ms = timestamps[j]
+    sums = 0.0
+    speed = 0.0
 
-def recorder_with_gui(screen, joystick, stop_event, change_event, stats):
-    '''
-        RECORDER with GUI
-    '''
-    recorder(screen, joystick, stop_event, change_event, True, stats)
+    if j - 1 - begin_ms_index > 0:
+        sums = sum(abs(value) for value in buffered_samples(stats, begin_ms_index, j - 1)[:, axis].tolist())
 
-def recorder_without_gui(screen, joystick, stop_event, change_event, stats):
-    '''
-        RECORDER without GUI
-    '''
-    recorder(screen, joystick, stop_event, change_event, False, stats)
+        if end_ms - begin_ms > 0:
+            speed = sums / (end_ms - begin_ms)
+            analyzed_stats["last_speed"][axis] = speed
+            if speed > analyzed_stats["max_speed"][axis]:
+                analyzed_stats["max_speed"][axis] = speed
+            analyzed_stats["max_speeds"][axis].append(speed)
+            analyzed_stats["max_speeds_ms"][axis].append(end_ms)
 
-def recorder(screen, joystick, stop_event, change_event, with_gui, stats):
+            for k in range(begin_ms_index, j - 1):
+                analyzed_stats[ANALYZE_COLOR_KEY][k][axis] = HISTORY_LINE_BIG_TURN
 
-    visualization_thread = None
-    
-    if with_gui:
-        visualization_thread = Thread(target=recorder_mode_visualize, args=(screen, joystick, stats, stop_event, change_event, True))
-        visualization_thread.start()
-        
-    measure(recorder_mode_measure, joystick, stats, stop_event, change_event, True)
-    if visualization_thread:
-        visualization_thread.join()
+    # reported on the sample before idx
+    add_event(analyzed_stats, timestamps[idx - 1], EVENT_SPEED, axis, begin_ms, end_ms, float(sums), float(speed))
 
-def stick_analyzer(screen, joystick, stop_event, change_event, stats):
-    '''
-        STICK ANALYZER
-    '''
 
-    visualization_thread = Thread(target=stick_mode_visualize, args=(screen, joystick, stats, stop_event, change_event))
-    visualization_thread.start()
-        
-    measure(stick_mode_measure, joystick, stats, stop_event, change_event)
-    visualization_thread.join()
+def measure_stats(joystick, stats, cur_ms):
+    buttons = [1 if joystick.get_button(i) else 0 for i in range(joystick.get_numbuttons())]
+    return add_sample(stats, cur_ms, read_raw_axes(joystick), buttons)
 
-def init_pygame(to_run_func, width, height, transparent, pin_on_top):
-    stop_event = Event()
-    change_event = Event()
-    
-    while True:
-        pygame.init()
-        joystick = init_joystick()
-        if joystick is None:
-            print("Couldn't find Controller.")
-            input("Press Enter to exit...")
-            return
-            
-        screen = None
-        if transparent:
-            if pin_on_top:
-                screen = pygame.display.set_mode((width, height), pygame.NOFRAME)
-            else:
-                screen = pygame.display.set_mode((width, height))#, pygame.NOFRAME)
-            hwnd = pygame.display.get_wm_info()["window"]
-            win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE) | win32con.WS_EX_LAYERED)
-            win32gui.SetLayeredWindowAttributes(hwnd, win32api.RGB(*(128, 128, 128)), 0, win32con.LWA_COLORKEY)
-            if pin_on_top:
-                win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, PIN_ON_TOP_POS[0], PIN_ON_TOP_POS[1], 0, 0, win32con.SWP_NOSIZE)
-        else:
-            if pin_on_top:
-                screen = pygame.display.set_mode((width, height), pygame.NOFRAME)
-                hwnd = pygame.display.get_wm_info()["window"]
-                win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, PIN_ON_TOP_POS[0], PIN_ON_TOP_POS[1], 0, 0, win32con.SWP_NOSIZE)
-            else:
-                screen = pygame.display.set_mode((width, height))
-
-        pygame.display.set_caption("GPSA: Game Pad Stats Analyzer")
-
-        #prepare stats
-        stats = {
-            "timestamps": [],
-            "lx": [], "ly": [], "rx": [], "ry": [],
-            "lt": [], "rt": [],
-            "max": {
-                "lx": {},
-                "ly": {},
-                "rx": {},
-                "ry": {}
-            },
-            "buttons": [],
-            "fps": 0
-        }
-        for key in ["lx", "ly", "rx", "ry"]:
-            for key2 in ANALYZE_KEYS:
-                stats["max"][key][key2] = []
-            for key2 in ANALYZE_AGGR_KEYS:
-                stats["max"][key][key2] = 0
-            for key2 in ANALYZE_AGGR_MS_KEYS:
-                stats["max"][key][key2] = []
-            stats["max"][key][ANALYZE_COLOR_KEY] = []
-
-        for i in range(joystick.get_numbuttons()):
-            stats["buttons"].append([])
-
-        to_run_func(screen, joystick, stop_event, change_event, stats)
-
-        if stop_event.is_set():
-            pygame.quit()
+
+def add_sample(stats, cur_ms, raw, buttons):
+    """Buffers a sample read from the controller or a recording.
+
+    Args:
+        stats (dict): stats
+        cur_ms (int): ms of the sample.
+        raw (array.array): raw int16 values of ANALYZE_AXES, typecode 'h'.
+        buttons (list[int]): states of the buttons.
+
+    Returns:
+        np.ndarray: the calibrated sample, for the consumers of the newest one.
+    """
+
+    stats["timestamps"].append(cur_ms)
+
+    # for pacing frames while the inputs are static
+    if stats["raw"][-len(ANALYZE_AXES):] != raw or\
+       any(stats["buttons"][i][-1:] != [btn_state] for i, btn_state in enumerate(buttons)):
+        stats["last_input_ms"] = cur_ms
+
+    stats["raw"].extend(raw)
+
+    for i, btn_state in enumerate(buttons):
+        stats["buttons"][i].append(btn_state)
+
+    sample = calibrate_raw_axes(raw)
+    measure_stick_magnitude(stats, sample)
+    add_to_history_level(stats["history"], 0, cur_ms, sample, sample, sample, 1)
+    return sample
+
+
+def measure_stick_magnitude(stats, sample):
+    """Adds the vector magnitudes of the sticks of a new sample to the running MAX_MS window.
+
+    Renderers read the finished "magnitude_avg" (and "magnitude_percentiles") instead of
+    walking over the buffered samples every frame.
+
+    Args:
+        stats (dict): stats
+        sample (np.ndarray): a new sample of ANALYZE_AXES.
+    """
+
+    magnitude = np.hypot(sample[STICK_MAGNITUDE_X], sample[STICK_MAGNITUDE_Y])
+    stats["magnitudes"].append(magnitude)
+    stats["magnitude_sum"] = stats["magnitude_sum"] + magnitude
+
+    # a new array is assigned so that the render thread never sees a half updated value
+    stats["magnitude_avg"] = stats["magnitude_sum"] / len(stats["magnitudes"])
+    if STICK_MAGNITUDE_PERCENTILES:
+        stats["magnitude_percentiles"] = np.percentile(stats["magnitudes"], STICK_MAGNITUDE_PERCENTILES, axis=0)
+
+
+# NOISE profile of the resting sticks, Welch PSD over overlapping blocks
+NOISE_AXES = [0, 1, 2, 3]
+NOISE_STICKS = [[0, 1], [2, 3]] #indexes of NOISE_AXES resting together
+NOISE_BLOCK = 64 #samples, 640ms
+NOISE_HOP = NOISE_BLOCK // 2
+NOISE_REST_LEVEL = 0.25
+NOISE_REST_SPAN = 0.05
+NOISE_AVERAGE_BLOCKS = 100 #exponential average over the last ~100 rest blocks
+NOISE_PEAKS = 2
+NOISE_WINDOW = np.hanning(NOISE_BLOCK)
+NOISE_FREQS = np.fft.rfftfreq(NOISE_BLOCK, SAMPLING_RATE / 1000)
+NOISE_FREQ_STEP = NOISE_FREQS[1]
+# one-sided PSD of the windowed FFT, in units^2/Hz
+NOISE_PSD_SCALE = np.full(len(NOISE_FREQS), 2 / (1000 / SAMPLING_RATE * (NOISE_WINDOW ** 2).sum()))
+NOISE_PSD_SCALE[[0, -1]] /= 2
+
+def init_noise_profile():
+    return {
+        "buffer": np.zeros((NOISE_BLOCK, len(NOISE_AXES))),
+        "head": 0,
+        "filled": 0,
+        "since_block": 0,
+        "resting": np.zeros(len(NOISE_AXES), dtype=bool),
+        "blocks": np.zeros(len(NOISE_AXES), dtype=np.int64),
+        "psd": np.zeros((len(NOISE_AXES), len(NOISE_FREQS))),
+        "last_means": np.zeros(len(NOISE_AXES)),
+        "last_ms": 0,
+        # finished values for the renderer
+        "rms": np.zeros(len(NOISE_AXES)),
+        "floor": np.zeros(len(NOISE_AXES)),
+        "peaks": np.zeros((len(NOISE_AXES), NOISE_PEAKS)),
+        "drift": np.zeros(len(NOISE_AXES)),
+    }
+
+
+def profile_noise(noise, sample, cur_ms):
+    """Adds a sample to the noise profile of the resting sticks.
+
+    Every NOISE_HOP samples the last NOISE_BLOCK samples make a block. The blocks of the sticks
+    resting still are Hann windowed and averaged into a Welch power spectrum per axis, and the shift
+    of their means between overlapping blocks into a drift rate. A sample costs a ring buffer write,
+    and a block one small FFT.
+
+    Args:
+        noise (dict): init_noise_profile().
+        sample (np.ndarray): a new sample of ANALYZE_AXES.
+        cur_ms (int): ms of the sample.
+    """
+
+    noise["buffer"][noise["head"]] = sample[NOISE_AXES]
+    noise["head"] = (noise["head"] + 1) % NOISE_BLOCK
+    noise["filled"] = min(noise["filled"] + 1, NOISE_BLOCK)
+    noise["since_block"] += 1
+    if noise["filled"] < NOISE_BLOCK or noise["since_block"] < NOISE_HOP:
+        return
+    noise["since_block"] = 0
+
+    # oldest first
+    block = np.roll(noise["buffer"], -noise["head"], axis=0)
+    means = block.mean(axis=0)
+    resting = np.zeros(len(NOISE_AXES), dtype=bool)
+    for stick in NOISE_STICKS:
+        values = block[:, stick]
+        resting[stick] = np.abs(values).max() < NOISE_REST_LEVEL and np.ptp(values, axis=0).max() < NOISE_REST_SPAN
+
+    if resting.any():
+        blocks = noise["blocks"].copy()
+        blocks[resting] += 1
+        alpha = 1 / np.minimum(blocks[resting], NOISE_AVERAGE_BLOCKS)
+
+        spectrum = np.fft.rfft((block[:, resting] - means[resting]) * NOISE_WINDOW[:, None], axis=0)
+        psd = noise["psd"].copy()
+        psd[resting] += alpha[:, None] * ((np.abs(spectrum.T) ** 2) * NOISE_PSD_SCALE - psd[resting])
+
+        # the previous block overlaps this one while resting all along
+        drift = noise["drift"].copy()
+        still = resting & noise["resting"]
+        if still.any() and cur_ms > noise["last_ms"]:
+            rate = (means[still] - noise["last_means"][still]) / ((cur_ms - noise["last_ms"]) / 1000)
+            drift[still] += np.minimum(1 / blocks[still], 1 / NOISE_AVERAGE_BLOCKS) * (rate - drift[still])
+
+        # new arrays are assigned so that the render thread never sees a half updated value
+        noise["blocks"] = blocks
+        noise["psd"] = psd
+        noise["drift"] = drift
+        noise["rms"] = np.sqrt(psd[:, 1:].sum(axis=1) * NOISE_FREQ_STEP)
+        noise["floor"] = np.sqrt(np.median(psd[:, 1:], axis=1))
+        noise["peaks"] = NOISE_FREQS[1:][np.argsort(-psd[:, 1:], axis=1)[:, :NOISE_PEAKS]]
+
+    noise["resting"] = resting
+    noise["last_means"] = means
+    noise["last_ms"] = cur_ms
+
+
+def draw_noise_profile(screen, noise, axis, center, font):
+    """Draws the noise profile of an axis of NOISE_AXES, once it has rest blocks."""
+
+    key = ANALYZE_AXES[NOISE_AXES[axis]]
+    if not noise["blocks"][axis]:
+        plot_txt(screen, font, f'{key}: rest the stick to profile its noise', center = center)
+        return
+    peaks = ", ".join(f'{freq:.1f}' for freq in noise["peaks"][axis]) if noise["rms"][axis] > 0 else "-"
+    color = (255, 255, 255) if noise["resting"][axis] else (150, 150, 150)
+    plot_txt(screen, font, f'{key}: noise {noise["rms"][axis]:.5f} rms, floor {noise["floor"][axis]:.6f}/sqrt(Hz), peaks {peaks}Hz, drift {noise["drift"][axis]:+.6f}/s',
+             True, color, center = center)
+
+
+# STICK MAP of the session, occupancy heatmap and max radius per angle of each stick
+STICK_MAP_CELLS = 50 #per axis over [-1, 1]
+STICK_MAP_ANGLES = 72
+STICK_MAP_LEVELS = 32 #colors of the heatmap, log scaled counts
+STICK_MAP_FULL_COUNT = 10 * 60 * 1000 // SAMPLING_RATE #10 minutes in a cell
+STICK_MAP_OUTER = 0.7 #angles pushed beyond this count for the circularity
+STICK_MAP_COLORS = [(30, 30, 30)] + [tuple(channel * 0.6 for channel in calc_color(level / STICK_MAP_LEVELS)) for level in range(1, STICK_MAP_LEVELS + 1)]
+STICK_MAP_OUTLINE_COLOR = (255, 220, 120)
+
+def init_stick_map():
+    sticks = len(STICK_MAGNITUDE_X)
+    return {
+        "counts": np.zeros((sticks, STICK_MAP_CELLS, STICK_MAP_CELLS), dtype=np.int64),
+        "max_radius": np.zeros((sticks, STICK_MAP_ANGLES)),
+        "min_radius": np.full(sticks, np.inf),
+        # cached by the renderer, the levels drawn on the surfaces
+        "surfaces": [None] * sticks,
+        "drawn": np.zeros((sticks, STICK_MAP_CELLS, STICK_MAP_CELLS), dtype=np.int64),
+    }
+
+
+def add_to_stick_map(stick_map, sample):
+    """Adds a sample to the heatmap cells and the max radius per angle of the sticks.
+
+    A sample touches one cell and one angle per stick, the renderer redraws the cells whose level changed.
+
+    Args:
+        stick_map (dict): init_stick_map().
+        sample (np.ndarray): a new sample of ANALYZE_AXES.
+    """
+
+    values = sample.tolist()
+    for stick, (x_axis, y_axis) in enumerate(zip(STICK_MAGNITUDE_X, STICK_MAGNITUDE_Y)):
+        x = values[x_axis]
+        y = values[y_axis]
+        column = min(max(int((x + 1) / 2 * STICK_MAP_CELLS), 0), STICK_MAP_CELLS - 1)
+        row = min(max(int((y + 1) / 2 * STICK_MAP_CELLS), 0), STICK_MAP_CELLS - 1)
+        stick_map["counts"][stick, row, column] += 1
+
+        radius = math.hypot(x, y)
+        angle = int((math.atan2(y, x) + math.pi) / (2 * math.pi) * STICK_MAP_ANGLES) % STICK_MAP_ANGLES
+        if radius > stick_map["max_radius"][stick, angle]:
+            stick_map["max_radius"][stick, angle] = radius
+        # a deadzone snaps the sticks to 0, the smallest radius off the center is its edge
+        if 0 < radius < stick_map["min_radius"][stick]:
+            stick_map["min_radius"][stick] = radius
+
+
+def copy_stick_map(stick_map):
+    """A copy of the counts and radii of a stick map, drawn on new surfaces."""
+
+    copy = init_stick_map()
+    for key in ["counts", "max_radius", "min_radius"]:
+        copy[key][:] = stick_map[key]
+    return copy
+
+
+def add_samples_to_stick_map(stick_map, samples):
+    """add_to_stick_map() of (N, len(ANALYZE_AXES)) samples at once."""
+
+    if len(samples) == 0:
+        return
+
+    xs = samples[:, STICK_MAGNITUDE_X]
+    ys = samples[:, STICK_MAGNITUDE_Y]
+    sticks = np.broadcast_to(np.arange(len(STICK_MAGNITUDE_X)), xs.shape)
+    columns = np.clip(((xs + 1) / 2 * STICK_MAP_CELLS).astype(np.int64), 0, STICK_MAP_CELLS - 1)
+    rows = np.clip(((ys + 1) / 2 * STICK_MAP_CELLS).astype(np.int64), 0, STICK_MAP_CELLS - 1)
+    np.add.at(stick_map["counts"], (sticks, rows, columns), 1)
+
+    radius = np.hypot(xs, ys)
+    angles = ((np.arctan2(ys, xs) + np.pi) / (2 * np.pi) * STICK_MAP_ANGLES).astype(np.int64) % STICK_MAP_ANGLES
+    np.maximum.at(stick_map["max_radius"], (sticks, angles), radius)
+    np.minimum(stick_map["min_radius"], np.where(radius > 0, radius, np.inf).min(axis=0), out=stick_map["min_radius"])
+
+
+def stick_circularity(stick_map, stick):
+    """Returns the RMS of the max radius from 1 over the angles pushed beyond STICK_MAP_OUTER, and how many they are."""
+
+    max_radius = stick_map["max_radius"][stick]
+    outer = max_radius[max_radius >= STICK_MAP_OUTER]
+    if len(outer) == 0:
+        return 0.0, 0
+    return float(np.sqrt(np.mean((outer - 1) ** 2))), len(outer)
+
+
+def draw_stick_map(screen, stick_map, stick, center, guide_radius):
+    """Draws the occupancy heatmap of a stick over the square of its guide circle.
+
+    The heatmap is kept on a surface where only the cells whose level changed since the last frame are filled again.
+    """
+
+    size = guide_radius * 2
+    surface = stick_map["surfaces"][stick]
+    drawn = stick_map["drawn"][stick]
+    if surface is None or surface.get_width() != size:
+        surface = pygame.Surface((size, size))
+        surface.fill(STICK_MAP_COLORS[0])
+        stick_map["surfaces"][stick] = surface
+        drawn[:] = 0
+
+    counts = stick_map["counts"][stick]
+    levels = np.ceil(np.log1p(counts) / np.log1p(STICK_MAP_FULL_COUNT) * STICK_MAP_LEVELS).astype(np.int64)
+    np.minimum(levels, STICK_MAP_LEVELS, out=levels)
+    cell = size / STICK_MAP_CELLS
+    for row, column in np.argwhere(levels != drawn).tolist():
+        left = round(column * cell)
+        top = round(row * cell)
+        surface.fill(STICK_MAP_COLORS[levels[row, column]], (left, top, round((column + 1) * cell) - left, round((row + 1) * cell) - top))
+    drawn[:] = levels
+
+    screen.blit(surface, (center[0] - guide_radius, center[1] - guide_radius))
+
+
+def draw_stick_outline(screen, stick_map, stick, center, guide_radius, font):
+    """Draws the max radius per angle of a stick over its guide circle, with its circularity and deadzone."""
+
+    max_radius = stick_map["max_radius"][stick]
+    edges = np.linspace(-np.pi, np.pi, STICK_MAP_ANGLES + 1)
+    for angle in np.flatnonzero(max_radius).tolist():
+        radius = max_radius[angle] * guide_radius
+        start = (center[0] + radius * math.cos(edges[angle]), center[1] + radius * math.sin(edges[angle]))
+        end = (center[0] + radius * math.cos(edges[angle + 1]), center[1] + radius * math.sin(edges[angle + 1]))
+        pygame.draw.line(screen, STICK_MAP_OUTLINE_COLOR, start, end, 2)
+
+    error, angles = stick_circularity(stick_map, stick)
+    min_radius = stick_map["min_radius"][stick]
+    deadzone = f'{min_radius:.5f}' if np.isfinite(min_radius) else "-"
+    plot_txt(screen, font, f'circularity error {error * 100:.1f}% ({angles}/{STICK_MAP_ANGLES} angles), min radius {deadzone}',
+             center = (center[0], center[1] - guide_radius - 15))
+
+
+def init_history_pyramid():
+    """Creates the levels of the history pyramid, one per HISTORY_SPANS_MS.
+
+    Each level keeps min/max/mean of HISTORY_BUCKETS buckets in ring buffers, one column per axis.
+    """
+
+    levels = []
+    for span_ms in HISTORY_SPANS_MS:
+        levels.append({
+            "span_ms": span_ms,
+            "bucket_ms": span_ms // HISTORY_BUCKETS,
+            "ms": np.zeros(HISTORY_BUCKETS, dtype=np.int64),
+            "min": np.zeros((HISTORY_BUCKETS, len(ANALYZE_AXES))),
+            "max": np.zeros((HISTORY_BUCKETS, len(ANALYZE_AXES))),
+            "mean": np.zeros((HISTORY_BUCKETS, len(ANALYZE_AXES))),
+            "head": 0,
+            "count": 0,
+            # bucket being filled
+            "cur_ms": None,
+            "cur_min": None,
+            "cur_max": None,
+            "cur_sum": None,
+            "cur_count": 0,
+        })
+    return levels
+
+
+def add_to_history_level(pyramid, level_idx, ms, mins, maxs, sums, count):
+    """Adds samples (or a closed bucket of the level below) to a level of the history pyramid.
+
+    A closed bucket cascades to the next level, so each sample updates one level in most cases.
+    """
+
+    level = pyramid[level_idx]
+    bucket_ms = ms - ms % level["bucket_ms"]
+
+    if level["cur_ms"] is not None and level["cur_ms"] != bucket_ms:
+        # close the current bucket
+        head = level["head"]
+        level["ms"][head] = level["cur_ms"]
+        level["min"][head] = level["cur_min"]
+        level["max"][head] = level["cur_max"]
+        level["mean"][head] = level["cur_sum"] / level["cur_count"]
+        level["head"] = (head + 1) % HISTORY_BUCKETS
+        level["count"] = min(level["count"] + 1, HISTORY_BUCKETS)
+        if level_idx + 1 < len(pyramid):
+            add_to_history_level(pyramid, level_idx + 1, level["cur_ms"], level["cur_min"], level["cur_max"], level["cur_sum"], level["cur_count"])
+        level["cur_ms"] = None
+
+    if level["cur_ms"] is None:
+        level["cur_ms"] = bucket_ms
+        level["cur_min"] = mins.copy()
+        level["cur_max"] = maxs.copy()
+        level["cur_sum"] = sums.copy()
+        level["cur_count"] = count
+    else:
+        np.minimum(level["cur_min"], mins, out=level["cur_min"])
+        np.maximum(level["cur_max"], maxs, out=level["cur_max"])
+        level["cur_sum"] += sums
+        level["cur_count"] += count
+
+
+def history_level_view(level):
+    """Returns ms, min, max and mean arrays of a history pyramid level from the oldest bucket,
+    including the bucket being filled.
+    """
+
+    order = (np.arange(level["count"]) + level["head"] - level["count"]) % HISTORY_BUCKETS
+    ms, mins, maxs, means = level["ms"][order], level["min"][order], level["max"][order], level["mean"][order]
+    cur_ms = level["cur_ms"]
+    if cur_ms is not None:
+        ms = np.append(ms, cur_ms)
+        mins = np.vstack([mins, level["cur_min"]])
+        maxs = np.vstack([maxs, level["cur_max"]])
+        means = np.vstack([means, level["cur_sum"] / level["cur_count"]])
+    return ms, mins, maxs, means
+
+
+def select_history_level(pyramid, span_ms, width):
+    """Returns the finest history pyramid level with no more buckets over span_ms than pixels in width."""
+
+    for level in pyramid:
+        if span_ms / level["bucket_ms"] <= width:
+            return level
+    return pyramid[-1]
+
+
+def delete_lines(joystick, stats, cur_ms, max_ms, aggr_max_ms):
+    """Drops the samples older than max_ms and the max speeds older than aggr_max_ms.
+
+    The newest sample older than max_ms is kept, the analyzer still looks back at it.
+
+    Returns:
+        list[list]: the dropped samples as lines of the recording CSV.
+    """
+
+    count = bisect.bisect_left(stats["timestamps"], cur_ms - max_ms) - 1
+
+    lines = []
+    if count > 0:
+        raw = np.frombuffer(stats["raw"][:count * len(ANALYZE_AXES)], dtype=np.int16).reshape(-1, len(ANALYZE_AXES))
+        axes = (raw if stats["record_raw"] else calibrate_raw_axes(raw)).T.tolist()
+        del stats["raw"][:count * len(ANALYZE_AXES)]
+        buttons = [button[:count] for button in stats["buttons"]]
+        lines = [list(line) for line in zip(stats["timestamps"][:count], *axes, *buttons)]
+
+        del stats["timestamps"][:count]
+        for button in stats["buttons"]:
+            del button[:count]
+
+        if stats["magnitudes"]:
+            stats["magnitude_sum"] = stats["magnitude_sum"] - np.sum(stats["magnitudes"][:count], axis=0)
+            del stats["magnitudes"][:count]
+
+        # no rows in stick mode
+        for key in ANALYZE_KEYS + [ANALYZE_COLOR_KEY]:
+            del stats["max"][key][:count]
+
+    for i in range(len(ANALYZE_AXES)):
+        delete_to = bisect.bisect_left(stats["max"]["max_speeds_ms"][i], cur_ms - aggr_max_ms)
+        if delete_to > 0:
+            del stats["max"]["max_speeds"][i][:delete_to]
+            del stats["max"]["max_speeds_ms"][i][:delete_to]
+
+    return lines
+
+
+def recorder_mode_measure(joystick, stats, cur_ms, writers):
+    writer, events_writer = writers
+    deleted_lines = delete_lines(joystick, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
+    measure_stats(joystick, stats, cur_ms)
+    analyze_stats(stats)
+    for line in deleted_lines:
+        writer.writerow(line)
+    events_writer.writerows(take_events(stats))
+
+def gui_mode_measure(joystick, stats, cur_ms, fd):
+    delete_lines(joystick, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
+    measure_stats(joystick, stats, cur_ms)
+    analyze_stats(stats)
+    take_events(stats)
+
+def stick_mode_measure(joystick, stats, cur_ms, fd):
+    delete_lines(joystick, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
+    sample = measure_stats(joystick, stats, cur_ms)
+    profile_noise(stats["noise"], sample, cur_ms)
+    add_to_stick_map(stats["stick_map"], sample)
+    take_events(stats)
+
+def handle_zoom_events(stats, events = None):
+    """Zooms the history lines in with +/mouse wheel up and out with -/mouse wheel down.
+
+    Args:
+        stats (dict): stats
+        events (list): pygame events already taken from the queue, the key and wheel events are taken if None.
+    """
+
+    if events is None:
+        events = pygame.event.get((pygame.KEYDOWN, pygame.MOUSEWHEEL))
+
+    step = 0
+    for event in events:
+        if event.type == pygame.MOUSEWHEEL:
+            step -= event.y
+        elif event.type != pygame.KEYDOWN:
+            continue
+        elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            step -= 1
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            step += 1
+
+    if step:
+        stats["history_zoom"] = min(max(stats["history_zoom"] + step, 0), len(HISTORY_ZOOM_SPANS_MS) - 1)
+        stats["new_data"].set()
+
+def handle_device_events(joystick, stats):
+    """Follows the controller being removed and added back without restarting pygame.
+
+    Sampling pauses while it is away, and the buffers, the window and the recording are kept.
+    The same controller (by GUID) coming back resumes sampling at once,
+    and the gap is added to the analyze events.
+
+    Returns:
+        pygame.joystick.Joystick: the joystick to sample.
+    """
+
+    for event in pygame.event.get((pygame.JOYDEVICEREMOVED, pygame.JOYDEVICEADDED)):
+        if event.type == pygame.JOYDEVICEREMOVED:
+            if stats["connected"] and event.instance_id == joystick.get_instance_id():
+                stats["connected"] = False
+                stats["removed_guid"] = joystick.get_guid()
+                joystick.quit()
+                stats["new_data"].set()
+                print("Controller disconnected. Waiting for it to come back...")
+        elif not stats["connected"]:
+            added = pygame.joystick.Joystick(event.device_index)
+            if added.get_guid() != stats["removed_guid"]:
+                # another controller, not kept open
+                added.quit()
+                continue
+            added.init()
+            joystick = added
+            stats["joystick"] = joystick
+            stats["connected"] = True
+            cur_ms = pygame.time.get_ticks()
+            begin_ms = stats["timestamps"][-1] if stats["timestamps"] else cur_ms
+            add_event(stats["max"], cur_ms, EVENT_GAP, None, begin_ms, cur_ms)
+            print(f"{Style.BRIGHT}Reconnected controller: {joystick.get_name()}{Style.RESET_ALL}")
+
+    return joystick
+
+def live_sticks(stats):
+    """Positions of the sticks for a frame, the newest sample while the controller is away."""
+
+    if stats["connected"]:
+        try:
+            return [fix_stick_val(stats["joystick"].get_axis(axis)) for axis in range(4)]
+        except pygame.error:
+            # removed and quit by the measure thread meanwhile
+            pass
+    return buffered_samples(stats, -1)[0, :4].tolist() if stats["timestamps"] else [0.0] * 4
+
+# SAMPLER policy of the measure loop, opt-in and for Linux
+SAMPLER_FIFO_PRIORITY = 10 #SCHED_FIFO, under the kernel threads of the interrupts at 50
+SAMPLER_NICE = -10 #raised priority when SCHED_FIFO is not allowed
+SAMPLER_SWITCH_INTERVAL = 0.001 #s, how long the visualize thread may hold the GIL
+
+def init_sampler(cpu = None, realtime = False):
+    """Sampler policy to apply to the measure loop, None for the default clock.tick() loop.
+
+    Args:
+        cpu (int): CPU to pin the measure loop to.
+        realtime (bool): requests SCHED_FIFO, or a raised priority when it is not allowed.
+    """
+
+    if cpu is None and not realtime:
+        return None
+    return {"cpu": cpu, "realtime": realtime, "applied": {}, "missed": 0, "max_late_ms": 0.0}
+
+
+def apply_sampler_policy(sampler):
+    """Applies the sampler policy to the calling thread, the one sampling the controller.
+
+    Linux applies the affinity and the scheduling of pid 0 to the calling thread only,
+    the visualize thread keeps the default ones.
+
+    Returns:
+        dict: per policy, what was actually applied or why it was not.
+    """
+
+    applied = {}
+    if sampler["cpu"] is not None:
+        if not hasattr(os, "sched_setaffinity"):
+            applied["cpu"] = "unsupported on this platform"
+        else:
+            try:
+                os.sched_setaffinity(0, {sampler["cpu"]})
+                applied["cpu"] = f"pinned to CPU {', '.join(map(str, sorted(os.sched_getaffinity(0))))}"
+            except (OSError, ValueError) as e:
+                applied["cpu"] = f"not pinned: {e}"
+
+    if sampler["realtime"]:
+        if not hasattr(os, "sched_setscheduler"):
+            applied["scheduler"] = "unsupported on this platform"
+        else:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(SAMPLER_FIFO_PRIORITY))
+                applied["scheduler"] = f"SCHED_FIFO priority {os.sched_getparam(0).sched_priority}"
+            except OSError as e:
+                try:
+                    os.setpriority(os.PRIO_PROCESS, 0, SAMPLER_NICE)
+                    applied["scheduler"] = f"SCHED_FIFO not allowed ({e.strerror}), nice {os.getpriority(os.PRIO_PROCESS, 0)}"
+                except OSError as nice_e:
+                    applied["scheduler"] = f"SCHED_FIFO not allowed ({e.strerror}), nice {SAMPLER_NICE} not allowed ({nice_e.strerror})"
+
+        sys.setswitchinterval(SAMPLER_SWITCH_INTERVAL)
+        applied["switch_interval"] = f"GIL switch interval {sys.getswitchinterval() * 1000:g}ms"
+
+    applied["timing"] = f"absolute monotonic deadlines every {SAMPLING_RATE}ms"
+    sampler.update(applied=applied, missed=0, max_late_ms=0.0)
+    return applied
+
+
+def wait_next_deadline(sampler, deadline):
+    """Sleeps until the deadline of the next sample, SAMPLING_RATE after the last one.
+
+    The deadlines are absolute, a late wake-up delays one sample and not the ones after it:
+    a deadline passed by less than a period is sampled at once, without sleeping.
+    Deadlines passed by a full period or more are skipped and counted.
+
+    Args:
+        sampler (dict): init_sampler().
+        deadline (float): time.monotonic() deadline of the last sample.
+
+    Returns:
+        float: the deadline of the next sample.
+    """
+
+    period = SAMPLING_RATE / 1000
+    deadline += period
+    now = time.monotonic()
+    if now - deadline >= period:
+        missed = math.floor((now - deadline) / period)
+        sampler["missed"] += missed
+        deadline += missed * period
+
+    if now < deadline:
+        time.sleep(deadline - now)
+    sampler["max_late_ms"] = max(sampler["max_late_ms"], (time.monotonic() - deadline) * 1000)
+    return deadline
+
+
+def print_sampler_policy(sampler):
+    print("Sampler policy:")
+    for policy, applied in sampler["applied"].items():
+        print(f"  {policy}: {applied}")
+
+
+def measure_main_loop(measure_func, joystick, stats, stop_event, change_event, writer = None):
+    clock = pygame.time.Clock()
+    sampler = stats["sampler"]
+    # the deadlines pace the samples of a sampler policy
+    min_interval_ms = 1 if sampler else SAMPLING_RATE
+    deadline = time.monotonic()
+
+    last_ms = pygame.time.get_ticks()
+
+    while not stop_event.is_set() and not change_event.is_set():
+        quit_event = pygame.event.get(pygame.QUIT)
+        if quit_event:
+            stop_event.set()
+            return
+        
+        joystick = handle_device_events(joystick, stats)
+        handle_zoom_events(stats)
+
+
+        # Get the time from pygame.init() called in ms.
+        cur_ms = pygame.time.get_ticks()
+
+        if stats["connected"] and cur_ms - last_ms >= min_interval_ms:
+            measure_func(joystick, stats, cur_ms, writer)
+            # Publishes new samples to the visualize thread
+            stats["new_data"].set()
+            # Calculating FPS
+            stats["fps"] = 1000 / (cur_ms - last_ms)
+            last_ms = cur_ms
+        
+        # Wait until next measure frame
+        if sampler:
+            deadline = wait_next_deadline(sampler, deadline)
+        else:
+            clock.tick(MEASURE_FRAME_RATE)
+
+def measure(measure_func, joystick, stats, stop_event, change_event, record = False):
+
+    sampler = stats["sampler"]
+    if sampler:
+        apply_sampler_policy(sampler)
+        print_sampler_policy(sampler)
+
+    if (record):
+        dt = datetime.datetime.now()
+        filename = dt.strftime("%Y%m%d_%H%M%S_%f.csv")
+        with open(meta_file_name(filename), 'w') as fd:
+            json.dump(recording_meta(joystick, dt, stats["record_raw"], stats["max"]["causal"], sampler), fd, indent=2)
+        with open(filename, 'w') as fd, open(events_file_name(filename), 'w') as events_fd:
+            writer = csv.writer(fd)
+            writer.writerow(csv_file_header(joystick, stats["record_raw"]))
+            events_writer = csv.writer(events_fd)
+            events_writer.writerow(EVENT_FIELDS)
+            measure_main_loop(measure_func, joystick, stats, stop_event, change_event, (writer, events_writer))
+    else:
+        measure_main_loop(measure_func, joystick, stats, stop_event, change_event)    
+
+    if sampler:
+        print(f"Sampler: {sampler['missed']} missed deadlines, latest wake-up {sampler['max_late_ms']:.2f}ms after its deadline")
+
+def load_recording(filename):
+    """Loads the raw inputs of a recording CSV.
+
+    Args:
+        filename (str): a recording written by the recorder mode.
+
+    Returns:
+        dict: "filename", "timestamps" (N,), "samples" (N, len(ANALYZE_AXES)) and "buttons" (N, number of buttons).
+              "raw" (N, len(ANALYZE_AXES)) int16, recovered by uncalibrate_samples() unless "is_raw", recorded with --raw.
+    """
+
+    with open(filename, newline='') as fd:
+        header = next(csv.reader(fd))
+
+    raw_columns = [f'{key}.raw' for key in ANALYZE_AXES]
+    is_raw = raw_columns[0] in header
+    axis_columns = [header.index(name) for name in (raw_columns if is_raw else ANALYZE_AXES)]
+    button_columns = [idx for idx, name in enumerate(header) if name.startswith("btn.")]
+    columns = [header.index("ms_from_init")] + axis_columns + button_columns
+    data = np.loadtxt(filename, delimiter=",", skiprows=1, usecols=columns, ndmin=2)
+
+    samples = data[:, 1:1 + len(ANALYZE_AXES)]
+    if is_raw:
+        raw = samples.astype(np.int16)
+        samples = calibrate_raw_axes(raw)
+    else:
+        raw = uncalibrate_samples(samples)
+
+    return {
+        "filename": filename,
+        "timestamps": data[:, 0].astype(np.int64),
+        "samples": samples,
+        "raw": raw,
+        "is_raw": is_raw,
+        "buttons": data[:, 1 + len(ANALYZE_AXES):].astype(np.int8),
+    }
+
+
+def replay_analysis(timestamps, raw, thresholds = None, causal = False):
+    """Runs the analyzer over recorded samples, keeping the MAX_MS window as the live loop does.
+
+    Args:
+        timestamps (np.ndarray): ms_from_init of the samples.
+        raw (np.ndarray): (N, len(ANALYZE_AXES)) raw int16 values.
+        thresholds (dict): analyze thresholds. default_thresholds() if None.
+        causal (bool): runs the causal analyzer.
+
+    Returns:
+        list[tuple]: analyze events of EVENT_FIELDS.
+    """
+
+    stats = {"timestamps": [], "raw": array.array('h'), "max": init_analyzed_stats(thresholds, causal)}
+    analyzed_stats = stats["max"]
+
+    for cur_ms, row in zip(timestamps.tolist(), raw.astype(np.int16)):
+        # same window as delete_lines
+        while len(stats["timestamps"]) > 1 and cur_ms - stats["timestamps"][1] > MAX_MS:
+            del stats["timestamps"][0]
+            del stats["raw"][:len(ANALYZE_AXES)]
+            for key in ANALYZE_KEYS:
+                del analyzed_stats[key][0]
+            del analyzed_stats[ANALYZE_COLOR_KEY][0]
+        stats["timestamps"].append(cur_ms)
+        stats["raw"].frombytes(row.tobytes())
+        analyze_stats(stats)
+
+    return analyzed_stats["events"]
+
+
+def load_events(filename):
+    """Loads the analyze events recorded next to a recording.
+
+    Returns:
+        list[tuple]: analyze events of EVENT_FIELDS.
+    """
+
+    with open(events_file_name(filename), newline='') as fd:
+        reader = csv.reader(fd)
+        next(reader)
+        return [(int(ms), event, axis, int(begin_ms), int(end_ms), float(sums), float(speed))
+                for ms, event, axis, begin_ms, end_ms, sums, speed in filter(None, reader)]
+
+
+def events_table(events):
+    """Converts analyze events into a dict of EVENT_FIELDS arrays, with "axis" as indexes of ANALYZE_AXES (-1 for none)."""
+
+    columns = list(zip(*events)) if events else [()] * len(EVENT_FIELDS)
+    return {
+        "ms": np.array(columns[0], dtype=np.int64),
+        "event": np.array(columns[1], dtype=str),
+        "axis": np.array([ANALYZE_AXIS_INDEX.get(axis, -1) for axis in columns[2]], dtype=np.int64),
+        "begin_ms": np.array(columns[3], dtype=np.int64),
+        "end_ms": np.array(columns[4], dtype=np.int64),
+        "sums": np.array(columns[5], dtype=np.float64),
+        "speed": np.array(columns[6], dtype=np.float64),
+    }
+
+
+def movement_segments(events, last_ms, begin_event = EVENT_BIG_MVMT_BEGIN):
+    """Pairs begin_event (big_mvmt_begin or turn) events with the following big_mvmt_end events.
+
+    Args:
+        events (dict): events_table().
+        last_ms (int): end of a movement still going on at the end of the recording.
+
+    Returns:
+        list[tuple[np.ndarray, np.ndarray]]: (begin_ms, end_ms) arrays for each axis.
+    """
+
+    segments = []
+    for axis in range(len(ANALYZE_AXES)):
+        on_axis = events["axis"] == axis
+        begins = events["ms"][on_axis & (events["event"] == begin_event)]
+        ends = events["ms"][on_axis & (events["event"] == EVENT_BIG_MVMT_END)]
+        if len(begins) and len(ends):
+            # a turn ends with its big movement
+            ends = ends[np.searchsorted(ends, begins, side="right").clip(max=len(ends) - 1)]
+            ends = np.where(ends > begins, ends, last_ms)
+        else:
+            ends = np.full(len(begins), last_ms, dtype=np.int64)
+        segments.append((begins, ends))
+    return segments
+
+
+def analysis_columns(timestamps, samples, events):
+    """Per-sample view of the analysis, in ANALYZE_COLUMN_KEYS as recorded by older versions.
+
+    The moving averages and their diffs are recalculated from samples and the rest is expanded from events.
+    Events after the last sample are left out: the recorder writes them at once, while the samples
+    still buffered when it stops never reach the CSV.
+
+    Args:
+        timestamps (np.ndarray): (N,) ms of the samples.
+        samples (np.ndarray): (N, len(ANALYZE_AXES)) samples.
+        events (dict): events_table() of the samples.
+
+    Returns:
+        dict: ANALYZE_COLUMN_KEYS -> (N, len(ANALYZE_AXES)) arrays.
+    """
+
+    count = len(timestamps)
+    columns = {key: np.zeros(samples.shape, dtype=np.int64 if key in ANALYZE_INT_KEYS else np.float64) for key in ANALYZE_COLUMN_KEYS}
+    if count < 12:
+        return columns
+
+    # analyze_stats analyzes i - 5 from the 12th sample on
+    analyzed = np.zeros((count, 1), dtype=bool)
+    analyzed[6:count - 5] = True
+
+    columns["mvmt_avg"][6:count - 5] = np.lib.stride_tricks.sliding_window_view(samples, 10, axis=0)[1:count - 10].sum(axis=-1) / 11
+    for key, source, shift in [("diff_1", "mvmt_avg", 1), ("diff_5", "mvmt_avg", 5), ("diff_1_of_5", "diff_5", 1), ("diff_1_of_1_of_5", "diff_1_of_5", 1)]:
+        columns[key][shift:] = columns[source][shift:] - columns[source][:-shift]
+        columns[key] *= analyzed
+    columns["direction"][:] = np.sign(columns["diff_1"])
+
+    # a movement going on at the end lasts up to the last sample analyzed,
+    # the last ANALYZE_DELAY ones unless the analyzer went on past the recorded samples
+    in_recording = events["ms"] <= timestamps[-1]
+    last_ms = timestamps[-1] + 1 if not in_recording.all() else timestamps[count - ANALYZE_DELAY]
+    events = {field: values[in_recording] for field, values in events.items()}
+
+    rows = np.searchsorted(timestamps, events["ms"])
+    for key, begin_event in [("big_mvmt", EVENT_BIG_MVMT_BEGIN), ("turned", EVENT_TURN)]:
+        for axis, (begins, ends) in enumerate(movement_segments(events, last_ms, begin_event)):
+            flags = np.zeros(count + 1, dtype=np.int64)
+            np.add.at(flags, np.searchsorted(timestamps, begins), 1)
+            np.add.at(flags, np.searchsorted(timestamps, ends), -1)
+            columns[key][:, axis] = np.cumsum(flags[:-1])
+
+    is_begin = events["event"] == EVENT_BIG_MVMT_BEGIN
+    columns["begin_ms"][rows[is_begin], events["axis"][is_begin]] = events["begin_ms"][is_begin]
+    is_speed = events["event"] == EVENT_SPEED
+    for key, field in [("begin_ms", "begin_ms"), ("end", "end_ms"), ("sums", "sums"), ("speed", "speed")]:
+        columns[key][rows[is_speed], events["axis"][is_speed]] = events[field][is_speed]
+
+    return columns
+
+
+def columns_file_name(filename):
+    """Returns the file name of the per-sample analysis columns of a recording."""
+    return os.path.splitext(filename)[0] + ".columns.csv"
+
+
+def columns_main(args):
+    '''
+        ANALYSIS COLUMNS
+    '''
+
+    recording = load_recording(args.columns)
+    columns = analysis_columns(recording["timestamps"], recording["samples"], recording_events(recording, args.cache))
+    out = args.out or columns_file_name(args.columns)
+
+    # the layout of the recordings of older versions
+    header = ['ms_from_init'] + ANALYZE_AXES + [f'btn.{i}' for i in range(recording["buttons"].shape[1])]
+    header += [f'{key}.{key2}' for key in ["lx", "ly", "rx", "ry"] for key2 in ANALYZE_COLUMN_KEYS]
+    key_columns = [columns[key2][:, ANALYZE_AXIS_INDEX[key]].tolist() for key in ["lx", "ly", "rx", "ry"] for key2 in ANALYZE_COLUMN_KEYS]
+    with open(out, 'w', newline='') as fd:
+        writer = csv.writer(fd)
+        writer.writerow(header)
+        writer.writerows(zip(recording["timestamps"].tolist(), *recording["samples"].T.tolist(), *recording["buttons"].T.tolist(), *key_columns))
+    print(f"{Style.BRIGHT}Analysis columns of {len(recording['timestamps'])} samples: {out}{Style.RESET_ALL}")
+
+
+def count_overlapping(begins, ends, ref_begins, ref_ends):
+    """Counts segments overlapping at least one of the reference segments."""
+
+    if len(begins) == 0 or len(ref_begins) == 0:
+        return 0
+
+    order = np.argsort(ref_begins, kind="stable")
+    ref_begins = ref_begins[order]
+    max_ref_ends = np.maximum.accumulate(ref_ends[order])
+    last_ref = np.searchsorted(ref_begins, ends, side="left") - 1
+    return int(np.count_nonzero((last_ref >= 0) & (max_ref_ends[np.maximum(last_ref, 0)] > begins)))
+
+
+def segments_agreement(segments, ref_segments):
+    """Calculates the agreement of detected segments with reference segments by overlap.
+
+    Args:
+        segments (dict): recording basename -> movement_segments().
+        ref_segments (dict): recording basename -> movement_segments() or labels.
+
+    Returns:
+        tuple[float, float, float]: precision, recall and F1 score.
+    """
+
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    detected = matched = refs = ref_matched = 0
+    for name, axes_segments in segments.items():
+        ref_axes_segments = ref_segments.get(name, [empty] * len(axes_segments))
+        for (begins, ends), (ref_begins, ref_ends) in zip(axes_segments, ref_axes_segments):
+            detected += len(begins)
+            refs += len(ref_begins)
+            matched += count_overlapping(begins, ends, ref_begins, ref_ends)
+            ref_matched += count_overlapping(ref_begins, ref_ends, begins, ends)
+
+    precision = matched / detected if detected else 1.0
+    recall = ref_matched / refs if refs else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    return precision, recall, f1
+
+
+# ANALYSIS CACHE of results derived from recordings, content addressed
+ANALYSIS_CACHE_DIR = "gpsa_cache"
+ANALYSIS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+recording_hashes = {}
+
+def recording_hash(filename):
+    """sha256 of a recording and its events file, memoized per recording_signature() in the process."""
+
+    signature = recording_signature(filename)
+    if recording_hashes.get(filename, (None,))[0] == signature:
+        return recording_hashes[filename][1]
+
+    digest = hashlib.sha256()
+    for name in (filename, events_file_name(filename)):
+        if os.path.exists(name):
+            with open(name, 'rb') as fd:
+                for block in iter(lambda: fd.read(1024 * 1024), b''):
+                    digest.update(block)
+        # bytes moved between the files change the hash
+        digest.update(b'\0')
+
+    recording_hashes[filename] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def analysis_cache_key(filename, kind, params):
+    text = json.dumps([recording_hash(filename), kind, ANALYZE_VERSION, params], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def load_cached_analysis(cache_dir, key):
+    """Returns the arrays of a cache entry and marks it as used last, None on a miss."""
+
+    path = os.path.join(cache_dir, key + ".npz")
+    try:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        os.utime(path)
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+    return arrays
+
+
+def store_cached_analysis(cache_dir, key, arrays, max_bytes = ANALYSIS_CACHE_MAX_BYTES):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, key + ".npz")
+
+    # renamed once written, other processes never load a partial entry
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as fd:
+        np.savez_compressed(fd, **arrays)
+    os.replace(temp_path, path)
+
+    evict_analysis_cache(cache_dir, max_bytes)
+
+
+def evict_analysis_cache(cache_dir, max_bytes = ANALYSIS_CACHE_MAX_BYTES):
+    """Removes the least recently used entries until the cache takes at most max_bytes."""
+
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".npz"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    total = sum(size for mtime_ns, size, path in entries)
+    for mtime_ns, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # evicted by another process
+            pass
+        total -= size
+
+
+def cached_analysis(filename, kind, params, compute, cache_dir = ANALYSIS_CACHE_DIR):
+    """Returns results derived from a recording, from the analysis cache when it has them.
+
+    Entries are keyed by the content of the recording and its events file, ANALYZE_VERSION, kind and params,
+    so a changed recording or analyzer never hits an old entry.
+
+    Args:
+        filename (str): a recording.
+        kind (str): what compute derives.
+        params (dict): JSON serializable values compute depends on, like the thresholds.
+        compute (function): returns the results as a dict of np.ndarray, called on a miss.
+        cache_dir (str): directory of the cache. None to always compute.
+
+    Returns:
+        dict: the results.
+    """
+
+    if cache_dir is None:
+        return compute()
+
+    key = analysis_cache_key(filename, kind, params)
+    arrays = load_cached_analysis(cache_dir, key)
+    if arrays is None:
+        arrays = compute()
+        store_cached_analysis(cache_dir, key, arrays)
+    return arrays
+
+
+def pack_events(events, prefix = ""):
+    """Packs an events_table() into compact arrays for the analysis cache, events as indexes of EVENT_NAMES."""
+
+    codes = np.zeros(len(events["event"]), dtype=np.uint8)
+    for code, name in enumerate(EVENT_NAMES):
+        codes[events["event"] == name] = code
+
+    return {
+        f"{prefix}ms": events["ms"],
+        f"{prefix}event": codes,
+        f"{prefix}axis": events["axis"].astype(np.int8),
+        f"{prefix}begin_ms": events["begin_ms"],
+        f"{prefix}end_ms": events["end_ms"],
+        f"{prefix}sums": events["sums"],
+        f"{prefix}speed": events["speed"],
+    }
+
+
+def unpack_events(arrays, prefix = ""):
+    """Unpacks pack_events() into an events_table()."""
+
+    return {
+        "ms": arrays[f"{prefix}ms"],
+        "event": np.array(EVENT_NAMES)[arrays[f"{prefix}event"]],
+        "axis": arrays[f"{prefix}axis"].astype(np.int64),
+        "begin_ms": arrays[f"{prefix}begin_ms"],
+        "end_ms": arrays[f"{prefix}end_ms"],
+        "sums": arrays[f"{prefix}sums"],
+        "speed": arrays[f"{prefix}speed"],
+    }
+
+
+def table_events(events):
+    """Converts an events_table() back into analyze events of EVENT_FIELDS."""
+
+    axes = [ANALYZE_AXES[axis] if axis >= 0 else "" for axis in events["axis"].tolist()]
+    return list(zip(events["ms"].tolist(), events["event"].tolist(), axes, events["begin_ms"].tolist(),
+                    events["end_ms"].tolist(), events["sums"].tolist(), events["speed"].tolist()))
+
+
+def replayed_events(recording, thresholds = None, causal = False, cache_dir = ANALYSIS_CACHE_DIR):
+    """events_table() of replay_analysis() over a recording, through the analysis cache."""
+
+    def compute():
+        return pack_events(events_table(replay_analysis(recording["timestamps"], recording["raw"], thresholds, causal)))
+
+    params = {"thresholds": thresholds or default_thresholds(), "causal": causal}
+    return unpack_events(cached_analysis(recording["filename"], "events", params, compute, cache_dir))
+
+
+def recording_events(recording, cache_dir = ANALYSIS_CACHE_DIR):
+    """events_table() of the events recorded with a recording, replayed for the ones recorded before the events files."""
+
+    if os.path.exists(events_file_name(recording["filename"])):
+        return events_table(load_events(recording["filename"]))
+    return replayed_events(recording, cache_dir=cache_dir)
+
+
+def causal_agreement(recordings, thresholds = None, cache_dir = ANALYSIS_CACHE_DIR):
+    """Compares the causal analyzer with the centered one over recordings.
+
+    Args:
+        recordings (list[dict]): load_recording().
+        thresholds (dict): analyze thresholds of both. default_thresholds() if None.
+        cache_dir (str): analysis cache of the replayed events. None to always replay.
+
+    Returns:
+        dict: "precision", "recall" and "f1" of the causal big movements against the centered ones,
+              "latency_ms" how much earlier the causal analyzer reports the matched movement begins (median),
+              "speed_error" the median relative difference of the matched speeds,
+              and "missed_ends" of "turns" causal turns whose movement end was never found, so no speed was emitted.
+    """
+
+    segments = {}
+    ref_segments = {}
+    earlier_ms = [np.zeros(0)]
+    speed_errors = [np.zeros(0)]
+    turn_count = 0
+    missed_ends = 0
+    for recording in recordings:
+        timestamps = recording["timestamps"]
+        name = os.path.basename(recording["filename"])
+        causal = replayed_events(recording, thresholds, True, cache_dir)
+        centered = replayed_events(recording, thresholds, cache_dir=cache_dir)
+        segments[name] = movement_segments(causal, timestamps[-1])
+        ref_segments[name] = movement_segments(centered, timestamps[-1])
+
+        for axis in range(len(ANALYZE_AXES)):
+            # the centered analyzer reports a sample ANALYZE_DELAY samples after it
+            is_begin = (centered["event"] == EVENT_BIG_MVMT_BEGIN) & (centered["axis"] == axis)
+            begin_ms = centered["ms"][is_begin]
+            reported_idxs = np.minimum(np.searchsorted(timestamps, begin_ms) + ANALYZE_DELAY, len(timestamps) - 1)
+            causal_begin_ms = causal["ms"][(causal["event"] == EVENT_BIG_MVMT_BEGIN) & (causal["axis"] == axis)]
+            if len(begin_ms) and len(causal_begin_ms):
+                nearest = nearest_values(causal_begin_ms, begin_ms)
+                matched = np.abs(nearest - begin_ms) <= MAX_MS
+                earlier_ms.append((timestamps[reported_idxs] - nearest)[matched])
+
+            is_speed = (centered["event"] == EVENT_SPEED) & (centered["axis"] == axis) & (centered["speed"] > 0)
+            is_causal_speed = (causal["event"] == EVENT_SPEED) & (causal["axis"] == axis) & (causal["speed"] > 0)
+            # a turned movement emits its speed when it finishes
+            turns = int(np.count_nonzero((causal["event"] == EVENT_TURN) & (causal["axis"] == axis)))
+            turn_count += turns
+            missed_ends += max(turns - int(np.count_nonzero((causal["event"] == EVENT_SPEED) & (causal["axis"] == axis))), 0)
+            if is_speed.any() and is_causal_speed.any():
+                order = np.argsort(causal["begin_ms"][is_causal_speed])
+                causal_begins = causal["begin_ms"][is_causal_speed][order]
+                causal_speeds = causal["speed"][is_causal_speed][order]
+                nearest_idxs = nearest_indexes(causal_begins, centered["begin_ms"][is_speed])
+                matched = np.abs(causal_begins[nearest_idxs] - centered["begin_ms"][is_speed]) <= MAX_MS
+                speeds = centered["speed"][is_speed]
+                speed_errors.append((np.abs(causal_speeds[nearest_idxs] - speeds) / speeds)[matched])
+
+    precision, recall, f1 = segments_agreement(segments, ref_segments)
+    earlier_ms = np.concatenate(earlier_ms)
+    speed_errors = np.concatenate(speed_errors)
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "latency_ms": float(np.median(earlier_ms)) if len(earlier_ms) else 0.0,
+        "speed_error": float(np.median(speed_errors)) if len(speed_errors) else 0.0,
+        "turns": turn_count,
+        "missed_ends": missed_ends,
+    }
+
+
+def nearest_indexes(sorted_values, values):
+    """Returns the indexes of the nearest sorted_values of values."""
+
+    right = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    left = np.maximum(right - 1, 0)
+    return np.where(np.abs(sorted_values[left] - values) <= np.abs(sorted_values[right] - values), left, right)
+
+
+def nearest_values(sorted_values, values):
+    return sorted_values[nearest_indexes(sorted_values, values)]
+
+
+def causal_main(args):
+    '''
+        CAUSAL ANALYZER CHECK
+    '''
+
+    result = causal_agreement([load_recording(filename) for filename in args.check_causal], cache_dir=args.cache)
+    print(f"Causal against centered big movements: precision {result['precision']:.3f}, recall {result['recall']:.3f}, F1 {result['f1']:.3f}")
+    print(f"Movement begins reported {result['latency_ms']:.0f}ms earlier, speeds differ by {result['speed_error'] * 100:.1f}% (medians)")
+    print(f"Causal movement ends missed: {result['missed_ends']} of {result['turns']} turns")
+
+
+def load_labels(filename):
+    """Loads labeled movement segments, a CSV with file, axis, begin_ms and end_ms columns.
+
+    Returns:
+        dict: recording basename -> (begin_ms, end_ms) arrays for each axis.
+    """
+
+    labels = {}
+    with open(filename, newline='') as fd:
+        for row in csv.DictReader(fd):
+            axes_labels = labels.setdefault(os.path.basename(row["file"]), [([], []) for _ in ANALYZE_AXES])
+            begins, ends = axes_labels[ANALYZE_AXIS_INDEX[row["axis"]]]
+            begins.append(int(float(row["begin_ms"])))
+            ends.append(int(float(row["end_ms"])))
+
+    return {name: [(np.array(begins, dtype=np.int64), np.array(ends, dtype=np.int64)) for begins, ends in axes_labels]
+            for name, axes_labels in labels.items()}
+
+
+SWEEP_DEFAULT_SCALES = [0.5, 0.75, 1, 1.25, 1.5]
+
+# recordings loaded once per worker process of the threshold sweep
+sweep_recordings = []
+
+def threshold_grid(grid_args = None):
+    """Expands --grid KEY=V1,V2,... arguments into threshold combinations.
+
+    Thresholds not in grid_args keep their default value. Without grid_args, every threshold
+    is scaled by SWEEP_DEFAULT_SCALES.
+    """
+
+    thresholds = default_thresholds()
+    if grid_args:
+        values = {key: [value] for key, value in thresholds.items()}
+    else:
+        values = {key: [value * scale for scale in SWEEP_DEFAULT_SCALES] for key, value in thresholds.items()}
+
+    for grid_arg in grid_args or []:
+        key, _, key_values = grid_arg.partition("=")
+        if key not in thresholds:
+            raise ValueError(f"Unknown threshold '{key}'. Use one of {', '.join(thresholds)}.")
+        values[key] = [float(value) for value in key_values.split(",")]
+
+    return [dict(zip(values, combination)) for combination in itertools.product(*values.values())]
+
+
+def init_sweep_worker(filenames, cache_dir):
+    global sweep_recordings, sweep_cache_dir
+    sweep_recordings = [load_recording(filename) for filename in filenames]
+    sweep_cache_dir = cache_dir
+
+
+def sweep_thresholds(thresholds):
+    """Runs the analyzer with thresholds over the recordings of the worker process."""
+
+    movements = np.zeros(len(ANALYZE_AXES), dtype=np.int64)
+    turns = np.zeros(len(ANALYZE_AXES), dtype=np.int64)
+    speeds = [np.zeros(0)]
+    segments = {}
+    for recording in sweep_recordings:
+        events = replayed_events(recording, thresholds, cache_dir=sweep_cache_dir)
+        recording_segments = movement_segments(events, recording["timestamps"][-1])
+        movements += [len(begins) for begins, ends in recording_segments]
+        turns += np.bincount(events["axis"][events["event"] == EVENT_TURN], minlength=len(ANALYZE_AXES))
+        speeds.append(events["speed"][(events["event"] == EVENT_SPEED) & (events["speed"] != 0)])
+        segments[os.path.basename(recording["filename"])] = recording_segments
+
+    return {"thresholds": thresholds, "movements": movements, "turns": turns, "speeds": np.concatenate(speeds), "segments": segments}
+
+
+def threshold_sweep(filenames, grid, labels = None, jobs = None, cache_dir = ANALYSIS_CACHE_DIR):
+    """Evaluates threshold combinations over recordings with a process pool.
+
+    Args:
+        filenames (list[str]): recordings.
+        grid (list[dict]): threshold combinations, see threshold_grid().
+        labels (dict): labeled segments, see load_labels().
+        jobs (int): number of worker processes. CPU count if None.
+        cache_dir (str): analysis cache of the replayed events. None to always replay.
+
+    Returns:
+        list[dict]: report rows of detection counts, speed distributions and agreement scores.
+                    "agreement" is the F1 score against the default thresholds.
+    """
+
+    baseline = default_thresholds()
+    combinations = grid if baseline in grid else grid + [baseline]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_sweep_worker, initargs=(filenames, cache_dir)) as executor:
+        results = list(executor.map(sweep_thresholds, combinations))
+    baseline_segments = results[combinations.index(baseline)]["segments"]
+
+    report = []
+    for result in results:
+        speeds = result["speeds"]
+        row = dict(result["thresholds"])
+        row["movements"] = int(result["movements"].sum())
+        for key, count in zip(ANALYZE_AXES, result["movements"]):
+            row[f"movements.{key}"] = int(count)
+        row["turns"] = int(result["turns"].sum())
+        row["speeds"] = len(speeds)
+        row["speed_mean"] = float(speeds.mean()) if len(speeds) else 0.0
+        row["speed_p50"], row["speed_p90"], row["speed_max"] = np.percentile(speeds, [50, 90, 100]).tolist() if len(speeds) else (0.0, 0.0, 0.0)
+        row["agreement"] = segments_agreement(result["segments"], baseline_segments)[2]
+        if labels is not None:
+            row["label_precision"], row["label_recall"], row["label_f1"] = segments_agreement(result["segments"], labels)
+        report.append(row)
+
+    if labels is not None:
+        report.sort(key=lambda row: row["label_f1"], reverse=True)
+    return report
+
+
+def sweep_main(args):
+    '''
+        THRESHOLD SWEEP
+    '''
+
+    grid = threshold_grid(args.grid)
+    labels = load_labels(args.labels) if args.labels else None
+    print(f"Sweeping {len(grid)} threshold combinations over {len(args.sweep)} recordings...")
+    report = threshold_sweep(args.sweep, grid, labels, args.jobs, args.cache)
+
+    filename = args.out or datetime.datetime.now().strftime("sweep_%Y%m%d_%H%M%S.csv")
+    with open(filename, 'w', newline='') as fd:
+        writer = csv.DictWriter(fd, fieldnames=list(report[0]))
+        writer.writeheader()
+        writer.writerows(report)
+
+    for row in report[:10]:
+        thresholds = ", ".join(f"{key}={row[key]:g}" for key in default_thresholds())
+        score = f", label F1 {row['label_f1']:.3f}" if labels is not None else ""
+        print(f"{thresholds}: {row['movements']} movements, {row['turns']} turns, speed p50 {row['speed_p50']:.5f}/ms, agreement {row['agreement']:.3f}{score}")
+    print(f"\n{Style.BRIGHT}Report: {filename}{Style.RESET_ALL}")
+
+
+REPORT_POINTS = 4000
+REPORT_HIST_BINS = 40
+
+def lttb(xs, ys, n_out):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Args:
+        xs (np.ndarray): x values, sorted.
+        ys (np.ndarray): y values.
+        n_out (int): number of points to keep.
+
+    Returns:
+        np.ndarray: indexes of the kept points, including the first and the last one.
+    """
+
+    count = len(xs)
+    if n_out >= count or n_out < 3:
+        return np.arange(count)
+
+    # n_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, count - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else count
+        avg_x = xs[end:next_end].mean()
+        avg_y = ys[end:next_end].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[start:end] - ys[a]) - (xs[a] - xs[start:end]) * (avg_y - ys[a]))
+        a = start + area.argmax()
+        selected[i + 1] = a
+    return selected
+
+
+def button_segments(timestamps, buttons):
+    """Returns (begin_ms, end_ms) arrays of the presses of each button."""
+
+    edges = np.diff(np.pad(buttons.astype(np.int8), ((1, 1), (0, 0))), axis=0)
+    last = len(timestamps) - 1
+    segments = []
+    for button in range(buttons.shape[1]):
+        begins = np.flatnonzero(edges[:, button] == 1)
+        ends = np.flatnonzero(edges[:, button] == -1)
+        segments.append((timestamps[begins], timestamps[np.minimum(ends, last)]))
+    return segments
+
+
+def session_report_data(recording, events, points = REPORT_POINTS):
+    """Summarizes a recording for the HTML session report.
+
+    Args:
+        recording (dict): load_recording().
+        events (dict): events_table() of its analyze events.
+        points (int): number of points of each axis plot, downsampled by lttb().
+
+    Returns:
+        dict: JSON serializable report data. Times are ms from the first sample.
+    """
+
+    timestamps = recording["timestamps"]
+    t0 = int(timestamps[0])
+    ts = timestamps - t0
+    last_ms = int(timestamps[-1])
+    move_segments = movement_segments(events, last_ms)
+    turn_segments = movement_segments(events, last_ms, EVENT_TURN)
+    is_speed = (events["event"] == EVENT_SPEED) & (events["speed"] > 0)
+
+    def to_pairs(segments):
+        begins, ends = segments
+        return np.column_stack([begins - t0, ends - t0]).tolist()
+
+    axes = []
+    for axis, key in enumerate(ANALYZE_AXES):
+        ys = recording["samples"][:, axis]
+        kept = lttb(ts, ys, points)
+        speeds = events["speed"][is_speed & (events["axis"] == axis)]
+        counts, bins = np.histogram(speeds, REPORT_HIST_BINS) if len(speeds) else (np.zeros(0), np.zeros(0))
+        axes.append({
+            "name": key,
+            "t": ts[kept].tolist(),
+            "y": np.round(ys[kept], 5).tolist(),
+            "moves": to_pairs(move_segments[axis]),
+            "turns": to_pairs(turn_segments[axis]),
+            "speeds": {"count": len(speeds), "p50": float(np.median(speeds)) if len(speeds) else 0, "max": float(speeds.max()) if len(speeds) else 0,
+                       "bins": bins.tolist(), "counts": counts.tolist()},
+        })
+
+    is_gap = events["event"] == EVENT_GAP
+    gaps = np.column_stack([events["begin_ms"][is_gap] - t0, events["end_ms"][is_gap] - t0]).tolist()
+
+    button_names = {idx: name for name, idx in BUTTONS_MAP.items()}
+    buttons = [{"name": button_names.get(button, f'btn.{button}'), "segs": to_pairs(segments)}
+               for button, segments in enumerate(button_segments(timestamps, recording["buttons"]))]
+
+    return {
+        "file": os.path.basename(recording["filename"]),
+        "version": version,
+        "duration": int(ts[-1]),
+        "samples": len(ts),
+        "interval": float(np.diff(ts).mean()) if len(ts) > 1 else 0,
+        "axes": axes,
+        "buttons": buttons,
+        "gaps": gaps,
+    }
+
+
+REPORT_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>GPSA Report</title>
+<style>
+body{background:#1e1e1e;color:#ddd;font:13px sans-serif;margin:16px}
+h1{font-size:18px;margin:0 0 4px}
+.meta,.hint{color:#999;margin-bottom:8px}
+canvas{display:block;width:100%;background:#2a2a2a;margin-bottom:6px}
+#hists{display:flex;flex-wrap:wrap;gap:8px}
+#hists div{flex:1 1 300px}
+#tip{position:fixed;pointer-events:none;background:#000c;padding:2px 6px;display:none}
+</style></head><body>
+<h1>GPSA: Game Pad Stats Analyzer</h1>
+<div class="meta" id="meta"></div>
+<div class="hint">Wheel: zoom, drag: pan, double click: reset. Blue: big movement, green: turn, gray: controller away.</div>
+<div id="plots"></div>
+<h1>Speeds</h1><div id="hists"></div>
+<div id="tip"></div>
+<script>
+const D=/*DATA*/;
+const fmt=ms=>{const s=ms/1000;return s>=60?Math.floor(s/60)+':'+(s%60).toFixed(1).padStart(4,'0'):s.toFixed(2)+'s'};
+document.getElementById('meta').textContent=`${D.file}  ${fmt(D.duration)}  ${D.samples} samples (every ${D.interval.toFixed(2)}ms)  GPSA v${D.version}`;
+let v0=0,v1=Math.max(D.duration,1);
+const plots=document.getElementById('plots'),tip=document.getElementById('tip'),rows=[];
+function canvas(parent,h){const c=document.createElement('canvas');c.height=h;parent.appendChild(c);return c}
+D.axes.forEach(a=>rows.push({c:canvas(plots,90),a}));
+const bc=canvas(plots,14*D.buttons.length+4);
+const X=(c,t)=>(t-v0)/(v1-v0)*c.width;
+function lower(arr,t){let lo=0,hi=arr.length;while(lo<hi){const m=(lo+hi)>>1;arr[m]<t?lo=m+1:hi=m}return lo}
+function bands(g,c,segs,color,y,h){g.fillStyle=color;for(const[b,e]of segs){if(e<v0||b>v1)continue;const x=X(c,b);g.fillRect(x,y,Math.max(X(c,e)-x,1),h)}}
+function draw(){
+ for(const{c,a}of rows){
+  c.width=c.clientWidth;const g=c.getContext('2d'),h=c.height;g.clearRect(0,0,c.width,h);
+  bands(g,c,D.gaps,'#555',0,h);bands(g,c,a.moves,'#33408a',0,h);bands(g,c,a.turns,'#2f7a3a',0,h);
+  g.strokeStyle='#555';g.beginPath();g.moveTo(0,h/2);g.lineTo(c.width,h/2);g.stroke();
+  g.strokeStyle='#ddd';g.beginPath();
+  const i0=Math.max(lower(a.t,v0)-1,0),i1=Math.min(lower(a.t,v1)+1,a.t.length);
+  for(let i=i0;i<i1;i++){const x=X(c,a.t[i]),y=h/2-a.y[i]*(h/2-2);i==i0?g.moveTo(x,y):g.lineTo(x,y)}
+  g.stroke();g.fillStyle='#fff';g.fillText(a.name,4,12);
+ }
+ bc.width=bc.clientWidth;const g=bc.getContext('2d');g.clearRect(0,0,bc.width,bc.height);
+ D.buttons.forEach((b,i)=>{bands(g,bc,b.segs,'#c08030',2+i*14,11);g.fillStyle='#fff';g.fillText(b.name,4,12+i*14)});
+ g.fillStyle='#999';g.fillText(fmt(v0),bc.width-200,bc.height-2);g.fillText(fmt(v1),bc.width-100,bc.height-2);
+}
+function zoom(c,e){e.preventDefault();const t=v0+e.offsetX/c.width*(v1-v0),k=e.deltaY>0?1.25:0.8;
+ v0=Math.max(0,t-(t-v0)*k);v1=Math.min(D.duration,t+(v1-t)*k);if(v1-v0<20)v1=v0+20;draw()}
+let drag=null;
+for(const c of[...rows.map(r=>r.c),bc]){
+ c.addEventListener('wheel',e=>zoom(c,e),{passive:false});
+ c.addEventListener('mousedown',e=>drag={x:e.clientX,v0,v1,w:c.width});
+ c.addEventListener('dblclick',()=>{v0=0;v1=Math.max(D.duration,1);draw()});
+}
+rows.forEach(({c,a})=>c.addEventListener('mousemove',e=>{
+ const t=v0+e.offsetX/c.width*(v1-v0),i=Math.min(lower(a.t,t),a.t.length-1);
+ tip.style.display='block';tip.style.left=e.clientX+12+'px';tip.style.top=e.clientY+12+'px';
+ tip.textContent=`${a.name} ${fmt(a.t[i])} ${a.y[i].toFixed(5)}`}));
+document.addEventListener('mouseout',()=>tip.style.display='none');
+window.addEventListener('mousemove',e=>{if(!drag)return;const d=(e.clientX-drag.x)/drag.w*(drag.v1-drag.v0);
+ const w=drag.v1-drag.v0;v0=Math.min(Math.max(0,drag.v0-d),D.duration-w);v1=v0+w;draw()});
+window.addEventListener('mouseup',()=>drag=null);
+window.addEventListener('resize',draw);
+const hists=document.getElementById('hists');
+D.axes.forEach(a=>{const d=document.createElement('div');hists.appendChild(d);
+ const s=a.speeds;d.append(`${a.name}: ${s.count} speeds, median ${s.p50.toFixed(5)}/ms, max ${s.max.toFixed(5)}/ms`);
+ const c=canvas(d,80);c.width=300;const g=c.getContext('2d'),m=Math.max(...s.counts,1);g.fillStyle='#ff9696';
+ s.counts.forEach((n,i)=>{const w=c.width/s.counts.length,h=n/m*(c.height-2);g.fillRect(i*w,c.height-h,w-1,h)})});
+draw();
+</script></body></html>
+"""
+
+def session_report(filename, points = REPORT_POINTS, cache_dir = ANALYSIS_CACHE_DIR):
+    """session_report_data() of a recording, through the analysis cache as JSON bytes."""
+
+    def compute():
+        recording = load_recording(filename)
+        data = session_report_data(recording, recording_events(recording, cache_dir), points)
+        return {"json": np.frombuffer(json.dumps(data).encode(), dtype=np.uint8)}
+
+    params = {"points": points, "thresholds": default_thresholds()}
+    return json.loads(cached_analysis(filename, "report", params, compute, cache_dir)["json"].tobytes())
+
+
+def write_session_report(filename, data):
+    with open(filename, 'w', encoding='utf-8') as fd:
+        fd.write(REPORT_HTML.replace("/*DATA*/", json.dumps(data, separators=(',', ':'))))
+
+
+def report_main(args):
+    '''
+        SESSION REPORT
+    '''
+
+    filename = args.out or os.path.splitext(args.report)[0] + ".html"
+    write_session_report(filename, session_report(args.report, args.points, args.cache))
+    print(f"\n{Style.BRIGHT}Report: {filename}{Style.RESET_ALL}")
+
+
+# CATALOG of recordings
+CATALOG_FILE = "gpsa_catalog.sqlite"
+CATALOG_MINUTE_MS = 60000
+CATALOG_MINUTE_COLUMNS = ["minute", "axis", "samples", "mean", "min", "max", "movements", "turns", "max_speed"]
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    started TEXT,
+    controller TEXT,
+    guid TEXT,
+    version TEXT,
+    raw INTEGER NOT NULL,
+    buttons INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS minutes (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    minute INTEGER NOT NULL,
+    axis TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    movements INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    max_speed REAL NOT NULL,
+    PRIMARY KEY (session_id, minute, axis)
+);
+CREATE TABLE IF NOT EXISTS events (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    ms INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    axis TEXT NOT NULL,
+    begin_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    sums REAL NOT NULL,
+    speed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_controller ON sessions(controller);
+CREATE INDEX IF NOT EXISTS minutes_speed ON minutes(axis, max_speed);
+CREATE INDEX IF NOT EXISTS events_session ON events(session_id, ms);
+CREATE INDEX IF NOT EXISTS events_speed ON events(axis, event, speed);
+"""
+
+def open_catalog(filename = CATALOG_FILE):
+    con = sqlite3.connect(filename)
+    con.execute("PRAGMA foreign_keys = ON")
+    con.executescript(CATALOG_SCHEMA)
+    return con
+
+
+def find_recordings(paths):
+    """Yields the absolute paths of the recording CSVs in paths, files or directories."""
+
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(entry.path for entry in os.scandir(path) if entry.is_file() and entry.name.endswith(".csv"))
+        else:
+            candidates = [path]
+
+        for candidate in candidates:
+            # the files written next to recordings, --columns ones start with ms_from_init too
+            if candidate.endswith((events_file_name(""), columns_file_name(""))):
+                continue
+            with open(candidate, newline='') as fd:
+                if fd.readline().startswith("ms_from_init"):
+                    yield os.path.abspath(candidate)
+
+
+def recording_signature(filename):
+    """Returns (size, mtime_ns) of a recording and the files written with it, changing whenever any of them changes."""
+
+    size = os.path.getsize(filename)
+    mtime_ns = max(os.stat(name).st_mtime_ns for name in (filename, events_file_name(filename), meta_file_name(filename))
+                   if os.path.exists(name))
+    return size, mtime_ns
+
+
+def minute_aggregates(recording, events):
+    """Aggregates a recording per minute from its first sample and per axis.
+
+    Args:
+        recording (dict): load_recording().
+        events (dict): events_table() of its analyze events.
+
+    Returns:
+        list[tuple]: (minute, axis, samples, mean, min, max, movements, turns, max_speed) rows of the "minutes" table.
+    """
+
+    timestamps = recording["timestamps"]
+    samples = recording["samples"]
+    minutes = (timestamps - timestamps[0]) // CATALOG_MINUTE_MS
+    starts = np.flatnonzero(np.r_[True, np.diff(minutes) > 0])
+    keys = minutes[starts]
+    counts = np.diff(np.r_[starts, len(minutes)])
+    means = np.add.reduceat(samples, starts, axis=0) / counts[:, None]
+    mins = np.minimum.reduceat(samples, starts, axis=0)
+    maxs = np.maximum.reduceat(samples, starts, axis=0)
+
+    # rows of the events, minutes without samples (gaps) have no row
+    event_minutes = (events["ms"] - timestamps[0]) // CATALOG_MINUTE_MS
+    rows = np.minimum(np.searchsorted(keys, event_minutes), len(keys) - 1)
+    has_row = keys[rows] == event_minutes
+
+    aggregates = []
+    for axis, key in enumerate(ANALYZE_AXES):
+        on_axis = has_row & (events["axis"] == axis)
+        movements = np.bincount(rows[on_axis & (events["event"] == EVENT_BIG_MVMT_BEGIN)], minlength=len(keys))
+        turns = np.bincount(rows[on_axis & (events["event"] == EVENT_TURN)], minlength=len(keys))
+        is_speed = on_axis & (events["event"] == EVENT_SPEED)
+        max_speeds = np.zeros(len(keys))
+        np.maximum.at(max_speeds, rows[is_speed], events["speed"][is_speed])
+        aggregates.extend(zip(keys.tolist(), itertools.repeat(key), counts.tolist(), means[:, axis].tolist(),
+                              mins[:, axis].tolist(), maxs[:, axis].tolist(), movements.tolist(), turns.tolist(), max_speeds.tolist()))
+    return aggregates
+
+
+def catalog_summary(filename, cache_dir = ANALYSIS_CACHE_DIR):
+    """Summarizes a recording for the catalog, through the analysis cache.
+
+    Returns:
+        dict: "samples", "duration_ms", "raw" and "buttons" of the recording, its minute_aggregates() rows as
+              "minutes" with the axes as indexes of ANALYZE_AXES, and its events by pack_events() prefixed with "event.".
+              Empty for a recording without samples yet.
+    """
+
+    def compute():
+        recording = load_recording(filename)
+        timestamps = recording["timestamps"]
+        if len(timestamps) == 0:
+            return {}
+
+        events = recording_events(recording, cache_dir)
+        minutes = [(minute, ANALYZE_AXIS_INDEX[axis], *values) for minute, axis, *values in minute_aggregates(recording, events)]
+        return {
+            "samples": np.array(len(timestamps)),
+            "duration_ms": np.array(timestamps[-1] - timestamps[0]),
+            "raw": np.array(recording["is_raw"]),
+            "buttons": np.array(recording["buttons"].shape[1]),
+            "minutes": np.array(minutes, dtype=np.float64).reshape(-1, len(CATALOG_MINUTE_COLUMNS)),
+            **pack_events(events, "event."),
+        }
+
+    return cached_analysis(filename, "catalog", {"thresholds": default_thresholds()}, compute, cache_dir)
+
+
+def index_recording(con, filename, signature, cache_dir = ANALYSIS_CACHE_DIR):
+    """Replaces the catalog rows of a recording. Returns False for a recording without samples yet."""
+
+    summary = catalog_summary(filename, cache_dir)
+    if not summary:
+        return False
+
+    meta = {}
+    if os.path.exists(meta_file_name(filename)):
+        with open(meta_file_name(filename)) as fd:
+            meta = json.load(fd)
+    started = meta.get("started")
+    if started is None:
+        try:
+            started = datetime.datetime.strptime(os.path.basename(filename), "%Y%m%d_%H%M%S_%f.csv").isoformat()
+        except ValueError:
+            pass
+
+    minutes = [(int(minute), ANALYZE_AXES[int(axis)], int(samples), mean, min_value, max_value, int(movements), int(turns), max_speed)
+               for minute, axis, samples, mean, min_value, max_value, movements, turns, max_speed in summary["minutes"].tolist()]
+    with con:
+        con.execute("DELETE FROM sessions WHERE path = ?", (filename,))
+        session_id = con.execute(
+            "INSERT INTO sessions (path, size, mtime_ns, started, controller, guid, version, raw, buttons, samples, duration_ms) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (filename, *signature, started, meta.get("controller"), meta.get("guid"), meta.get("version"),
+             int(summary["raw"]), int(summary["buttons"]), int(summary["samples"]), int(summary["duration_ms"]))
+        ).lastrowid
+        con.executemany("INSERT INTO minutes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        ((session_id, *row) for row in minutes))
+        con.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        ((session_id, *event) for event in table_events(unpack_events(summary, "event."))))
+    return True
+
+
+def index_recordings(con, paths, cache_dir = ANALYSIS_CACHE_DIR):
+    """Adds new and changed recordings in paths to the catalog, unchanged ones are skipped.
+
+    Returns:
+        tuple[int, int]: numbers of the indexed and the skipped recordings.
+    """
+
+    indexed = skipped = 0
+    for filename in find_recordings(paths):
+        signature = recording_signature(filename)
+        if con.execute("SELECT 1 FROM sessions WHERE path = ? AND size = ? AND mtime_ns = ?", (filename, *signature)).fetchone():
+            skipped += 1
+            continue
+        if index_recording(con, filename, signature, cache_dir):
+            indexed += 1
+            print(f"Indexed {filename}")
+        else:
+            skipped += 1
+    return indexed, skipped
+
+
+def find_sessions(con, axis, min_speed, controller = None):
+    """Finds the sessions with a speed of axis above min_speed, on controllers named like controller.
+
+    Returns:
+        list[tuple]: (path, started, controller, max speed) rows, fastest first.
+    """
+
+    query = ("SELECT s.path, s.started, s.controller, MAX(m.max_speed) FROM minutes m JOIN sessions s ON s.id = m.session_id "
+             "WHERE m.axis = ? AND m.max_speed > ?")
+    params = [axis, min_speed]
+    if controller is not None:
+        query += " AND s.controller LIKE ?"
+        params.append(f'%{controller}%')
+    query += " GROUP BY s.id ORDER BY 4 DESC"
+    return con.execute(query, params).fetchall()
+
+
+def catalog_main(args):
+    '''
+        CATALOG
+    '''
+
+    con = open_catalog(args.catalog)
+    try:
+        if args.index:
+            indexed, skipped = index_recordings(con, args.index, args.cache)
+            print(f"{indexed} recordings indexed, {skipped} unchanged or empty.")
+
+        rows = None
+        start = time.perf_counter()
+        if args.find:
+            axis, _, min_speed = args.find.partition(">")
+            rows = find_sessions(con, axis.strip(), float(min_speed), args.controller)
+        elif args.query:
+            cursor = con.execute(args.query)
+            rows = cursor.fetchall()
+            print(", ".join(column[0] for column in cursor.description or []))
+        if rows is not None:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for row in rows:
+                print(", ".join(map(str, row)))
+            print(f"\n{Style.BRIGHT}{len(rows)} rows in {elapsed_ms:.1f}ms{Style.RESET_ALL}")
+    finally:
+        con.close()
+
+
+# COMPARE two recordings
+COMPARE_ALIGN_AXES = [0, 1, 2, 3] #sticks
+COMPARE_ACTIVE = 0.05 #samples fitted for gain/offset, either side beyond this
+COMPARE_REST = 0.1 #samples measured for noise, both sides within this
+COMPARE_SIZE = (1600, 130)
+COMPARE_A_COLOR = (120, 170, 255)
+COMPARE_B_COLOR = (255, 160, 60)
+
+def resample_recording(recording, interval = SAMPLING_RATE):
+    """Resamples a recording onto a uniform grid of interval ms.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: ms of the grid (M,) and the samples on it (M, len(ANALYZE_AXES)).
+    """
+
+    timestamps = recording["timestamps"]
+    grid = np.arange(timestamps[0], timestamps[-1] + 1, interval)
+    samples = np.column_stack([np.interp(grid, timestamps, recording["samples"][:, axis]) for axis in range(len(ANALYZE_AXES))])
+    return grid, samples
+
+
+def align_samples(a, b, axes = COMPARE_ALIGN_AXES):
+    """Finds the shift of b against a by FFT cross-correlation, summed over axes.
+
+    The spectra are accumulated one axis at a time, so the memory stays a few arrays of the padded length.
+
+    Returns:
+        tuple[int, float, float]: shift (b[i + shift] matches a[i]), the shift refined between samples
+                                  and the normalized correlation at the peak.
+    """
+
+    size = 1 << int(len(a) + len(b) - 1).bit_length()
+    spectrum = np.zeros(size // 2 + 1, dtype=np.complex128)
+    energy_a = energy_b = 0.0
+    for axis in axes:
+        signal_a = a[:, axis] - a[:, axis].mean()
+        signal_b = b[:, axis] - b[:, axis].mean()
+        energy_a += signal_a @ signal_a
+        energy_b += signal_b @ signal_b
+        spectrum += np.conj(np.fft.rfft(signal_a, size)) * np.fft.rfft(signal_b, size)
+    correlation = np.fft.irfft(spectrum, size)
+
+    # lags of -(len(a) - 1)..len(b) - 1, negative ones wrapped to the end
+    valid = np.r_[correlation[:len(b)], correlation[size - len(a) + 1:]]
+    shifts = np.r_[np.arange(len(b)), np.arange(-len(a) + 1, 0)]
+    peak = int(valid.argmax())
+    shift = int(shifts[peak])
+
+    refined = float(shift)
+    if 0 < peak < len(valid) - 1 and shifts[peak - 1] + 1 == shift == shifts[peak + 1] - 1:
+        left, center, right = valid[peak - 1:peak + 2]
+        denominator = left - 2 * center + right
+        if denominator:
+            refined += float(0.5 * (left - right) / denominator)
+
+    score = valid[peak] / math.sqrt(energy_a * energy_b) if energy_a and energy_b else 0.0
+    return shift, refined, float(score)
+
+
+def overlapping_samples(a, b, shift):
+    """Returns the slices of a and b overlapping after shifting b."""
+
+    begin = max(0, -shift)
+    end = min(len(a), len(b) - shift)
+    return slice(begin, end), slice(begin + shift, end + shift)
+
+
+def compare_axes(a, b):
+    """Compares aligned samples of two recordings per axis.
+
+    Returns:
+        list[dict]: per ANALYZE_AXES "gain" and "offset" of b against a (least squares over the active samples),
+                    "correlation", "residual" (RMS after the fit), "deadzone_a"/"deadzone_b" (95th percentile of
+                    the other side while the side reads 0) and "noise_a"/"noise_b" (at rest, from the sample differences).
+    """
+
+    results = []
+    for axis, key in enumerate(ANALYZE_AXES):
+        xs = a[:, axis]
+        ys = b[:, axis]
+        result = {"axis": key}
+
+        active = (np.abs(xs) > COMPARE_ACTIVE) | (np.abs(ys) > COMPARE_ACTIVE)
+        if active.sum() > 10 and xs[active].std() > 0:
+            gain, offset = np.polyfit(xs[active], ys[active], 1)
+            result["gain"] = float(gain)
+            result["offset"] = float(offset)
+            result["residual"] = float(np.sqrt(np.mean((ys[active] - gain * xs[active] - offset) ** 2)))
+        else:
+            result["gain"] = result["offset"] = result["residual"] = float("nan")
+        result["correlation"] = float(np.corrcoef(xs, ys)[0, 1]) if xs.std() > 0 and ys.std() > 0 else float("nan")
+
+        for side, values, other in (("a", xs, ys), ("b", ys, xs)):
+            zero = (values == 0) & (other != 0)
+            result[f"deadzone_{side}"] = float(np.percentile(np.abs(other[zero]), 95)) if zero.any() else 0.0
+
+        rest = (np.abs(xs) < COMPARE_REST) & (np.abs(ys) < COMPARE_REST)
+        rest = rest[1:] & rest[:-1]
+        for side, values in (("a", xs), ("b", ys)):
+            result[f"noise_{side}"] = float(np.diff(values)[rest].std() / math.sqrt(2)) if rest.sum() > 10 else float("nan")
+
+        results.append(result)
+    return results
+
+
+def render_comparison(filename, grid, a, b, title):
+    """Renders the aligned traces of a and b, one row per axis, into an image file."""
+
+    pygame.font.init()
+    width, row_height = COMPARE_SIZE
+    surface = pygame.Surface((width, row_height * len(ANALYZE_AXES) + 30))
+    surface.fill((30, 30, 30))
+    font = pygame.font.Font(None, 18)
+    plot_txt(surface, font, title, topleft = (5, 8))
+    plot_txt(surface, font, 'A', color = COMPARE_A_COLOR, topright = (width - 30, 8))
+    plot_txt(surface, font, 'B', color = COMPARE_B_COLOR, topright = (width - 10, 8))
+
+    xs = (grid - grid[0]) / max(grid[-1] - grid[0], 1) * (width - 1)
+    for axis, key in enumerate(ANALYZE_AXES):
+        top = 30 + axis * row_height
+        center = top + row_height / 2
+        pygame.draw.line(surface, (70, 70, 70), (0, center), (width, center))
+        for samples, color in ((a, COMPARE_A_COLOR), (b, COMPARE_B_COLOR)):
+            kept = lttb(xs, samples[:, axis], width * 2)
+            points = np.column_stack([xs[kept], center - np.clip(samples[kept, axis], -1, 1) * (row_height / 2 - 4)])
+            pygame.draw.lines(surface, color, False, points.tolist())
+        plot_txt(surface, font, key, topleft = (5, top + 4))
+
+    pygame.image.save(surface, filename)
+
+
+def compare_recordings(filename_a, filename_b, image = None):
+    """Aligns two recordings and compares them axis by axis.
+
+    Args:
+        filename_a (str): the reference recording.
+        filename_b (str): the recording compared with it.
+        image (str): renders the aligned traces into this file if given.
+
+    Returns:
+        dict: "lag_ms" (b from its start against a from its start), "score" (normalized correlation),
+              "overlap_ms" and "axes" of compare_axes().
+    """
+
+    grid_a, a = resample_recording(load_recording(filename_a))
+    grid_b, b = resample_recording(load_recording(filename_b))
+    shift, refined, score = align_samples(a, b)
+    slice_a, slice_b = overlapping_samples(a, b, shift)
+    a = a[slice_a]
+    b = b[slice_b]
+
+    if image is not None and len(a) > 1:
+        render_comparison(image, grid_a[slice_a], a, b, f'{os.path.basename(filename_a)} vs {os.path.basename(filename_b)} (lag {refined * SAMPLING_RATE:.1f}ms)')
+
+    return {
+        "lag_ms": refined * SAMPLING_RATE,
+        "score": score,
+        "overlap_ms": len(a) * SAMPLING_RATE,
+        "axes": compare_axes(a, b),
+    }
+
+
+def compare_main(args):
+    '''
+        COMPARE
+    '''
+
+    filename_a, filename_b = args.compare
+    image = args.out or datetime.datetime.now().strftime("compare_%Y%m%d_%H%M%S.png")
+    result = compare_recordings(filename_a, filename_b, image)
+
+    print(f"B lags A by {result['lag_ms']:.1f}ms (correlation {result['score']:.3f}), {result['overlap_ms'] / 1000:.1f}s overlap")
+    print(f'{"axis":>4} {"gain":>8} {"offset":>9} {"corr":>6} {"resid":>8} {"dz A":>8} {"dz B":>8} {"noise A":>9} {"noise B":>9}')
+    for axis in result["axes"]:
+        print(f'{axis["axis"]:>4} {axis["gain"]:8.4f} {axis["offset"]:9.5f} {axis["correlation"]:6.3f} {axis["residual"]:8.5f} '
+              f'{axis["deadzone_a"]:8.5f} {axis["deadzone_b"]:8.5f} {axis["noise_a"]:9.6f} {axis["noise_b"]:9.6f}')
+    print(f"\n{Style.BRIGHT}Overlay: {image}{Style.RESET_ALL}")
+
+
+# GESTURE search, DTW of an example segment over recordings
+GESTURE_AXES = ["lx", "ly", "rx", "ry"]
+GESTURE_BAND = 0.1 #Sakoe-Chiba band of the warping, rate of the gesture length
+GESTURE_PAA = 8 #samples averaged per segment by the first lower bound
+GESTURE_MAX_GAP_MS = 100 #no match over samples further apart, e.g. a disconnected controller
+GESTURE_BATCH = 4096 #candidates bounded by LB_Keogh at once
+GESTURE_DTW_BATCH = 256 #candidates warped at once
+GESTURE_TOP = 20
+
+def gesture_grid(filename, cache_dir = ANALYSIS_CACHE_DIR):
+    """Resamples a recording onto the SAMPLING_RATE grid searched for gestures, through the analysis cache.
+
+    Returns:
+        dict: "first_ms" of the grid, "samples" (M, len(ANALYZE_AXES)) float32 and "valid" (M,),
+              False where the samples around a grid point are more than GESTURE_MAX_GAP_MS apart.
+    """
+
+    def compute():
+        recording = load_recording(filename)
+        timestamps = recording["timestamps"]
+        if len(timestamps) == 0:
+            return {"first_ms": np.array(0), "samples": np.zeros((0, len(ANALYZE_AXES)), dtype=np.float32), "valid": np.zeros(0, dtype=bool)}
+
+        grid, samples = resample_recording(recording)
+        after = np.minimum(np.searchsorted(timestamps, grid, side="right"), len(timestamps) - 1)
+        before = np.maximum(after - 1, 0)
+        return {
+            "first_ms": np.array(grid[0]),
+            "samples": samples.astype(np.float32),
+            "valid": timestamps[after] - timestamps[before] <= GESTURE_MAX_GAP_MS,
+        }
+
+    return cached_analysis(filename, "gesture_grid", {"interval": SAMPLING_RATE, "max_gap_ms": GESTURE_MAX_GAP_MS}, compute, cache_dir)
+
+
+def gesture_grids(filenames, axes = GESTURE_AXES, cache_dir = ANALYSIS_CACHE_DIR):
+    """Concatenates gesture_grid() of recordings, an invalid sample apart so that no window spans two of them.
+
+    Returns:
+        dict: "filenames", "first_ms" and "offsets" (the index of the first sample) per recording,
+              "samples" (N, len(axes)) float32 of axes and "valid" (N,).
+    """
+
+    axis_idxs = [ANALYZE_AXIS_INDEX[axis] for axis in axes]
+    samples = []
+    valid = []
+    first_ms = []
+    offsets = []
+    offset = 0
+    for filename in filenames:
+        grid = gesture_grid(filename, cache_dir)
+        first_ms.append(int(grid["first_ms"]))
+        offsets.append(offset)
+        samples += [grid["samples"][:, axis_idxs], np.zeros((1, len(axes)), dtype=np.float32)]
+        valid += [grid["valid"], np.zeros(1, dtype=bool)]
+        offset += len(grid["valid"]) + 1
+
+    return {
+        "filenames": list(filenames),
+        "first_ms": np.array(first_ms, dtype=np.int64),
+        "offsets": np.array(offsets, dtype=np.int64),
+        "samples": np.concatenate(samples) if samples else np.zeros((0, len(axes)), dtype=np.float32),
+        "valid": np.concatenate(valid) if valid else np.zeros(0, dtype=bool),
+    }
+
+
+def gesture_envelope(query, radius):
+    """Upper and lower envelopes of LB_Keogh, the max and min of the query within radius samples."""
+
+    padded = np.pad(query, ((radius, radius), (0, 0)), mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=0)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def lb_paa(samples, upper, lower, count, width = GESTURE_PAA):
+    """LB_Keogh of the windows starting at 0 to count - 1, bounded again over segments of width samples.
+
+    The samples of a segment are replaced by their mean and the envelope by its max and min over the segment,
+    the convex squared excess of a mean never exceeds the mean of the excesses. The sliding means come from
+    one cumulative sum, so every start is bounded at the cost of len(upper) / width samples.
+
+    Returns:
+        np.ndarray: (count,) lower bounds of the DTW distances.
+    """
+
+    sums = np.concatenate([np.zeros((1, samples.shape[1])), np.cumsum(samples, axis=0, dtype=np.float64)])
+    means = ((sums[width:] - sums[:-width]) / width).astype(np.float32)
+    bounds = np.zeros(count, dtype=np.float32)
+    for first in range(0, len(upper) - width + 1, width):
+        segment = means[first:first + count]
+        excess = np.maximum(segment - upper[first:first + width].max(axis=0), 0) + np.maximum(lower[first:first + width].min(axis=0) - segment, 0)
+        bounds += width * (excess ** 2).sum(axis=1)
+    return bounds
+
+
+def lb_keogh(windows, upper, lower):
+    """LB_Keogh of (K, m, axes) windows, the squared distances of their samples outside the envelope."""
+
+    excess = np.maximum(windows - upper, 0) + np.maximum(lower - windows, 0)
+    return (excess ** 2).sum(axis=(1, 2))
+
+
+def dtw_batch(query, windows, radius, cutoff = np.inf):
+    """DTW distances of (K, m, axes) windows to the query within a Sakoe-Chiba band, all of them at once.
+
+    The distance is the sum of the squared distances between the warped samples.
+    The windows are given up, as inf, once every warping path of theirs reaches cutoff.
+    """
+
+    count, length, _ = windows.shape
+    query = query.astype(np.float64)
+    prev = np.full((count, length), np.inf)
+    for i in range(length):
+        lo = max(i - radius, 0)
+        hi = min(i + radius + 1, length)
+        costs = ((windows[:, lo:hi] - query[i]) ** 2).sum(axis=2)
+        # diagonal and vertical steps, then the horizontal ones along the row
+        steps = prev[:, lo:hi].copy()
+        if lo > 0:
+            np.minimum(steps, prev[:, lo - 1:hi - 1], out=steps)
+        else:
+            np.minimum(steps[:, 1:], prev[:, :hi - 1], out=steps[:, 1:])
+            if i == 0:
+                steps[:, 0] = 0
+        row = np.full((count, length), np.inf)
+        left = np.full(count, np.inf)
+        for j in range(hi - lo):
+            left = costs[:, j] + np.minimum(steps[:, j], left)
+            row[:, lo + j] = left
+        prev = row
+
+        if i % radius == 0 and (prev.min(axis=1) >= cutoff).all():
+            return np.full(count, np.inf)
+
+    distances = prev[:, -1]
+    distances[distances >= cutoff] = np.inf
+    return distances
+
+
+def suppress_overlaps(matches, length):
+    """Keeps the best of overlapping matches.
+
+    Args:
+        matches (list[tuple]): (distance, start).
+        length (int): samples of a match.
+
+    Returns:
+        list[tuple]: the kept matches, best first.
+    """
+
+    kept = []
+    starts = []
+    for distance, start in sorted(matches):
+        at = bisect.bisect_left(starts, start)
+        if (at > 0 and start - starts[at - 1] < length) or (at < len(starts) and starts[at] - start < length):
+            continue
+        starts.insert(at, start)
+        kept.append((distance, start))
+    return kept
+
+
+def search_gesture(query, samples, valid, top = GESTURE_TOP, max_distance = None, band = GESTURE_BAND):
+    """Finds the windows of samples closest to the query by DTW.
+
+    The candidates are every start of a window of valid samples. They are bounded by lb_paa() all at once,
+    the ones under the threshold by lb_keogh() in batches of GESTURE_BATCH from the lowest bound up,
+    and the ones still under it are warped by dtw_batch(). The threshold is max_distance,
+    lowered to the top-th distance of the matches so far, so the search stops at the first bound over it.
+
+    Args:
+        query (np.ndarray): (m, axes) samples of the gesture.
+        samples (np.ndarray): (N, axes) samples searched.
+        valid (np.ndarray): (N,) False for the samples no match may span.
+        top (int): number of matches, 0 for every match under max_distance.
+        max_distance (float): RMS distance per sample of a match, None for no limit.
+        band (float): GESTURE_BAND.
+
+    Returns:
+        list[tuple]: (RMS distance per sample, start) of the matches, best first, none overlapping.
+    """
+
+    if not top and max_distance is None:
+        raise ValueError("every match needs a max_distance")
+
+    length = len(query)
+    radius = max(round(band * length), 1)
+    count = len(samples) - length + 1
+    if count <= 0:
+        return []
+    upper, lower = gesture_envelope(query, radius)
+    windows = np.lib.stride_tricks.sliding_window_view(samples, length, axis=0)
+
+    bounds = lb_paa(samples, upper, lower, count)
+    invalid = np.concatenate([[0], np.cumsum(~valid)])
+    bounds[invalid[length:length + count] - invalid[:count] > 0] = np.inf
+
+    threshold = np.inf if max_distance is None else max_distance ** 2 * length
+    matches = []
+
+    def search(candidates):
+        nonlocal threshold
+        for first in range(0, len(candidates), GESTURE_BATCH):
+            batch = candidates[first:first + GESTURE_BATCH]
+            batch = batch[bounds[batch] < threshold]
+            if len(batch) == 0:
+                return
+            batch_windows = windows[batch].transpose(0, 2, 1)
+            keogh = lb_keogh(batch_windows, upper, lower)
+            order = np.argsort(keogh)
+            order = order[keogh[order] < threshold]
+            for dtw_first in range(0, len(order), GESTURE_DTW_BATCH):
+                idxs = order[dtw_first:dtw_first + GESTURE_DTW_BATCH]
+                idxs = idxs[keogh[idxs] < threshold]
+                if len(idxs) == 0:
+                    break
+                distances = dtw_batch(query, batch_windows[idxs], radius, threshold)
+                found = np.isfinite(distances)
+                matches.extend(zip(distances[found].tolist(), batch[idxs][found].tolist()))
+                if top and found.any():
+                    kept = suppress_overlaps(matches, length)
+                    if len(kept) >= top:
+                        threshold = min(threshold, kept[top - 1][0])
+
+    # the lowest bounds first set a threshold, then the candidates under it are searched in order
+    first = min(GESTURE_BATCH, count)
+    candidates = np.argpartition(bounds, first - 1)[:first] if first < count else np.arange(count)
+    candidates = candidates[np.argsort(bounds[candidates])]
+    search(candidates)
+    bounds[candidates] = np.inf
+    candidates = np.flatnonzero(bounds < threshold)
+    search(candidates[np.argsort(bounds[candidates])])
+
+    kept = suppress_overlaps(matches, length)
+    if top:
+        kept = kept[:top]
+    return [(math.sqrt(distance / length), start) for distance, start in kept]
+
+
+def find_gesture(filename, begin_ms, end_ms, paths = None, axes = GESTURE_AXES, top = GESTURE_TOP, max_distance = None,
+                 cache_dir = ANALYSIS_CACHE_DIR):
+    """Finds the segments of recordings like the gesture from begin_ms to end_ms of a recording.
+
+    Args:
+        filename (str): recording of the gesture.
+        begin_ms (int): ms of the recording.
+        end_ms (int): ms of the recording.
+        paths (list[str]): recordings searched, files or directories, the recording of the gesture if None.
+        axes (list[str]): ANALYZE_AXES compared.
+
+    Returns:
+        tuple[list[dict], dict]: the matches best first ("file", "begin_ms", "end_ms", "distance"), and gesture_grids().
+    """
+
+    example = gesture_grid(filename, cache_dir)
+    first = round((begin_ms - int(example["first_ms"])) / SAMPLING_RATE)
+    last = round((end_ms - int(example["first_ms"])) / SAMPLING_RATE) + 1
+    if first < 0 or last > len(example["valid"]) or last - first < 2:
+        raise ValueError(f"{filename}: no gesture from {begin_ms}ms to {end_ms}ms")
+    query = example["samples"][first:last, [ANALYZE_AXIS_INDEX[axis] for axis in axes]]
+
+    grids = gesture_grids(list(find_recordings(paths)) if paths else [os.path.abspath(filename)], axes, cache_dir)
+    found = search_gesture(query, grids["samples"], grids["valid"], top, max_distance)
+
+    matches = []
+    for distance, start in found:
+        recording_idx = int(np.searchsorted(grids["offsets"], start, side="right")) - 1
+        match_ms = int(grids["first_ms"][recording_idx]) + (start - int(grids["offsets"][recording_idx])) * SAMPLING_RATE
+        matches.append({
+            "file": grids["filenames"][recording_idx],
+            "begin_ms": match_ms,
+            "end_ms": match_ms + (len(query) - 1) * SAMPLING_RATE,
+            "distance": distance,
+        })
+    return matches, grids
+
+
+def gesture_main(args):
+    '''
+        GESTURE SEARCH
+    '''
+
+    filename, begin_ms, end_ms = args.gesture
+    axes = args.axes.split(",")
+    start = time.perf_counter()
+    matches, grids = find_gesture(filename, int(begin_ms), int(end_ms), args.search, axes, args.top, args.max_distance, args.cache)
+    elapsed = time.perf_counter() - start
+
+    for rank, match in enumerate(matches, 1):
+        print(f'{rank:4}. {match["file"]} {match["begin_ms"]}-{match["end_ms"]}ms, distance {match["distance"]:.5f}')
+    hours = len(grids["valid"]) * SAMPLING_RATE / 3600000
+    print(f"\n{Style.BRIGHT}{len(matches)} matches in {len(grids['filenames'])} recordings ({hours:.1f}h) in {elapsed:.2f}s{Style.RESET_ALL}")
+
+    if args.out:
+        with open(args.out, 'w', newline='') as fd:
+            writer = csv.DictWriter(fd, fieldnames=["file", "begin_ms", "end_ms", "distance"])
+            writer.writeheader()
+            writer.writerows(matches)
+        print(f"{Style.BRIGHT}Matches: {args.out}{Style.RESET_ALL}")
+
+
+# RENDER recordings offscreen
+RENDER_CHUNK_MS = 10000
+RENDER_WARMUP_MS = AGGR_MAX_MS + MAX_MS #refills the buffers and the 10s max speeds before a chunk
+RENDER_NOISE_WARMUP_MS = NOISE_AVERAGE_BLOCKS * NOISE_HOP * SAMPLING_RATE
+RENDER_STREAM_SUFFIXES = (".rgb", ".raw")
+RENDER_FRAME_NAME = "frame_{:06d}.png"
+PLAY_BAR_HEIGHT = 6 #progress bar of --play at the bottom of the visuals
+
+def recorder_mode_replay(stats, cur_ms, raw, buttons):
+    delete_lines(None, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
+    add_sample(stats, cur_ms, raw, buttons)
+    analyze_stats(stats)
+    take_events(stats)
+
+def stick_mode_replay(stats, cur_ms, raw, buttons):
+    delete_lines(None, stats, cur_ms, MAX_MS, AGGR_MAX_MS)
+    sample = add_sample(stats, cur_ms, raw, buttons)
+    profile_noise(stats["noise"], sample, cur_ms)
+    add_to_stick_map(stats["stick_map"], sample)
+    take_events(stats)
+
+RENDER_MODES = {
+    "recorder": {"size": (460, 250), "replay": recorder_mode_replay, "draw": draw_recorder_frame, "draw_args": {"is_record": True},
+                 "warmup_ms": RENDER_WARMUP_MS, "stick_map": False, "play_status": {"topleft": (5, 3)}},
+    "stick": {"size": (1100, 490), "replay": stick_mode_replay, "draw": draw_stick_frame, "draw_args": {},
+              "warmup_ms": max(RENDER_WARMUP_MS, RENDER_NOISE_WARMUP_MS), "stick_map": True,
+              "play_status": {"bottomright": (1095, 490 - PLAY_BAR_HEIGHT - 3)}},
+}
+
+
+def recording_joystick(recording):
+    """A stand-in for pygame.joystick.Joystick with the buttons of a recording, to prepare stats replaying it."""
+
+    return types.SimpleNamespace(
+        get_numbuttons=lambda: recording["buttons"].shape[1],
+        get_name=lambda: os.path.basename(recording["filename"]),
+    )
+
+
+def render_frame_times(first_ms, fps, first, last):
+    """ms of the frames first to last - 1 of a timeline starting at first_ms."""
+    return (first_ms + np.arange(first, last) * 1000 // fps).tolist()
+
+
+def init_render_worker(filename, mode, fps, causal, cache_dir):
+    global render_job
+
+    # offscreen surfaces only, never a window
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.font.init()
+
+    recording = load_recording(filename)
+    events = recording_events(recording, cache_dir)
+    render_job = {"recording": recording, "events": events, "mode": mode, "fps": fps, "causal": causal, "fonts": frame_fonts()}
+
+
+def replay_stats(recording, events, mode, start_ms, lookback_ms, max_fps = VISUALIZE_FRAME_RATE, causal = False, stick_map = None):
+    """Prepares stats as the live loop of a mode had them at start_ms of a recording, from a look-back.
+
+    The samples from lookback_ms before start_ms are replayed. What reaches further back is seeded:
+    the last, all-time and 10s max speeds from the speed events recorded before the look-back,
+    and the stick map of the stick mode from the samples before it.
+
+    Args:
+        recording (dict): load_recording().
+        events (dict): events_table() of its analyze events.
+        mode (dict): a mode of RENDER_MODES.
+        start_ms (int): ms of the recording.
+        lookback_ms (int): ms of samples replayed up to start_ms.
+        max_fps (int): max FPS of the stats.
+        causal (bool): runs the causal analyzer.
+        stick_map (dict): init_stick_map() of the samples before the look-back, built from them if None.
+
+    Returns:
+        tuple[dict, int]: the stats, and the index of the first sample after start_ms.
+    """
+
+    timestamps = recording["timestamps"]
+    samples = recording["samples"]
+    stats = init_stats(recording_joystick(recording), max_fps, causal=causal)
+    i = int(np.searchsorted(timestamps, start_ms - lookback_ms))
+
+    if mode["stick_map"]:
+        # the stick map covers the session
+        if stick_map is None:
+            add_samples_to_stick_map(stats["stick_map"], samples[:i])
+        else:
+            stats["stick_map"] = stick_map
+
+    analyzed_stats = stats["max"]
+    before = (events["event"] == EVENT_SPEED) & (events["speed"] != 0) & (events["ms"] < (timestamps[i] if i < len(timestamps) else start_ms))
+    np.maximum.at(analyzed_stats["max_speed"], events["axis"][before], events["speed"][before])
+    # in order, the latest speed of an axis is assigned last
+    analyzed_stats["last_speed"][events["axis"][before]] = events["speed"][before]
+    for axis in range(len(ANALYZE_AXES)):
+        in_window = before & (events["axis"] == axis) & (events["end_ms"] >= start_ms - AGGR_MAX_MS)
+        order = np.argsort(events["end_ms"][in_window], kind="stable")
+        analyzed_stats["max_speeds"][axis].extend(events["speed"][in_window][order].tolist())
+        analyzed_stats["max_speeds_ms"][axis].extend(events["end_ms"][in_window][order].tolist())
+
+    buttons = recording["buttons"]
+    while i < len(timestamps) and timestamps[i] <= start_ms:
+        mode["replay"](stats, int(timestamps[i]), array.array('h', recording["raw"][i].tobytes()), buttons[i].tolist())
+        i += 1
+
+    return stats, i
+
+
+def in_gap(events, ms):
+    """Whether the controller was away at ms, by the EVENT_GAP events."""
+
+    is_gap = events["event"] == EVENT_GAP
+    return bool(((events["begin_ms"][is_gap] <= ms) & (ms < events["end_ms"][is_gap])).any())
+
+
+def render_chunk(chunk):
+    """Renders frames of the recording of the worker process.
+
+    The stats start from replay_stats() over the warm-up of the mode, long enough for the frames to be
+    as a single pass over the recording draws them.
+
+    Args:
+        chunk (tuple): first and last (exclusive) frame indexes, and the directory of the PNGs or the file of the raw frames.
+
+    Returns:
+        tuple: the chunk
+    """
+
+    first, last, out = chunk
+    recording = render_job["recording"]
+    events = render_job["events"]
+    fps = render_job["fps"]
+    mode = RENDER_MODES[render_job["mode"]]
+    timestamps = recording["timestamps"]
+    raw = recording["raw"]
+    buttons = recording["buttons"].tolist()
+    frames_ms = render_frame_times(int(timestamps[0]), fps, first, last)
+
+    stats, i = replay_stats(recording, events, mode, frames_ms[0], mode["warmup_ms"], fps, render_job["causal"])
+    stats["fps"] = fps
+
+    # 32 bits as the window, its pixels are the bgr0 frames as they are
+    surface = pygame.Surface(mode["size"], depth=32)
+    stream = None if os.path.isdir(out) else open(out, 'wb')
+    try:
+        for frame, frame_ms in enumerate(frames_ms, first):
+            while i < len(timestamps) and timestamps[i] <= frame_ms:
+                mode["replay"](stats, int(timestamps[i]), array.array('h', raw[i].tobytes()), buttons[i])
+                i += 1
+            stats["connected"] = not in_gap(events, frame_ms)
+
+            sticks = buffered_samples(stats, -1)[0, :4].tolist() if stats["timestamps"] else [0.0] * 4
+            mode["draw"](surface, render_job["fonts"], stats, sticks, frame_ms, **mode["draw_args"])
+            if stream:
+                stream.write(surface.get_buffer())
+            else:
+                pygame.image.save(surface, os.path.join(out, RENDER_FRAME_NAME.format(frame)))
+    finally:
+        if stream:
+            stream.close()
+
+    return chunk
+
+
+def render_recording(filename, out, mode = "recorder", fps = VISUALIZE_FRAME_RATE, jobs = None, causal = False, cache_dir = ANALYSIS_CACHE_DIR):
+    """Renders a recording with the visuals of a mode, into PNG frames or a raw video stream, with a process pool.
+
+    The timeline is split into chunks of RENDER_CHUNK_MS rendered by the workers, each replaying its own warm-up,
+    and stitched in order: the PNGs are numbered by frame, the raw frames of a chunk are appended to the stream
+    once the chunks before it are.
+
+    Args:
+        filename (str): a recording.
+        out (str): a directory of PNGs, or a file ending with RENDER_STREAM_SUFFIXES or "-" (stdout) for bgr0 frames.
+        mode (str): key of RENDER_MODES.
+        fps (int): frames per second of the recording time.
+        jobs (int): number of worker processes. CPU count if None.
+        causal (bool): runs the causal analyzer.
+        cache_dir (str): analysis cache of the events replayed for recordings without an events file. None to always replay.
+
+    Returns:
+        int: number of frames.
+    """
+
+    recording = load_recording(filename)
+    timestamps = recording["timestamps"]
+    if len(timestamps) == 0:
+        return 0
+    # replayed once into the cache rather than by every worker
+    recording_events(recording, cache_dir)
+    frames = int(timestamps[-1] - timestamps[0]) * fps // 1000 + 1
+    chunk_frames = max(1, RENDER_CHUNK_MS * fps // 1000)
+
+    is_stream = out == "-" or out.endswith(RENDER_STREAM_SUFFIXES)
+    if not is_stream:
+        os.makedirs(out, exist_ok=True)
+        chunks = [(first, min(first + chunk_frames, frames), out) for first in range(0, frames, chunk_frames)]
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_render_worker, initargs=(filename, mode, fps, causal, cache_dir)) as executor:
+            list(executor.map(render_chunk, chunks))
+        return frames
+
+    # parts next to the stream, stdout has no place
+    with tempfile.TemporaryDirectory(dir=None if out == "-" else os.path.dirname(os.path.abspath(out))) as parts:
+        chunks = [(first, min(first + chunk_frames, frames), os.path.join(parts, f'{first}.rgb')) for first in range(0, frames, chunk_frames)]
+        stream = sys.stdout.buffer if out == "-" else open(out, 'wb')
+        try:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=init_render_worker, initargs=(filename, mode, fps, causal, cache_dir)) as executor:
+                for first, last, part in executor.map(render_chunk, chunks):
+                    with open(part, 'rb') as fd:
+                        shutil.copyfileobj(fd, stream)
+                    os.remove(part)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+    return frames
+
+
+def render_main(args):
+    '''
+        RENDER
+    '''
+
+    mode = "stick" if args.stick else "recorder"
+    out = args.out or os.path.splitext(args.render)[0] + f"_{mode}"
+    is_stream = out == "-" or out.endswith(RENDER_STREAM_SUFFIXES)
+    # stdout may be the stream
+    log = sys.stderr if out == "-" else sys.stdout
+
+    print(f"Rendering {args.render} in {mode} mode at {args.fps} FPS...", file=log)
+    start = time.perf_counter()
+    frames = render_recording(args.render, out, mode, args.fps, args.jobs, args.causal, args.cache)
+    elapsed = time.perf_counter() - start
+
+    print(f"{frames} frames of {frames / args.fps:.1f}s in {elapsed:.1f}s, {frames / args.fps / elapsed:.1f}x real time", file=log)
+    if is_stream:
+        width, height = RENDER_MODES[mode]["size"]
+        print(f"\n{Style.BRIGHT}Raw video: ffmpeg -f rawvideo -pix_fmt bgr0 -s {width}x{height} -r {args.fps} -i {out} {mode}.mp4{Style.RESET_ALL}", file=log)
+    else:
+        print(f"\n{Style.BRIGHT}Frames: {os.path.join(out, 'frame_%06d.png')}{Style.RESET_ALL}", file=log)
+
+
+# PLAY recordings in the visualizers
+PLAY_LOOKBACK_MS = 2 * MAX_MS #replayed before a seek target, the 10s max speeds are seeded from the events
+PLAY_SPEEDS = [0.125, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64]
+PLAY_SEEK_MS = 10000
+PLAY_SEEK_LONG_MS = 60000
+PLAY_MAP_CHECKPOINT = 6000 #samples between stick maps kept for seeking
+PLAY_BAR_COLOR = (90, 90, 90)
+PLAY_BAR_DONE_COLOR = (200, 200, 200)
+
+def stick_map_checkpoints(samples, every = PLAY_MAP_CHECKPOINT):
+    """Stick maps of samples[:k * every] for each k, so that a seek adds fewer than every samples."""
+
+    checkpoints = []
+    stick_map = init_stick_map()
+    for first in range(0, len(samples), every):
+        checkpoints.append(copy_stick_map(stick_map))
+        add_samples_to_stick_map(stick_map, samples[first:first + every])
+    return checkpoints
+
+
+def init_player(filename, mode, max_fps = VISUALIZE_FRAME_RATE, causal = False, cache_dir = ANALYSIS_CACHE_DIR):
+    """Loads a recording to play in the visualizer of a mode of RENDER_MODES.
+
+    The speeds of a seek are seeded from the recorded events, or from the events replayed
+    through the analysis cache in cache_dir for recordings without an events file.
+
+    Returns:
+        dict: the player, "ms" is the position in the recording and "index" the first sample after it.
+    """
+
+    recording = load_recording(filename)
+    if len(recording["timestamps"]) == 0:
+        raise ValueError(f"{filename}: no samples to play")
+    events = recording_events(recording, cache_dir)
+    timestamps = recording["timestamps"]
+
+    return {
+        "recording": recording,
+        "events": events,
+        "mode": RENDER_MODES[mode],
+        "map_checkpoints": stick_map_checkpoints(recording["samples"]) if RENDER_MODES[mode]["stick_map"] else None,
+        "buttons": recording["buttons"].tolist(),
+        "max_fps": max_fps,
+        "causal": causal,
+        "first_ms": int(timestamps[0]),
+        "last_ms": int(timestamps[-1]),
+        "ms": int(timestamps[0]),
+        "index": 0,
+        "speed": 1,
+        "paused": False,
+    }
+
+
+def seek_player(player, ms):
+    """Prepares the stats of the player at ms from PLAY_LOOKBACK_MS of samples, however far it is.
+
+    The history pyramid and the noise profile start over from the look-back.
+
+    Returns:
+        dict: the stats
+    """
+
+    recording = player["recording"]
+    ms = min(max(int(ms), player["first_ms"]), player["last_ms"])
+
+    stick_map = None
+    if player["map_checkpoints"] is not None:
+        i = int(np.searchsorted(recording["timestamps"], ms - PLAY_LOOKBACK_MS))
+        checkpoint = i // PLAY_MAP_CHECKPOINT
+        stick_map = copy_stick_map(player["map_checkpoints"][checkpoint])
+        add_samples_to_stick_map(stick_map, recording["samples"][checkpoint * PLAY_MAP_CHECKPOINT:i])
+
+    stats, player["index"] = replay_stats(recording, player["events"], player["mode"], ms, PLAY_LOOKBACK_MS,
+                                          player["max_fps"], player["causal"], stick_map)
+    player["ms"] = ms
+    return stats
+
+
+def play_to(player, stats, ms):
+    """Plays the recording on to ms, seeking instead when ms is behind or more than PLAY_LOOKBACK_MS ahead.
+
+    Returns:
+        dict: the stats, new ones after a seek.
+    """
+
+    recording = player["recording"]
+    timestamps = recording["timestamps"]
+    ms = min(max(int(ms), player["first_ms"]), player["last_ms"])
+    if ms < player["ms"] or ms - player["ms"] > PLAY_LOOKBACK_MS:
+        new_stats = seek_player(player, ms)
+        new_stats["history_zoom"] = stats["history_zoom"]
+        return new_stats
+
+    i = player["index"]
+    while i < len(timestamps) and timestamps[i] <= ms:
+        player["mode"]["replay"](stats, int(timestamps[i]), array.array('h', recording["raw"][i].tobytes()), player["buttons"][i])
+        i += 1
+    player["index"] = i
+    player["ms"] = ms
+    return stats
+
+
+def handle_play_events(player, stats, events, width, height):
+    """Controls the playback with the keys and a click on the bar at the bottom.
+
+    Space pauses, up/down change the speed, left/right seek by PLAY_SEEK_MS, page up/down by PLAY_SEEK_LONG_MS,
+    home/end go to the beginning/end, and ./, step a sample forward/back.
+
+    Returns:
+        dict: the stats, new ones after a seek.
+    """
+
+    timestamps = player["recording"]["timestamps"]
+    target_ms = player["ms"]
+    for event in events:
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1 and event.pos[1] >= height - PLAY_BAR_HEIGHT * 2:
+                target_ms = player["first_ms"] + (player["last_ms"] - player["first_ms"]) * event.pos[0] / width
+            continue
+        if event.type != pygame.KEYDOWN:
+            continue
+
+        if event.key == pygame.K_SPACE:
+            # plays again from the beginning once at the end
+            if player["paused"] and target_ms >= player["last_ms"]:
+                target_ms = player["first_ms"]
+            player["paused"] = not player["paused"]
+        elif event.key in (pygame.K_UP, pygame.K_DOWN):
+            step = 1 if event.key == pygame.K_UP else -1
+            speed_idx = min(max(PLAY_SPEEDS.index(player["speed"]) + step, 0), len(PLAY_SPEEDS) - 1)
+            player["speed"] = PLAY_SPEEDS[speed_idx]
+        elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+            target_ms += PLAY_SEEK_MS if event.key == pygame.K_RIGHT else -PLAY_SEEK_MS
+        elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+            target_ms += PLAY_SEEK_LONG_MS if event.key == pygame.K_PAGEDOWN else -PLAY_SEEK_LONG_MS
+        elif event.key == pygame.K_HOME:
+            target_ms = player["first_ms"]
+        elif event.key == pygame.K_END:
+            target_ms = player["last_ms"]
+        elif event.key in (pygame.K_PERIOD, pygame.K_COMMA):
+            player["paused"] = True
+            # the sample at target_ms is i - 1
+            i = int(np.searchsorted(timestamps, target_ms, side="right"))
+            i = i if event.key == pygame.K_PERIOD else i - 2
+            target_ms = int(timestamps[min(max(i, 0), len(timestamps) - 1)])
+
+    if target_ms != player["ms"]:
+        stats = play_to(player, stats, target_ms)
+    return stats
+
+
+def draw_play_status(screen, font, player):
+    """Draws the position, duration and speed of the player, and its progress bar at the bottom."""
+
+    width, height = screen.get_size()
+    duration_ms = max(player["last_ms"] - player["first_ms"], 1)
+    position_ms = player["ms"] - player["first_ms"]
+    pygame.draw.rect(screen, PLAY_BAR_COLOR, (0, height - PLAY_BAR_HEIGHT, width, PLAY_BAR_HEIGHT))
+    pygame.draw.rect(screen, PLAY_BAR_DONE_COLOR, (0, height - PLAY_BAR_HEIGHT, round(width * position_ms / duration_ms), PLAY_BAR_HEIGHT))
+
+    status = f'{position_ms / 1000:.2f}s / {duration_ms / 1000:.2f}s  {player["speed"]:g}x'
+    if player["paused"]:
+        status += "  paused"
+    plot_txt(screen, font, status, **player["mode"]["play_status"])
+
+
+def play_recording(screen, player, stop_event):
+    """Plays a recording in the visualizer of the player mode until the window is closed.
+
+    The samples due since the last frame are replayed at the speed of the player,
+    and the frame is drawn as the live visualizer draws it, at the time of the recording.
+    """
+
+    mode = player["mode"]
+    fonts = frame_fonts()
+    clock = pygame.time.Clock()
+    stats = seek_player(player, player["ms"])
+    last_ms = pygame.time.get_ticks()
+
+    while not stop_event.is_set():
+        if pygame.event.get(pygame.QUIT):
+            stop_event.set()
             return
+
+        events = pygame.event.get((pygame.KEYDOWN, pygame.MOUSEWHEEL, pygame.MOUSEBUTTONDOWN))
+        handle_zoom_events(stats, events)
+        stats = handle_play_events(player, stats, events, *screen.get_size())
+
+        cur_ms = pygame.time.get_ticks()
+        if not player["paused"]:
+            stats = play_to(player, stats, player["ms"] + (cur_ms - last_ms) * player["speed"])
+            if player["ms"] >= player["last_ms"]:
+                player["paused"] = True
+        last_ms = cur_ms
+
+        stats["connected"] = not in_gap(player["events"], player["ms"])
+        stats["fps"] = clock.get_fps()
+        sticks = buffered_samples(stats, -1)[0, :4].tolist() if stats["timestamps"] else [0.0] * 4
+        mode["draw"](screen, fonts, stats, sticks, player["ms"], **mode["draw_args"])
+        draw_play_status(screen, fonts[16], player)
+        pygame.display.flip()
+
+        clock.tick(player["max_fps"])
+
+
+def play_main(args):
+    '''
+        PLAY
+    '''
+
+    mode = "stick" if args.stick else "recorder"
+    player = init_player(args.play, mode, args.fps, args.causal, args.cache)
+    player["speed"] = min(PLAY_SPEEDS, key=lambda speed: abs(speed - args.speed))
+    player["ms"] = min(player["first_ms"] + round(args.seek * 1000), player["last_ms"])
+
+    print(f"Playing {args.play} in {mode} mode, {(player['last_ms'] - player['first_ms']) / 1000:.1f}s")
+    print(f"{Style.BRIGHT}Space: pause, Up/Down: speed, Left/Right: {PLAY_SEEK_MS // 1000}s, PageUp/PageDown: {PLAY_SEEK_LONG_MS // 1000}s, "
+          f"Home/End, ./,: step a sample, click the bar: seek{Style.RESET_ALL}")
+
+    pygame.init()
+    screen = pygame.display.set_mode(player["mode"]["size"])
+    pygame.display.set_caption(f"GPSA: {os.path.basename(args.play)}")
+    play_recording(screen, player, Event())
+    pygame.quit()
+
+
+# SOAK harness
+SOAK_CHECKPOINT_MS = 5 * 60 * 1000
+SOAK_WARMUP_MS = max(HISTORY_SPANS_MS) + AGGR_MAX_MS #until every buffer is full
+SOAK_STALL_RATE = 0.01 #samples delayed by a busy machine
+SOAK_STALL_MS = (10, 200)
+# fails when a series is projected to grow over the run by more than (rate of its mean, and absolute)
+SOAK_MAX_GROWTH = {"memory": (0.05, 64 * 1024), "latency": (1.0, 0), "buffers": (0.5, 4)}
+
+def synthetic_joystick(state, num_buttons = len(BUTTONS_MAP), seed = 0):
+    """A stand-in for pygame.joystick.Joystick whose inputs follow state["ms"].
+
+    Each axis flicks back and forth in bursts with noise at rest, and the buttons are pressed periodically.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    def get_axis(axis):
+        ms = state["ms"]
+        period = 1500 + 700 * axis
+        value = rng.normal(0, 0.004)
+        if (ms // period) % 3 == 0:
+            amplitude = 0.3 + 0.7 * ((ms // period) * 0.618 % 1)
+            value += amplitude * math.sin(ms / (120 + 35 * axis) + axis)
+        # SDL axes end at 32767
+        return min(max(value, -1), (JOYSTICK_AXIS_SCALE - 1) / JOYSTICK_AXIS_SCALE)
+
+    def get_button(button):
+        return int((state["ms"] // (400 + 37 * button)) % 5 == 0)
+
+    return types.SimpleNamespace(
+        get_axis=get_axis,
+        get_button=get_button,
+        get_numbuttons=lambda: num_buttons,
+        get_numaxes=lambda: len(ANALYZE_AXES),
+        get_name=lambda: "Synthetic Controller",
+    )
+
+
+def sample_buffer_lengths(stats):
+    """Lengths of the buffers holding one entry per buffered sample, which must stay in step."""
+
+    lengths = {key: len(stats[key]) for key in ["timestamps", "magnitudes"]}
+    lengths["raw"] = len(stats["raw"]) // len(ANALYZE_AXES)
+    lengths.update({f'btn.{i}': len(button) for i, button in enumerate(stats["buttons"])})
+    lengths.update({key: len(stats["max"][key]) for key in ANALYZE_KEYS + [ANALYZE_COLOR_KEY]})
+    return lengths
+
+
+def series_growth(values, kind):
+    """Growth of a series over its span by a least squares line.
+
+    Returns:
+        tuple[float, bool]: the growth relative to the mean, and if it exceeds SOAK_MAX_GROWTH[kind].
+    """
+
+    values = np.asarray(values, dtype=float)
+    if len(values) < 3:
+        return 0.0, False
+    growth = np.polyfit(np.arange(len(values)), values, 1)[0] * (len(values) - 1)
+    rate, absolute = SOAK_MAX_GROWTH[kind]
+    mean = max(abs(values.mean()), 1)
+    return growth / mean, growth > max(rate * mean, absolute)
+
+
+def soak(hours, raw = False, seed = 0):
+    """Drives the recorder pipeline with synthetic inputs for a simulated run of hours, as fast as it goes.
+
+    Args:
+        hours (float): simulated length of the run.
+        raw (bool): buffers the raw int16 axes as --raw does.
+        seed (int): seed of the synthetic inputs and stalls.
+
+    Returns:
+        tuple[list[dict], list[str]]: a checkpoint every SOAK_CHECKPOINT_MS with "ms", "memory" (peak traced bytes),
+                                      "latency" (median µs per sample), "max_latency" and the peak buffer lengths,
+                                      and the failures found.
+    """
+
+    state = {"ms": 0}
+    joystick = synthetic_joystick(state, seed=seed)
+    stats = init_stats(joystick, raw=raw)
+    rng = np.random.default_rng(seed)
+    end_ms = int(hours * 3600 * 1000)
+
+    checkpoints = []
+    failures = []
+    latencies = array.array('d')
+    peaks = dict.fromkeys(["samples", "max_speeds", "events"], 0)
+    warm_snapshot = None
+    next_checkpoint_ms = SOAK_CHECKPOINT_MS
+
+    tracemalloc.start()
+    try:
+        with open(os.devnull, 'w', newline='') as fd:
+            writers = (csv.writer(fd), csv.writer(fd))
+            while state["ms"] < end_ms:
+                state["ms"] += SAMPLING_RATE
+                if rng.random() < SOAK_STALL_RATE:
+                    state["ms"] += int(rng.integers(*SOAK_STALL_MS))
+
+                start = time.perf_counter()
+                recorder_mode_measure(joystick, stats, state["ms"], writers)
+                latencies.append((time.perf_counter() - start) * 1e6)
+                # peaks over the checkpoint, a snapshot depends on the stalls and movements of the moment
+                peaks["samples"] = max(peaks["samples"], len(stats["timestamps"]))
+                peaks["max_speeds"] = max(peaks["max_speeds"], sum(map(len, stats["max"]["max_speeds"])))
+                peaks["events"] = max(peaks["events"], len(stats["max"]["events"]))
+
+                if state["ms"] < next_checkpoint_ms:
+                    continue
+                next_checkpoint_ms += SOAK_CHECKPOINT_MS
+
+                lengths = sample_buffer_lengths(stats)
+                if len(set(lengths.values())) > 1:
+                    failures.append(f'{state["ms"]}ms: buffers out of step {lengths}')
+                for axis, key in enumerate(ANALYZE_AXES):
+                    speeds_ms = stats["max"]["max_speeds_ms"][axis]
+                    if speeds_ms and state["ms"] - speeds_ms[0] > AGGR_MAX_MS:
+                        failures.append(f'{state["ms"]}ms: stale max speed of {key} from {speeds_ms[0]}ms')
+
+                checkpoints.append({
+                    "ms": state["ms"],
+                    "memory": tracemalloc.get_traced_memory()[1],
+                    "latency": float(np.median(latencies)),
+                    "max_latency": max(latencies),
+                    **peaks,
+                })
+                tracemalloc.reset_peak()
+                del latencies[:]
+                peaks = dict.fromkeys(peaks, 0)
+                if warm_snapshot is None and state["ms"] >= SOAK_WARMUP_MS:
+                    warm_snapshot = tracemalloc.take_snapshot()
+
+        warm = [checkpoint for checkpoint in checkpoints if checkpoint["ms"] >= SOAK_WARMUP_MS]
+        if len(warm) < 3:
+            failures.append(f'too short to find trends, run at least {(SOAK_WARMUP_MS + 3 * SOAK_CHECKPOINT_MS) / 3600000:.2f} hours')
+            return checkpoints, failures
+
+        for key, kind in [("memory", "memory"), ("latency", "latency"), ("samples", "buffers"), ("max_speeds", "buffers"), ("events", "buffers")]:
+            growth, failed = series_growth([checkpoint[key] for checkpoint in warm], kind)
+            if failed:
+                failures.append(f'{key} grows {growth * 100:.1f}% over the run')
+                if key == "memory":
+                    for stat in tracemalloc.take_snapshot().compare_to(warm_snapshot, 'lineno')[:5]:
+                        failures.append(f'    {stat}')
+    finally:
+        tracemalloc.stop()
+
+    return checkpoints, failures
+
+
+def soak_main(args):
+    '''
+        SOAK
+    '''
+
+    print(f"Soaking {args.soak} simulated hours...")
+    checkpoints, failures = soak(args.soak, args.raw)
+
+    print(f'{"time":>8} {"memory":>10} {"latency":>9} {"max":>9} {"samples":>8} {"speeds":>7} {"events":>7}')
+    for checkpoint in checkpoints:
+        print(f'{checkpoint["ms"] / 3600000:7.2f}h {checkpoint["memory"] / 1024:8.0f}KB '
+              f'{checkpoint["latency"]:7.1f}µs {checkpoint["max_latency"]:7.0f}µs '
+              f'{checkpoint["samples"]:8} {checkpoint["max_speeds"]:7} {checkpoint["events"]:7}')
+
+    if failures:
+        print(f"\n{Style.BRIGHT}FAILED{Style.RESET_ALL}")
+        for failure in failures:
+            print(failure)
+        sys.exit(1)
+    print(f"\n{Style.BRIGHT}OK{Style.RESET_ALL}")
+
+
+def realtime_gui(screen, joystick, stop_event, change_event, stats):
+    visualization_thread = None
+    
+    visualization_thread = Thread(target=recorder_mode_visualize, args=(screen, joystick, stats, stop_event, change_event, False))
+    visualization_thread.start()
+        
+    measure(gui_mode_measure, joystick, stats, stop_event, change_event)
+    if visualization_thread:
+        visualization_thread.join()
+
+def recorder_with_gui(screen, joystick, stop_event, change_event, stats):
+    '''
+        RECORDER with GUI
+    '''
+    recorder(screen, joystick, stop_event, change_event, True, stats)
+
+def recorder_without_gui(screen, joystick, stop_event, change_event, stats):
+    '''
+        RECORDER without GUI
+    '''
+    recorder(screen, joystick, stop_event, change_event, False, stats)
+
+def recorder(screen, joystick, stop_event, change_event, with_gui, stats):
+
+    visualization_thread = None
+    
+    if with_gui:
+        visualization_thread = Thread(target=recorder_mode_visualize, args=(screen, joystick, stats, stop_event, change_event, True))
+        visualization_thread.start()
+        
+    measure(recorder_mode_measure, joystick, stats, stop_event, change_event, True)
+    if visualization_thread:
+        visualization_thread.join()
+
+def stick_analyzer(screen, joystick, stop_event, change_event, stats):
+    '''
+        STICK ANALYZER
+    '''
+
+    visualization_thread = Thread(target=stick_mode_visualize, args=(screen, joystick, stats, stop_event, change_event))
+    visualization_thread.start()
+        
+    measure(stick_mode_measure, joystick, stats, stop_event, change_event)
+    visualization_thread.join()
+
+def init_stats(joystick, max_fps = VISUALIZE_FRAME_RATE, raw = False, causal = False, sampler = None):
+    """Prepares the stats shared by the measure and visualize threads.
+
+    "joystick" is replaced when the controller is reconnected.
+    "sampler" is init_sampler() of the measure loop.
+    """
+
+    return {
+        "timestamps": [],
+        # the only buffered copy of the axes, len(ANALYZE_AXES) int16 values per sample
+        "raw": array.array('h'),
+        "record_raw": raw,
+        "magnitudes": [],
+        "magnitude_sum": np.zeros(2),
+        "magnitude_avg": np.zeros(2),
+        "magnitude_percentiles": None,
+        "history": init_history_pyramid(),
+        "history_zoom": 0,
+        "noise": init_noise_profile(),
+        "stick_map": init_stick_map(),
+        "max": init_analyzed_stats(causal=causal),
+        "buttons": [[] for i in range(joystick.get_numbuttons())],
+        "joystick": joystick,
+        "connected": True,
+        "removed_guid": None,
+        "fps": 0,
+        "max_fps": max_fps,
+        "sampler": sampler,
+        "new_data": Event(),
+        "last_input_ms": 0
+    }
+
+def init_pygame(to_run_func, width, height, transparent, pin_on_top, max_fps = VISUALIZE_FRAME_RATE, raw = False, causal = False, sampler = None):
+    stop_event = Event()
+    change_event = Event()
+
+    pygame.init()
+    joystick = init_joystick()
+    if joystick is None:
+        print("Couldn't find Controller.")
+        input("Press Enter to exit...")
+        return
         
-        if change_event.is_set():
-            pygame.quit()
-            change_event.clear()
+    screen = None
+    if win32gui is None:
+        screen = pygame.display.set_mode((width, height), pygame.NOFRAME if pin_on_top else 0)
+    elif transparent:
+        if pin_on_top:
+            screen = pygame.display.set_mode((width, height), pygame.NOFRAME)
+        else:
+            screen = pygame.display.set_mode((width, height))#, pygame.NOFRAME)
+        hwnd = pygame.display.get_wm_info()["window"]
+        win32gui.SetWindowLong(hwnd, win32con.GWL_EXSTYLE, win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE) | win32con.WS_EX_LAYERED)
+        win32gui.SetLayeredWindowAttributes(hwnd, win32api.RGB(*(128, 128, 128)), 0, win32con.LWA_COLORKEY)
+        if pin_on_top:
+            win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, PIN_ON_TOP_POS[0], PIN_ON_TOP_POS[1], 0, 0, win32con.SWP_NOSIZE)
+    else:
+        if pin_on_top:
+            screen = pygame.display.set_mode((width, height), pygame.NOFRAME)
+            hwnd = pygame.display.get_wm_info()["window"]
+            win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, PIN_ON_TOP_POS[0], PIN_ON_TOP_POS[1], 0, 0, win32con.SWP_NOSIZE)
+        else:
+            screen = pygame.display.set_mode((width, height))
+
+    pygame.display.set_caption("GPSA: Game Pad Stats Analyzer")
+
+    #prepare stats
+    stats = init_stats(joystick, max_fps, raw, causal, sampler)
+
+    to_run_func(screen, joystick, stop_event, change_event, stats)
+    pygame.quit()
 
 
 def parse_args():
@@ -1113,24 +4211,112 @@ def parse_args():
                     action="store_true")
     parser.add_argument("-p", "--pin", help="pin window on top",
                     action="store_true")
-    return parser.parse_args()
+    parser.add_argument("--raw", help="record raw int16 axis values instead of calibrated ones",
+                    action="store_true")
+    parser.add_argument("--cpu", help="pin sampling to this CPU, with deadline timing (Linux)",
+                    type=int)
+    parser.add_argument("--realtime", help="sample with SCHED_FIFO or a raised priority when allowed, with deadline timing (Linux)",
+                    action="store_true")
+    parser.add_argument("--sweep", help="threshold sweep over recordings",
+                    nargs="+", metavar="RECORDING")
+    parser.add_argument("--grid", help="threshold values to sweep, e.g. big_movement=0.05,0.1 (repeatable)",
+                    action="append", metavar="KEY=V1,V2")
+    parser.add_argument("--labels", help="labeled movement segments CSV (file,axis,begin_ms,end_ms) for --sweep")
+    parser.add_argument("--report", help="write an HTML session report of a recording",
+                    metavar="RECORDING")
+    parser.add_argument("--points", help=f"points of each plot in the report (default: {REPORT_POINTS})",
+                    type=int, default=REPORT_POINTS)
+    parser.add_argument("--causal", help="analyze the newest samples from past samples only, for lower latency",
+                    action="store_true")
+    parser.add_argument("--check-causal", help="compare the causal analyzer with the centered one over recordings",
+                    nargs="+", metavar="RECORDING")
+    parser.add_argument("--columns", help="write a recording with the per-sample analysis columns of older versions (-o, default: RECORDING.columns.csv)",
+                    metavar="RECORDING")
+    parser.add_argument("--compare", help="align two recordings and compare them axis by axis (-o for the overlay image)",
+                    nargs=2, metavar=("A", "B"))
+    parser.add_argument("--index", help="add new or changed recordings (files or directories) to the catalog",
+                    nargs="+", metavar="RECORDING")
+    parser.add_argument("--find", help="find sessions in the catalog with a speed above SPEED, e.g. 'rx>0.01'",
+                    metavar="AXIS>SPEED")
+    parser.add_argument("--controller", help="only sessions on controllers named like this (with --find)")
+    parser.add_argument("--query", help="run an SQL query on the catalog (sessions, minutes and events tables)",
+                    metavar="SQL")
+    parser.add_argument("--catalog", help=f"catalog file (default: {CATALOG_FILE})",
+                    default=CATALOG_FILE)
+    parser.add_argument("--cache", help=f"directory of the analysis cache of recordings (default: {ANALYSIS_CACHE_DIR})",
+                    default=ANALYSIS_CACHE_DIR)
+    parser.add_argument("--no-cache", help="analyze recordings again without the analysis cache",
+                    action="store_true")
+    parser.add_argument("--gesture", help="find segments like the gesture from BEGIN_MS to END_MS of a recording (-o for a CSV of the matches)",
+                    nargs=3, metavar=("RECORDING", "BEGIN_MS", "END_MS"))
+    parser.add_argument("--search", help="recordings (files or directories) searched by --gesture (default: its recording)",
+                    nargs="+", metavar="RECORDING")
+    parser.add_argument("--axes", help=f"axes compared by --gesture (default: {','.join(GESTURE_AXES)})",
+                    default=",".join(GESTURE_AXES))
+    parser.add_argument("--top", help=f"best matches of --gesture, 0 for all under --max-distance (default: {GESTURE_TOP})",
+                    type=int, default=GESTURE_TOP)
+    parser.add_argument("--max-distance", help="RMS distance per sample of a --gesture match",
+                    type=float)
+    parser.add_argument("--render", help="render a recording offscreen into PNG frames (-o directory) or a raw bgr0 stream (-o *.rgb, - for stdout), -s for the stick mode visuals",
+                    metavar="RECORDING")
+    parser.add_argument("--play", help="play a recording in the recorder visuals, -s for the stick mode visuals",
+                    metavar="RECORDING")
+    parser.add_argument("--seek", help="start --play at this second of the recording",
+                    type=float, default=0)
+    parser.add_argument("--speed", help=f"speed of --play, one of {', '.join(f'{speed:g}' for speed in PLAY_SPEEDS)} (default: 1)",
+                    type=float, default=1)
+    parser.add_argument("--soak", help="drive the recorder with synthetic inputs for simulated hours and fail on growth",
+                    metavar="HOURS", type=float)
+    parser.add_argument("-j", "--jobs", help="number of worker processes (default: CPU count)",
+                    type=int)
+    parser.add_argument("-o", "--out", help="output file")
+    parser.add_argument("-f", "--fps", help=f"max FPS of the window, or FPS of --render (default: {VISUALIZE_FRAME_RATE})",
+                    type=int, default=VISUALIZE_FRAME_RATE)
+    args = parser.parse_args()
+    if args.no_cache:
+        args.cache = None
+    return args
 
 def main():
-    prepare()
-    
     '''
         Determin a mode to run.
     '''
     args = parse_args()
-    if args.gui:
-        init_pygame(realtime_gui, 460, 250, True, args.pin)
+
+    # stdout carries the frames of --render -o -
+    if not (args.render and args.out == "-"):
+        prepare()
+
+    if args.sweep:
+        sweep_main(args)
+    elif args.report:
+        report_main(args)
+    elif args.check_causal:
+        causal_main(args)
+    elif args.columns:
+        columns_main(args)
+    elif args.compare:
+        compare_main(args)
+    elif args.gesture:
+        gesture_main(args)
+    elif args.render:
+        render_main(args)
+    elif args.play:
+        play_main(args)
+    elif args.soak:
+        soak_main(args)
+    elif args.index or args.find or args.query:
+        catalog_main(args)
+    elif args.gui:
+        init_pygame(realtime_gui, 460, 250, True, args.pin, args.fps, causal=args.causal, sampler=init_sampler(args.cpu, args.realtime))
     elif args.record:
-        init_pygame(recorder_with_gui, 460, 250, True, args.pin)
+        init_pygame(recorder_with_gui, 460, 250, True, args.pin, args.fps, args.raw, args.causal, init_sampler(args.cpu, args.realtime))
     elif args.stick:
-        init_pygame(stick_analyzer, 1100, 450, False, args.pin)
+        init_pygame(stick_analyzer, 1100, 490, False, args.pin, args.fps, sampler=init_sampler(args.cpu, args.realtime))
     else:
-        init_pygame(realtime_gui, 460, 250, True, True)
+        init_pygame(realtime_gui, 460, 250, True, True, args.fps, causal=args.causal, sampler=init_sampler(args.cpu, args.realtime))
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file